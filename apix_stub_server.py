@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the APIX validate / publish endpoints.
+
+Applies a small subset of the APIX rules (mandatory apiTechnicalName/version,
+lifecycleStatus/classification enums, countryCode/groupMemberCode formats,
+non-empty platform/snowData/sourceCode) so bulk validation and publishing can
+be exercised without network access to APIX.
+
+Usage:
+    python apix_stub_server.py --port 8089 --latency 0.2
+    python apix_stub_server.py --publish-errors 2   # first two publishes answer 503
+    APIX_BASE_URL=http://localhost:8089 python backend/app.py
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENUMS = {
+    'lifecycleStatus': ['ACTIVE', 'INACTIVE', 'DEPRECATED', 'DEVELOPMENT'],
+    'classification': ['INTERNAL', 'EXTERNAL', 'CONFIDENTIAL', 'PUBLIC']
+}
+STATS = {'validate': 0, 'publish': 0, 'publish_replayed': 0}
+# Fault injection: the next N publish calls answer 503 (retry / backoff testing)
+FAULTS = {'publish_errors': 0}
+# Idempotency-Key -> (status, body) of the publish first made with it; a request repeating the key gets that answer again
+PUBLISHED_KEYS = {}
+
+
+def check_document(document):
+    """List of APIX-style error dicts for a document (empty if valid)"""
+    errors = []
+    api_list = ((document or {}).get('apiMetaData') or {}).get('apiMetaDataList')
+    if not isinstance(api_list, list) or not api_list:
+        return [{'field': 'apiMetaData.apiMetaDataList', 'message': 'must be a non-empty array'}]
+
+    for idx, api in enumerate(api_list):
+        prefix = f'apiMetaDataList[{idx}]'
+        name = api.get('apiTechnicalName')
+        if not name:
+            errors.append({'field': f'{prefix}.apiTechnicalName', 'message': 'is mandatory'})
+        elif not re.match(r'^[A-Za-z0-9]([A-Za-z0-9-]*[A-Za-z0-9])?$', str(name)):
+            errors.append({'field': f'{prefix}.apiTechnicalName', 'message': 'invalid format'})
+        if not api.get('version'):
+            errors.append({'field': f'{prefix}.version', 'message': 'is mandatory'})
+        for field, allowed in ENUMS.items():
+            if field in api and api[field] not in allowed:
+                errors.append({'field': f'{prefix}.{field}', 'message': f'must be one of {allowed}'})
+        for section in ('platform', 'snowData', 'sourceCode'):
+            if not api.get(section):
+                errors.append({'field': f'{prefix}.{section}', 'message': 'must not be empty'})
+        for group in api.get('consumingCountryGroups') or []:
+            if not re.match(r'^[A-Z]{2}$', str(group.get('countryCode', ''))):
+                errors.append({'field': f'{prefix}.consumingCountryGroups.countryCode', 'message': 'must be 2 uppercase letters'})
+            if not re.match(r'^[A-Z]{4}$', str(group.get('groupMemberCode', ''))):
+                errors.append({'field': f'{prefix}.consumingCountryGroups.groupMemberCode', 'message': 'must be 4 uppercase letters'})
+    return errors
+
+
+def make_handler(latency):
+    class ApixStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            try:
+                document = json.loads(self.rfile.read(length) or b'null')
+            except ValueError:
+                return self._send(400, {'errors': [{'message': 'body is not valid JSON'}]})
+            if latency:
+                time.sleep(latency)
+
+            if self.path.startswith('/api/v1/validate/apis'):
+                STATS['validate'] += 1
+                errors = check_document(document)
+                if errors:
+                    return self._send(400, {'status': 'INVALID', 'errors': errors})
+                return self._send(200, {'status': 'VALID', 'apiCount': len(document['apiMetaData']['apiMetaDataList'])})
+
+            if self.path.startswith('/api/v1/publish/apis'):
+                STATS['publish'] += 1
+                key = self.headers.get('Idempotency-Key')
+                if key in PUBLISHED_KEYS:
+                    STATS['publish_replayed'] += 1
+                    return self._send(*PUBLISHED_KEYS[key])
+                if FAULTS['publish_errors'] > 0:
+                    FAULTS['publish_errors'] -= 1
+                    return self._send(503, {'message': 'Service Unavailable (injected)'})
+                errors = check_document(document)
+                if errors:
+                    answer = (400, {'status': 'REJECTED', 'errors': errors})
+                else:
+                    answer = (200, {'status': 'PUBLISHED', 'apiCount': len(document['apiMetaData']['apiMetaDataList'])})
+                if key:
+                    PUBLISHED_KEYS[key] = answer
+                return self._send(*answer)
+
+            return self._send(404, {'message': 'Not Found'})
+
+    return ApixStubHandler
+
+
+def start_stub_server(port=0, latency=0.0):
+    """Start the stand-in in a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local APIX validate/publish stand-in')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--publish-errors', type=int, default=0, help='answer the first N publishes with 503')
+    args = parser.parse_args()
+    FAULTS['publish_errors'] = args.publish_errors
+    server = ThreadingHTTPServer(('0.0.0.0', args.port), make_handler(args.latency))
+    print(f"APIX stub listening on http://localhost:{args.port} (latency {args.latency}s)")
+    server.serve_forever()
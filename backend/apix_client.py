@@ -0,0 +1,382 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from github_client import RETRY_STATUS_CODES, proxies_from_env, ssl_verify_from_env
+from resilience import DependencyUnavailable, get_dependency
+from validation_cache import canonical_json, document_hash
+
+
+# APIX service endpoints and connection settings
+APIX_BASE_URL = os.environ.get('APIX_BASE_URL', 'https://dev.apix.uk.hsbc')
+APIX_VALIDATE_PATH = '/api/v1/validate/apis'
+APIX_PUBLISH_PATH = '/api/v1/publish/apis'
+APIX_POOL_SIZE = int(os.environ.get('APIX_POOL_SIZE', '20'))
+APIX_CONNECT_TIMEOUT = float(os.environ.get('APIX_CONNECT_TIMEOUT', '5'))
+APIX_READ_TIMEOUT = float(os.environ.get('APIX_READ_TIMEOUT', '30'))
+APIX_MAX_RETRIES = int(os.environ.get('APIX_MAX_RETRIES', '2'))
+APIX_RETRY_BACKOFF = float(os.environ.get('APIX_RETRY_BACKOFF', '0.5'))
+# Documents validated at once by /api/validate/bulk
+APIX_BULK_VALIDATE_CONCURRENCY = int(os.environ.get('APIX_BULK_VALIDATE_CONCURRENCY', '8'))
+# Queued publishes: attempts on 5xx/timeouts, first retry delay (doubled, jittered) and how long
+# a successful publish of identical content is returned instead of publishing again
+APIX_PUBLISH_MAX_ATTEMPTS = int(os.environ.get('APIX_PUBLISH_MAX_ATTEMPTS', '5'))
+APIX_PUBLISH_RETRY_DELAY = float(os.environ.get('APIX_PUBLISH_RETRY_DELAY', '2'))
+APIX_PUBLISH_DEDUPE_WINDOW = float(os.environ.get('APIX_PUBLISH_DEDUPE_WINDOW', '86400'))
+# Bulk publish: API blocks packed per APIX request (count and serialized size bounds), requests in flight
+APIX_PUBLISH_BATCH_MAX_APIS = int(os.environ.get('APIX_PUBLISH_BATCH_MAX_APIS', '50'))
+APIX_PUBLISH_BATCH_MAX_BYTES = int(os.environ.get('APIX_PUBLISH_BATCH_MAX_BYTES', str(1024 * 1024)))
+APIX_BULK_PUBLISH_CONCURRENCY = int(os.environ.get('APIX_BULK_PUBLISH_CONCURRENCY', '4'))
+# Attempts per batch while APIX answers 429/5xx or cannot be reached (delay as for queued publishes)
+APIX_PUBLISH_BATCH_ATTEMPTS = int(os.environ.get('APIX_PUBLISH_BATCH_ATTEMPTS', '3'))
+
+# Batch answers that reject its content (or size): split to isolate the offending APIs.
+# Throttling and server errors say nothing about the content: the whole batch backs off and retries
+BATCH_SPLIT_STATUS_CODES = (400, 413, 422)
+BATCH_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+VALIDATE_INVOCATION_SOURCE = 'CD_ABC'
+
+
+class ApixClient:
+    """
+    Shared APIX HTTP client built on a pooled requests.Session.
+
+    - Keep-alive connections are reused across validate/publish calls
+    - Every request gets a default (connect, read) timeout unless one is passed
+    - Connection errors are retried for every call; validation is read-only, so
+      it is also retried on 5xx with exponential backoff (publish is not)
+    - PROXIES / SSL_VERIFY are applied to every request
+    - Every request goes through the 'apix' circuit breaker and bulkhead (see
+      resilience); while APIX is failing or saturated, calls fail fast with
+      DependencyUnavailable instead of holding a request thread
+    """
+
+    def __init__(self, base_url=APIX_BASE_URL, proxies=None, verify=True, pool_size=APIX_POOL_SIZE,
+                 timeout=(APIX_CONNECT_TIMEOUT, APIX_READ_TIMEOUT),
+                 max_retries=APIX_MAX_RETRIES, backoff_factor=APIX_RETRY_BACKOFF):
+        self.base_url = (base_url or '').rstrip('/')
+        self.proxies = proxies if proxies else None
+        self.verify = verify
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.guard = get_dependency('apix')
+
+        # Only connect errors here: the request never reached APIX, so even publish is safe to resend
+        retry = Retry(total=max_retries, connect=max_retries, read=0, status=0, backoff_factor=backoff_factor)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @staticmethod
+    def headers(invocation_source):
+        return {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Invocation-Source': invocation_source,
+            'Authorization': os.environ.get('APIX_VALIDATION_TOKEN', 'REPLACE_ME')
+        }
+
+    def post(self, path, document, invocation_source, extra_headers=None, bulk=False, **kwargs):
+        """bulk: queue for an APIX bulkhead slot instead of being turned away after APIX_BULKHEAD_WAIT"""
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('proxies', self.proxies)
+        kwargs.setdefault('verify', self.verify)
+        headers = {**self.headers(invocation_source), **(extra_headers or {})}
+        return self.guard.call(self.session.post, f'{self.base_url}{path}', json=document, headers=headers,
+                               queued=bulk, **kwargs)
+
+    def validate(self, document, invocation_source=VALIDATE_INVOCATION_SOURCE, **kwargs):
+        """POST a document to the validate endpoint (retried on 5xx / read errors)"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.post(APIX_VALIDATE_PATH, document, invocation_source, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.max_retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt == self.max_retries:
+                    return response
+            time.sleep(self.backoff_factor * (2 ** attempt))
+
+    def publish(self, document, invocation_source, idempotency_key=None, **kwargs):
+        """
+        POST a document to the publish endpoint (not retried once sent).
+        idempotency_key is sent as the Idempotency-Key header: APIX applies a request
+        re-sent with the same key (e.g. after a timeout) only once.
+        """
+        extra_headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+        return self.post(APIX_PUBLISH_PATH, document, invocation_source, extra_headers, **kwargs)
+
+    @property
+    def validate_url(self):
+        return f'{self.base_url}{APIX_VALIDATE_PATH}'
+
+    @property
+    def publish_url(self):
+        return f'{self.base_url}{APIX_PUBLISH_PATH}'
+
+
+def publish_idempotency_key(scope, document):
+    """Same scope (normalized repo URL, or a batch's Invocation-Source) + same canonical content -> same key"""
+    return hashlib.sha256(f'{scope}\n{document_hash(document)}'.encode()).hexdigest()[:32]
+
+
+def rejected_api_indexes(body):
+    """
+    Positions in apiMetaDataList that APIX errors point at ('apiMetaDataList[3].version'),
+    mapped to their errors; empty when the answer does not say which APIs were rejected
+    """
+    rejected = {}
+    errors = body.get('errors') if isinstance(body, dict) else None
+    for error in errors if isinstance(errors, list) else []:
+        match = re.search(r'apiMetaDataList\[(\d+)\]', str(error.get('field', '')) if isinstance(error, dict) else '')
+        if match:
+            rejected.setdefault(int(match.group(1)), []).append(error)
+    return rejected
+
+
+def apix_response_json(response):
+    """(body, None) or (None, error dict) for a response that is not JSON"""
+    try:
+        return response.json(), None
+    except ValueError as ve:
+        return None, {
+            'error': 'Non-JSON response from validation service',
+            'status_code': response.status_code,
+            'content_type': response.headers.get('Content-Type'),
+            'body_sample': (response.text or '')[:400],
+            'exception': str(ve)
+        }
+
+
+def validation_outcome(response):
+    """Verdict for a validate response: dict with valid, status_code and details (200) or errors"""
+    body, body_err = apix_response_json(response)
+    if body_err:
+        return {'valid': False, **body_err}
+    if response.status_code == 200:
+        return {'valid': True, 'status_code': 200, 'message': 'JSON validation successful', 'details': body}
+    return {'valid': False, 'status_code': response.status_code, 'message': 'JSON validation failed', 'errors': body}
+
+
+def validate_document(document, cache=None, client=None, doc_hash=None, bulk=False):
+    """validation_outcome for one document, answered from the ValidationCache when possible"""
+    client = client or get_apix_client()
+    if cache is not None:
+        doc_hash = doc_hash or document_hash(document)
+        cached = cache.get(document, doc_hash)
+        if cached is not None:
+            return cached
+    outcome = validation_outcome(client.validate(document, bulk=bulk))
+    if cache is not None:
+        cache.store(document, outcome, doc_hash)
+    return outcome
+
+
+def validate_many(documents, on_result, concurrency=APIX_BULK_VALIDATE_CONCURRENCY, client=None, cache=None):
+    """
+    Validate many documents concurrently through the pooled client.
+
+    Args:
+        documents: list of (key, document) pairs; identical documents are validated once
+        on_result: callback invoked with (key, outcome dict) as each validation finishes;
+                   outcome is validation_outcome(...) plus elapsed_ms, or an 'error' for
+                   requests that did not get an answer ('unavailable' with the reason when
+                   the call was not made because APIX's circuit is open)
+        concurrency: max validations in flight, at most the APIX bulkhead size; calls queue
+                     for a bulkhead slot instead of being turned away
+        cache: optional ValidationCache consulted before and filled after each call
+
+    Returns:
+        dict with passed / failed / errors / unavailable counts
+    """
+    client = client or get_apix_client()
+    concurrency = min(max(1, concurrency), client.guard.bulkhead.max_concurrent)
+    summary = {'passed': 0, 'failed': 0, 'errors': 0, 'unavailable': 0}
+
+    # canonical hash -> (document, keys sharing it)
+    groups = {}
+    for key, document in documents:
+        doc_hash = document_hash(document)
+        groups.setdefault(doc_hash, (document, []))[1].append(key)
+
+    def run(doc_hash, document):
+        started = time.perf_counter()
+        try:
+            outcome = validate_document(document, cache=cache, client=client, doc_hash=doc_hash, bulk=True)
+        except requests.exceptions.RequestException as e:
+            outcome = {'valid': False, 'error': f'Validation API request failed: {str(e)}'}
+        except DependencyUnavailable as e:
+            outcome = {'valid': False, 'error': str(e), 'unavailable': e.reason, 'retry_after': int(e.retry_after) + 1}
+        outcome['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return outcome
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='apix-validate') as executor:
+        futures = {executor.submit(run, doc_hash, document): keys for doc_hash, (document, keys) in groups.items()}
+        for future in as_completed(futures):
+            outcome = future.result()
+            for key in futures[future]:
+                if outcome['valid']:
+                    summary['passed'] += 1
+                elif 'unavailable' in outcome:
+                    summary['unavailable'] += 1
+                elif 'error' in outcome:
+                    summary['errors'] += 1
+                else:
+                    summary['failed'] += 1
+                on_result(key, outcome)
+
+    return summary
+
+
+def pack_batches(items, max_apis=APIX_PUBLISH_BATCH_MAX_APIS, max_bytes=APIX_PUBLISH_BATCH_MAX_BYTES):
+    """
+    Pack (key, api_block) pairs, in order, into batches of at most max_apis blocks and
+    about max_bytes of JSON each (a block larger than max_bytes is sent on its own)
+    """
+    batches, current, size = [], [], 0
+    for key, block in items:
+        block_size = len(canonical_json(block).encode()) + 1
+        if current and (len(current) >= max_apis or size + block_size > max_bytes):
+            batches.append(current)
+            current, size = [], 0
+        current.append((key, block))
+        size += block_size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def publish_batch(items, invocation_source, on_result, client=None):
+    """
+    Publish (key, api_block) pairs as one apiMetaDataList.
+    The Idempotency-Key is derived from the Invocation-Source and the batch content, so a
+    re-sent batch (after a timeout or a lost connection) is applied once by APIX.
+    A batch rejected for its content (400/413/422) reports the APIs the errors point at as
+    failed and publishes the rest again in one request; when the answer does not say which
+    APIs were rejected the batch is split in half, down to single APIs, so one bad API does
+    not fail the others and every API gets its own outcome. 429/5xx answers, timeouts and
+    connection failures are retried for the whole batch with backoff (up to
+    APIX_PUBLISH_BATCH_ATTEMPTS). Anything else is reported for every API, marked retryable
+    when it is worth trying again later.
+    Returns the number of APIX requests made.
+    """
+    client = client or get_apix_client()
+    document = {'apiMetaData': {'apiMetaDataList': [block for _, block in items]}}
+    idempotency_key = publish_idempotency_key(invocation_source, document)
+    started = time.perf_counter()
+    requests_made = 0
+    for attempt in range(1, APIX_PUBLISH_BATCH_ATTEMPTS + 1):
+        retry_after = None
+        try:
+            response = client.publish(document, invocation_source, idempotency_key=idempotency_key, bulk=True)
+        except DependencyUnavailable as e:
+            outcome = {'published': False, 'retryable': True, 'error': str(e), 'unavailable': e.reason}
+            break
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            requests_made += 1
+            outcome = {'published': False, 'retryable': True, 'error': f'Publish API request failed: {str(e)}'}
+        except requests.exceptions.RequestException as e:
+            requests_made += 1
+            outcome = {'published': False, 'retryable': True, 'error': f'Publish API request failed: {str(e)}'}
+            break
+        else:
+            requests_made += 1
+            body, body_err = apix_response_json(response)
+            if response.status_code == 200:
+                outcome = {'published': True, 'status_code': 200, 'batch_size': len(items)}
+                break
+            outcome = {'published': False, 'status_code': response.status_code, 'errors': body if body_err is None else body_err}
+            if response.status_code in BATCH_SPLIT_STATUS_CODES and len(items) > 1:
+                rejected = {index: errors for index, errors in rejected_api_indexes(body).items() if index < len(items)}
+                if rejected:
+                    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+                    for index, errors in rejected.items():
+                        on_result(items[index][0], {'published': False, 'status_code': response.status_code, 'errors': errors,
+                                                    'attempts': attempt, 'elapsed_ms': elapsed_ms})
+                    rest = [item for index, item in enumerate(items) if index not in rejected]
+                    return requests_made + (publish_batch(rest, invocation_source, on_result, client) if rest else 0)
+                half = len(items) // 2
+                return requests_made + publish_batch(items[:half], invocation_source, on_result, client) \
+                    + publish_batch(items[half:], invocation_source, on_result, client)
+            if response.status_code not in BATCH_RETRY_STATUS_CODES:
+                break
+            outcome['retryable'] = True
+            try:
+                retry_after = float(response.headers.get('Retry-After'))
+            except (TypeError, ValueError):
+                retry_after = None
+        if attempt < APIX_PUBLISH_BATCH_ATTEMPTS:
+            time.sleep(retry_after if retry_after is not None else APIX_PUBLISH_RETRY_DELAY * 2 ** (attempt - 1))
+    outcome['attempts'] = attempt
+    outcome['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    for key, _ in items:
+        on_result(key, dict(outcome))
+    return requests_made
+
+
+def publish_many(batches, on_result, concurrency=APIX_BULK_PUBLISH_CONCURRENCY, client=None):
+    """
+    Publish batches concurrently through the pooled client.
+
+    Args:
+        batches: list of (invocation_source, [(key, api_block), ...]) - see pack_batches
+        on_result: callback invoked with (key, outcome dict) for every API as its batch finishes
+        concurrency: max batches in flight, at most the APIX bulkhead size; calls queue
+                     for a bulkhead slot instead of being turned away
+
+    Returns:
+        dict with published / failed / unavailable (not sent: APIX circuit open) API counts
+        and the number of APIX requests made
+    """
+    client = client or get_apix_client()
+    concurrency = min(max(1, concurrency), client.guard.bulkhead.max_concurrent)
+    summary = {'published': 0, 'failed': 0, 'unavailable': 0, 'requests': 0}
+    lock = threading.Lock()
+
+    def record(key, outcome):
+        with lock:
+            summary['published' if outcome['published'] else 'unavailable' if 'unavailable' in outcome else 'failed'] += 1
+            on_result(key, outcome)
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='apix-publish') as executor:
+        futures = [executor.submit(publish_batch, items, source, record, client) for source, items in batches]
+        for future in as_completed(futures):
+            summary['requests'] += future.result()
+
+    return summary
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def configure_apix_client(base_url=APIX_BASE_URL, proxies=None, verify=True, **kwargs):
+    """Create (or replace) the process-wide APIX client"""
+    global _client
+    with _client_lock:
+        _client = ApixClient(base_url, proxies=proxies, verify=verify, **kwargs)
+        print(f"APIX client: {_client.base_url}, pool size {_client.pool_size}, timeout {_client.timeout}")
+        return _client
+
+
+def get_apix_client():
+    """Return the process-wide APIX client, building it from the environment if not configured yet"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = ApixClient(proxies=proxies_from_env(), verify=ssl_verify_from_env())
+    return _client
@@ -0,0 +1,117 @@
+from jsonschema import Draft7Validator
+
+
+# Mandatory fields (internal names) - APIs missing one are skipped when generating JSON
+MANDATORY_FIELDS = ['api_technical_name', 'version']
+MANDATORY_SECTIONS = ['platform', 'snowData', 'sourceCode']  # Must always exist
+
+# Validation rules (JSON key -> rule); used to auto-correct generated values and
+# compiled into APIX_SCHEMA for the local pre-validation of documents
+VALIDATION_RULES = {
+    'apiTechnicalName': {
+        'regex': r'^[A-Za-z0-9]([A-Za-z0-9-]*[A-Za-z0-9])?$',  # No leading/trailing hyphens
+        'error': 'Must contain only alphanumeric and hyphens, no leading/trailing hyphens'
+    },
+    'lifecycleStatus': {
+        'enum': ['ACTIVE', 'INACTIVE', 'DEPRECATED', 'DEVELOPMENT'],
+        'transform': 'uppercase',
+        'error': 'Must be one of: ACTIVE, INACTIVE, DEPRECATED, DEVELOPMENT (uppercase)'
+    },
+    'classification': {
+        'enum': ['INTERNAL', 'EXTERNAL', 'CONFIDENTIAL', 'PUBLIC'],
+        'transform': 'uppercase',
+        'error': 'Must be one of: INTERNAL, EXTERNAL, CONFIDENTIAL, PUBLIC (uppercase)'
+    },
+    'countryCode': {
+        'regex': r'^[A-Z]{2}$',
+        'transform': 'uppercase',
+        'error': 'Must be 2 uppercase letters'
+    },
+    'groupMemberCode': {
+        'regex': r'^[A-Z]{4}$',
+        'transform': 'uppercase',
+        'error': 'Must be 4 uppercase letters'
+    }
+}
+
+# Rules that apply to the entries of consumingCountryGroups rather than to the API itself
+COUNTRY_GROUP_FIELDS = ('countryCode', 'groupMemberCode')
+
+
+def _rule_schema(rule):
+    if 'enum' in rule:
+        return {'enum': rule['enum']}
+    return {'type': 'string', 'pattern': rule['regex']}
+
+
+def build_apix_schema():
+    """JSON Schema (draft 7) for an apiMetaData document, derived from the rules above"""
+    api_properties = {
+        field: _rule_schema(rule) for field, rule in VALIDATION_RULES.items() if field not in COUNTRY_GROUP_FIELDS
+    }
+    api_properties['version'] = {'type': ['string', 'number'], 'minLength': 1}
+    for section in MANDATORY_SECTIONS:
+        api_properties[section] = {'type': 'object', 'minProperties': 1}
+    api_properties['consumingCountryGroups'] = {
+        'type': 'array',
+        'items': {
+            'type': 'object',
+            'required': list(COUNTRY_GROUP_FIELDS),
+            'properties': {field: _rule_schema(VALIDATION_RULES[field]) for field in COUNTRY_GROUP_FIELDS}
+        }
+    }
+
+    return {
+        '$schema': 'http://json-schema.org/draft-07/schema#',
+        'type': 'object',
+        'required': ['apiMetaData'],
+        'properties': {
+            'apiMetaData': {
+                'type': 'object',
+                'required': ['apiMetaDataList'],
+                'properties': {
+                    'apiMetaDataList': {
+                        'type': 'array',
+                        'minItems': 1,
+                        'items': {
+                            'type': 'object',
+                            'required': ['apiTechnicalName', 'version'] + MANDATORY_SECTIONS,
+                            'properties': api_properties
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+
+APIX_SCHEMA = build_apix_schema()
+Draft7Validator.check_schema(APIX_SCHEMA)
+# Compiled once; iter_errors is pure CPU (no network hop)
+_validator = Draft7Validator(APIX_SCHEMA)
+
+
+def _rule_message(error):
+    """The rule's own error text for pattern/enum failures, jsonschema's message otherwise"""
+    field = error.path[-1] if error.path and isinstance(error.path[-1], str) else None
+    if error.validator in ('pattern', 'enum') and field in VALIDATION_RULES:
+        return f"{VALIDATION_RULES[field]['error']} (got {error.instance!r})"
+    if error.validator == 'minProperties' and field in MANDATORY_SECTIONS:
+        return f'Mandatory section {field} must not be empty'
+    return error.message
+
+
+def local_validation_errors(document):
+    """
+    Check a document against APIX_SCHEMA.
+    Returns a list of {'field', 'message'} dicts (empty if the document is locally valid).
+    """
+    errors = []
+    for error in sorted(_validator.iter_errors(document), key=lambda e: list(map(str, e.absolute_path))):
+        path = ''.join(f'[{part}]' if isinstance(part, int) else f'.{part}' for part in error.absolute_path).lstrip('.')
+        if error.validator == 'required':
+            # Report the missing property itself rather than its parent object
+            missing = error.message.split("'")[1] if "'" in error.message else ''
+            path = f'{path}.{missing}' if path else missing
+        errors.append({'field': path or '$', 'message': _rule_message(error)})
+    return errors
@@ -1,11 +1,10 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 
 from flask_cors import CORS
 
 import pandas as pd
 
-import yaml
-
 import json
 
 import os
@@ -16,13 +15,61 @@ from datetime import datetime
 
 import base64
 
-from collections import defaultdict
-
 import re
 
+import time
+
+import asyncio
+
+import queue
+
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from github_client import configure_github_client, github_auth_header
+
+from async_github import BULK_PR_CONCURRENCY, create_prs_concurrently
+
+from rate_limit import GitHubRateLimited, get_rate_limiter
+
+from pr_state import GITHUB_WEBHOOK_SECRET, PRStateStore, verify_webhook_signature
+
+from github_graphql import (
+    GraphQLError, GraphQLUnavailable, commit_file_and_open_pr, complete_commit_context, fetch_commit_context,
+    fetch_pr_statuses, fetch_repository_context, git_blob_sha
+)
+
+from jobs import JOB_RUNNER_AUTOSTART, JOBS_ENABLED, JobRunner, JobStore, TaskFailed
+
+from latency import LatencyRecorder
+
+from apix_schema import MANDATORY_FIELDS, MANDATORY_SECTIONS, VALIDATION_RULES, local_validation_errors
+
+from apix_client import (
+    APIX_BASE_URL, APIX_BULK_PUBLISH_CONCURRENCY, APIX_BULK_VALIDATE_CONCURRENCY, APIX_PUBLISH_BATCH_MAX_APIS,
+    APIX_PUBLISH_BATCH_MAX_BYTES, APIX_PUBLISH_DEDUPE_WINDOW, APIX_PUBLISH_MAX_ATTEMPTS, APIX_PUBLISH_RETRY_DELAY,
+    configure_apix_client, pack_batches, publish_idempotency_key, publish_many, validate_document, validate_many
+)
+
+from validation_cache import ValidationCache
+from resilience import GITHUB_MAX_CONCURRENT_CALLS, IO_WORKERS, DependencyUnavailable, dependencies_metrics
+from publish_snapshots import PUBLISH_SNAPSHOTS_ENABLED, SnapshotStore
+from uploads import (
+    ALLOWED_UPLOAD_EXTENSIONS, MAX_UPLOAD_BYTES, UPLOAD_ASYNC_PARSE, UPLOAD_DEDUPE_ENABLED, UPLOAD_EVENTS_KEEPALIVE,
+    UPLOAD_PARSE_WORKERS, SpooledUploadRequest, UploadProgress, UploadSessionStore, detach_upload_stream,
+    upload_content_hash, wants_async_upload
+)
+from pagination import paginate, parse_listing, project, wants_listing
+from excel_parser import normalize_repo_url, parse_transposed_excel
+from upload_sandbox import parse_upload
+
  
 
 app = Flask(__name__)
+# Uploads are spooled in memory (spilling to an anonymous temp file when large) and capped in size
+app.request_class = SpooledUploadRequest
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 
  
 
@@ -358,6 +405,41 @@ GITHUB_API_BASE = os.environ.get('GITHUB_API_BASE', 'https://alm-github.systems.
 
 print(f"GitHub API Base URL: {GITHUB_API_BASE}")
 
+# Shared pooled GitHub client (keep-alive, default timeouts, retry with backoff)
+github = configure_github_client(GITHUB_API_BASE, proxies=PROXIES, verify=SSL_VERIFY)
+
+# Shared pooled APIX client (validate / publish)
+apix = configure_apix_client(APIX_BASE_URL, proxies=PROXIES, verify=SSL_VERIFY)
+
+# APIX validation verdicts by canonical JSON hash - stats: GET /api/validate/cache
+validation_cache = ValidationCache()
+
+# Parsed Excel uploads by upload id (see /api/upload-excel, /api/generate-json-from-upload), shared by all workers
+upload_sessions = UploadSessionStore()
+
+# Background upload parses: status + progress events (GET /api/uploads/<upload_id>/events)
+upload_progress = UploadProgress()
+UPLOAD_EXECUTOR = ThreadPoolExecutor(max_workers=UPLOAD_PARSE_WORKERS, thread_name_prefix='upload-parse')
+
+# Last published version of every API (EIM + apiTechnicalName + version) - unchanged APIs are not re-published
+snapshot_store = SnapshotStore() if PUBLISH_SNAPSHOTS_ENABLED else None
+
+# create_pr commit path: 'graphql' (lookup + single branch/commit/PR mutation) or 'rest' (Contents API)
+GITHUB_COMMIT_MODE = os.environ.get('GITHUB_COMMIT_MODE', 'graphql').lower()
+
+# Latest known state of apix_* branches / PRs (GitHub webhooks + status polls)
+pr_state_store = PRStateStore()
+
+# Per-call latencies (p50/p95) - GET /api/metrics/latency
+latency_stats = LatencyRecorder()
+
+# Background pool for independent I/O (GitHub calls, catalog lookups) within one request
+IO_EXECUTOR = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='apix-io')
+
+if GITHUB_MAX_CONCURRENT_CALLS <= IO_WORKERS:
+    print(f"⚠️  GITHUB_MAX_CONCURRENT_CALLS={GITHUB_MAX_CONCURRENT_CALLS} does not exceed IO_WORKERS={IO_WORKERS}: "
+          f"bulk GitHub work in the IO pool can fill the bulkhead and turn requests away")
+
  
 
 
@@ -1035,10 +1117,34 @@ def load_api_data():
 
  
 
-def parse_transposed_excel(file_path):
+# Parsed catalog kept in memory and reloaded only when DATA_FILE changes on disk
+_catalog_cache = {'mtime': None, 'data': None}
+_catalog_lock = threading.Lock()
 
- 
 
+def get_catalog():
+    """load_api_data() result, parsed once and shared until the data file is modified"""
+    try:
+        mtime = os.path.getmtime(DATA_FILE)
+    except OSError:
+        mtime = None
+    with _catalog_lock:
+        if _catalog_cache['data'] is None or _catalog_cache['mtime'] != mtime:
+            data = load_api_data()
+            if isinstance(data, pd.DataFrame) and 'repository_url' in data.columns:
+                data['normalized_url'] = data['repository_url'].apply(normalize_repo_url)
+            _catalog_cache['data'] = data
+            _catalog_cache['mtime'] = mtime
+        return _catalog_cache['data']
+
+
+def find_api_by_repo(repo_url, data=None):
+    """
+    Find API data by repository URL - returns list of all APIs in the repo
+    Uses the in-memory catalog unless already loaded data (e.g. an uploaded workbook) is passed
+    """
+    if data is None:
+        data = get_catalog()
 
  
 
@@ -1048,10 +1154,10 @@ def parse_transposed_excel(file_path):
 
  
 
-    """
 
  
 
+    if data is None:
 
  
 
@@ -1061,10 +1167,10 @@ def parse_transposed_excel(file_path):
 
  
 
-    Parse transposed Excel format where:
 
  
 
+        return None
 
  
 
@@ -1074,10 +1180,10 @@ def parse_transposed_excel(file_path):
 
  
 
-    - Each sheet represents an EIM ID (for reference)
 
  
 
+  
 
  
 
@@ -1087,10 +1193,10 @@ def parse_transposed_excel(file_path):
 
  
 
-    - Column A = Field names (vertical)
 
  
 
+    normalized_input = normalize_repo_url(repo_url)
 
  
 
@@ -1100,10 +1206,10 @@ def parse_transposed_excel(file_path):
 
  
 
-    - Columns B, C, D... = Different APIs (horizontal)
 
  
 
+    print(f"Searching for normalized URL: {normalized_input}")
 
  
 
@@ -1113,10 +1219,10 @@ def parse_transposed_excel(file_path):
 
  
 
-    - Returns dict grouped by repository URL
 
  
 
+  
 
  
 
@@ -1126,10 +1232,10 @@ def parse_transposed_excel(file_path):
 
  
 
-    """
 
  
 
+    # Check if data is dict (transposed format) or DataFrame (normal format)
 
  
 
@@ -1139,10 +1245,10 @@ def parse_transposed_excel(file_path):
 
  
 
-    try:
 
  
 
+    if isinstance(data, dict):
 
  
 
@@ -1152,10 +1258,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        excel_file = pd.ExcelFile(file_path, engine='openpyxl')
 
  
 
+        print("Using transposed Excel format (dict)")
 
  
 
@@ -1165,10 +1271,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        all_apis = []
 
  
 
+        # Data is already grouped by repo URL
 
  
 
@@ -1178,10 +1284,10 @@ def parse_transposed_excel(file_path):
 
  
 
-      
 
  
 
+        if normalized_input in data:
 
  
 
@@ -1191,10 +1297,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        print(f"\n=== Parsing Transposed Excel ===")
 
  
 
+            apis = data[normalized_input]
 
  
 
@@ -1204,10 +1310,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        print(f"Found {len(excel_file.sheet_names)} sheets: {excel_file.sheet_names}")
 
  
 
+            print(f"Found {len(apis)} API(s) in transposed data")
 
  
 
@@ -1217,10 +1323,10 @@ def parse_transposed_excel(file_path):
 
  
 
-      
 
  
 
+            return apis
 
  
 
@@ -1230,10 +1336,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        # Field name mapping from Excel to our internal structure
 
  
 
+        else:
 
  
 
@@ -1243,10 +1349,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        field_mapping = {
 
  
 
+            print(f"Repository not found in transposed data")
 
  
 
@@ -1256,10 +1362,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'API Repo': 'repository_url',
 
  
 
+            print(f"Available repos: {list(data.keys())}")
 
  
 
@@ -1269,10 +1375,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'apiId': 'repository_url',  # Alternative name
 
  
 
+            return None
 
  
 
@@ -1282,10 +1388,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'API Object/API Technical Name': 'api_technical_name',
 
  
 
+  
 
  
 
@@ -1295,10 +1401,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'version': 'version',
 
  
 
+    # Handle DataFrame (old CSV/Excel format)
 
  
 
@@ -1308,10 +1414,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'apiContractURL': 'api_contract_url',
 
  
 
+    df = data
 
  
 
@@ -1321,10 +1427,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'businessApplicationID': 'snow_business_application_id',
 
  
 
+  
 
  
 
@@ -1334,10 +1440,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'applicationServiceId': 'snow_application_service_id',
 
  
 
+    # Check if repository_url column exists
 
  
 
@@ -1347,10 +1453,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'classification': 'classification',
 
  
 
+    if 'repository_url' not in df.columns:
 
  
 
@@ -1360,38 +1466,36 @@ def parse_transposed_excel(file_path):
 
  
 
-            'sourceCode.pathToSource': 'source_code_path',
 
  
 
+        print(f"ERROR: 'repository_url' column not found in data file")
 
  
 
-            # Source code fields - exact Excel column names
 
  
 
 
  
 
-            'SourceCodeURL': 'source_code_url',
 
  
 
+        print(f"Available columns: {df.columns.tolist()}")
 
  
 
-            'SourceCode Reference': 'source_code_reference',
 
  
 
 
  
 
-            'Platform.provider': 'platform_provider',
 
  
 
+        return None
 
  
 
@@ -1401,10 +1505,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'Platform.technology': 'platform_technology',
 
  
 
+  
 
  
 
@@ -1414,10 +1518,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'Platform.team': 'platform_team',
 
  
 
+    # Normalize all repository URLs in the dataframe
 
  
 
@@ -1427,10 +1531,11 @@ def parse_transposed_excel(file_path):
 
  
 
-            'lifecycleStatus': 'lifecycle_status',
 
  
 
+    if 'normalized_url' not in df.columns:
+        df['normalized_url'] = df['repository_url'].apply(normalize_repo_url)
 
  
 
@@ -1440,10 +1545,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'consumers': 'consumers',
 
  
 
+    print(f"Available URLs in database:")
 
  
 
@@ -1453,10 +1558,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'consumers[].applicationServiceId': 'consumer_application_service_ids',
 
  
 
+    for url in df['normalized_url'].tolist():
 
  
 
@@ -1466,10 +1571,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'gatewayType': 'gateway_type',
 
  
 
+        print(f"  - {url}")
 
  
 
@@ -1479,10 +1584,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'proxyURL': 'gateway_proxy_url',
 
  
 
+  
 
  
 
@@ -1492,10 +1597,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'configURL': 'gateway_config_url',
 
  
 
+    # Find all matching rows (multiple APIs per repo)
 
  
 
@@ -1505,10 +1610,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'apiHostingCountry': 'api_hosting_country',
 
  
 
+    matching_rows = df[df['normalized_url'] == normalized_input]
 
  
 
@@ -1518,10 +1623,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'documentationURL': 'documentation_url',
 
  
 
+    print(f"Found {len(matching_rows)} API(s) for this repository")
 
  
 
@@ -1531,10 +1636,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'consumingCountryGroups': 'consuming_country_groups',
 
  
 
+  
 
  
 
@@ -1544,10 +1649,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'countryCode': 'consuming_country_code',
 
  
 
+    if len(matching_rows) > 0:
 
  
 
@@ -1557,10 +1662,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'groupMemberCode': 'consuming_group_member_code',
 
  
 
+        # Return list of all APIs in this repository
 
  
 
@@ -1570,10 +1675,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            'Application Name': 'application_name'
 
  
 
+        apis = []
 
  
 
@@ -1583,10 +1688,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        }
 
  
 
+        for idx, row in matching_rows.iterrows():
 
  
 
@@ -1596,10 +1701,10 @@ def parse_transposed_excel(file_path):
 
  
 
-      
 
  
 
+            api_dict = {
 
  
 
@@ -1609,10 +1714,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        for sheet_name in excel_file.sheet_names:
 
  
 
+                'repository_url': row['repository_url'],
 
  
 
@@ -1622,10 +1727,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            print(f"\n--- Processing sheet: {sheet_name} ---")
 
  
 
+                'api_technical_name': row['api_technical_name'],
 
  
 
@@ -1635,10 +1740,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            df = pd.read_excel(file_path, sheet_name=sheet_name, engine='openpyxl', header=None)
 
  
 
+                'version': row['version'],
 
  
 
@@ -1648,10 +1753,10 @@ def parse_transposed_excel(file_path):
 
  
 
-          
 
  
 
+                'snow_business_application_id': row['snow_business_application_id'],
 
  
 
@@ -1661,10 +1766,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            if df.empty or len(df.columns) < 2:
 
  
 
+                'platform': row['platform'],
 
  
 
@@ -1674,10 +1779,10 @@ def parse_transposed_excel(file_path):
 
  
 
-                print(f"Skipping empty sheet: {sheet_name}")
 
  
 
+                'lifecycle_status': row['lifecycle_status'],
 
  
 
@@ -1687,28 +1792,26 @@ def parse_transposed_excel(file_path):
 
  
 
-                continue
 
  
 
+                'classification': row['classification'],
 
  
 
-          
 
  
 
 
  
 
-            # Store EIM ID from sheet name for each API in this sheet
 
  
 
+            }
 
  
 
-            eim_id = sheet_name.strip()
 
  
 
@@ -1718,10 +1821,10 @@ def parse_transposed_excel(file_path):
 
  
 
+          
 
  
 
-          
 
  
 
@@ -1731,10 +1834,10 @@ def parse_transposed_excel(file_path):
 
  
 
+            # Add new optional fields if they exist
 
  
 
-            # Column A (index 0) contains field names
 
  
 
@@ -1744,10 +1847,10 @@ def parse_transposed_excel(file_path):
 
  
 
+            optional_fields = [
 
  
 
-            # Columns B onwards (index 1+) contain API data
 
  
 
@@ -1757,10 +1860,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'snow_application_service_id',
 
  
 
-            field_names = df.iloc[:, 0].tolist()
 
  
 
@@ -1770,10 +1873,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'api_contract_url',
 
  
 
-          
 
  
 
@@ -1783,10 +1886,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'documentation_url',
 
  
 
-            # Process each API column (starting from column B = index 1)
 
  
 
@@ -1796,10 +1899,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'api_hosting_country',
 
  
 
-            num_apis = len(df.columns) - 1
 
  
 
@@ -1809,10 +1912,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'gateway_type',
 
  
 
-            print(f"Found {num_apis} API columns")
 
  
 
@@ -1822,10 +1925,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'gateway_proxy_url',
 
  
 
-          
 
  
 
@@ -1835,10 +1938,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'gateway_config_url',
 
  
 
-            for col_idx in range(1, len(df.columns)):
 
  
 
@@ -1848,10 +1951,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'consumer_application_service_ids',
 
  
 
-                api_data = {}
 
  
 
@@ -1861,10 +1964,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'consuming_country_code',
 
  
 
-                api_values = df.iloc[:, col_idx].tolist()
 
  
 
@@ -1874,10 +1977,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'consuming_group_member_code',
 
  
 
-              
 
  
 
@@ -1887,10 +1990,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'description',
 
  
 
-                # Map field names to values
 
  
 
@@ -1900,10 +2003,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'owner_team',
 
  
 
-                for field_name, value in zip(field_names, api_values):
 
  
 
@@ -1913,10 +2016,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                'contact_email'
 
  
 
-                    if pd.notna(field_name) and pd.notna(value):
 
  
 
@@ -1926,10 +2029,10 @@ def parse_transposed_excel(file_path):
 
  
 
+            ]
 
  
 
-                        field_name_clean = str(field_name).strip()
 
  
 
@@ -1939,10 +2042,10 @@ def parse_transposed_excel(file_path):
 
  
 
+          
 
  
 
-                      
 
  
 
@@ -1952,10 +2055,10 @@ def parse_transposed_excel(file_path):
 
  
 
+            for field in optional_fields:
 
  
 
-                        # Map to internal field name
 
  
 
@@ -1965,10 +2068,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                if field in row and pd.notna(row[field]):
 
  
 
-                        internal_field = field_mapping.get(field_name_clean, field_name_clean.lower().replace(' ', '_'))
 
  
 
@@ -1978,10 +2081,10 @@ def parse_transposed_excel(file_path):
 
  
 
+                    api_dict[field] = row[field]
 
  
 
-                        api_data[internal_field] = value
 
  
 
@@ -1991,10 +2094,10 @@ def parse_transposed_excel(file_path):
 
  
 
+          
 
  
 
-              
 
  
 
@@ -2004,10 +2107,10 @@ def parse_transposed_excel(file_path):
 
  
 
+            apis.append(api_dict)
 
  
 
-                # Only add if we have a repository URL
 
  
 
@@ -2017,34 +2120,33 @@ def parse_transposed_excel(file_path):
 
  
 
+        return apis
 
  
 
-                if 'repository_url' in api_data and api_data['repository_url']:
 
  
 
 
  
 
-                    # Add EIM ID to each API data
 
  
 
+  
 
  
 
-                    api_data['eim_id'] = eim_id
 
  
 
 
  
 
-                    all_apis.append(api_data)
 
  
 
+    return None
 
  
 
@@ -2054,7 +2156,6 @@ def parse_transposed_excel(file_path):
 
  
 
-                    print(f"  API {col_idx}: {api_data.get('api_technical_name', 'N/A')} -> {api_data.get('repository_url', 'N/A')} (EIM: {eim_id})")
 
  
 
@@ -2067,10 +2168,10 @@ def parse_transposed_excel(file_path):
 
  
 
-      
 
  
 
+def is_valid_value(value):
 
  
 
@@ -2080,10 +2181,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        print(f"\n=== Total APIs parsed: {len(all_apis)} ===")
 
  
 
+    """Check if a value is valid (not empty, not NaN, not None)"""
 
  
 
@@ -2093,10 +2194,10 @@ def parse_transposed_excel(file_path):
 
  
 
-      
 
  
 
+    if value is None:
 
  
 
@@ -2106,10 +2207,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        # Group APIs by repository URL
 
  
 
+        return False
 
  
 
@@ -2119,10 +2220,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        grouped_by_repo = defaultdict(list)
 
  
 
+    if pd.isna(value):
 
  
 
@@ -2132,10 +2233,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        for api in all_apis:
 
  
 
+        return False
 
  
 
@@ -2145,10 +2246,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            repo_url = normalize_repo_url(api['repository_url'])
 
  
 
+    if isinstance(value, str) and value.strip() == '':
 
  
 
@@ -2158,10 +2259,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            grouped_by_repo[repo_url].append(api)
 
  
 
+        return False
 
  
 
@@ -2171,10 +2272,10 @@ def parse_transposed_excel(file_path):
 
  
 
-      
 
  
 
+    return True
 
  
 
@@ -2184,7 +2285,6 @@ def parse_transposed_excel(file_path):
 
  
 
-        print(f"\n=== Grouped into {len(grouped_by_repo)} unique repositories ===")
 
  
 
@@ -2197,10 +2297,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        for repo_url, apis in grouped_by_repo.items():
 
  
 
+def build_apix_document(api_data_list):
 
  
 
@@ -2210,10 +2310,10 @@ def parse_transposed_excel(file_path):
 
  
 
-            print(f"  {repo_url}: {len(apis)} API(s)")
 
  
 
+    """
 
  
 
@@ -2223,10 +2323,10 @@ def parse_transposed_excel(file_path):
 
  
 
-      
 
  
 
+    Generate APIX JSON content from API data (supports multiple APIs)
 
  
 
@@ -2236,10 +2336,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        return dict(grouped_by_repo)
 
  
 
+    DYNAMICALLY includes ALL fields present in the data
 
  
 
@@ -2249,10 +2349,10 @@ def parse_transposed_excel(file_path):
 
  
 
-      
 
  
 
+    Validates mandatory fields and rules before generating JSON
 
  
 
@@ -2262,10 +2362,10 @@ def parse_transposed_excel(file_path):
 
  
 
-    except Exception as e:
 
  
 
+    Returns the apiMetaData wrapper dict (see validate_and_generate_json for the JSON text)
 
  
 
@@ -2275,10 +2375,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        print(f"Error parsing transposed Excel: {e}")
 
  
 
+    """
 
  
 
@@ -2288,10 +2388,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        import traceback
 
  
 
+    # If single API (for backward compatibility), convert to list
 
  
 
@@ -2301,10 +2401,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        traceback.print_exc()
 
  
 
+    if isinstance(api_data_list, dict):
 
  
 
@@ -2314,10 +2414,10 @@ def parse_transposed_excel(file_path):
 
  
 
-        return None
 
  
 
+        api_data_list = [api_data_list]
 
  
 
@@ -2330,6 +2430,7 @@ def parse_transposed_excel(file_path):
 
  
 
+  
 
  
 
@@ -2339,10 +2440,12 @@ def parse_transposed_excel(file_path):
 
  
 
-def normalize_repo_url(url):
 
  
 
+    # MANDATORY_FIELDS, MANDATORY_SECTIONS and VALIDATION_RULES are shared with the local schema check (apix_schema)
+
+    # Field mapping: internal_name -> JSON key name
 
  
 
@@ -2352,10 +2455,10 @@ def normalize_repo_url(url):
 
  
 
-    """Normalize GitHub repository URL for comparison"""
 
  
 
+    # This is the ONLY place to update when adding new fields
 
  
 
@@ -2365,10 +2468,10 @@ def normalize_repo_url(url):
 
  
 
-    if not url:
 
  
 
+    FIELD_MAPPING = {
 
  
 
@@ -2378,10 +2481,10 @@ def normalize_repo_url(url):
 
  
 
-        return ""
 
  
 
+        # Mandatory fields
 
  
 
@@ -2391,10 +2494,10 @@ def normalize_repo_url(url):
 
  
 
-    url = str(url).strip().lower()
 
  
 
+        'api_technical_name': 'apiTechnicalName',
 
  
 
@@ -2404,10 +2507,10 @@ def normalize_repo_url(url):
 
  
 
-    # Remove trailing slashes
 
  
 
+        'version': 'version',
 
  
 
@@ -2417,10 +2520,10 @@ def normalize_repo_url(url):
 
  
 
-    url = url.rstrip('/')
 
  
 
+      
 
  
 
@@ -2430,10 +2533,10 @@ def normalize_repo_url(url):
 
  
 
-    # Remove .git suffix if present
 
  
 
+        # Top-level optional fields
 
  
 
@@ -2443,10 +2546,10 @@ def normalize_repo_url(url):
 
  
 
-    if url.endswith('.git'):
 
  
 
+        'classification': 'classification',
 
  
 
@@ -2456,10 +2559,10 @@ def normalize_repo_url(url):
 
  
 
-        url = url[:-4]
 
  
 
+        'lifecycle_status': 'lifecycleStatus',
 
  
 
@@ -2469,10 +2572,10 @@ def normalize_repo_url(url):
 
  
 
-    return url
 
  
 
+        'api_contract_url': 'apiContractURL',
 
  
 
@@ -2485,6 +2588,7 @@ def normalize_repo_url(url):
 
  
 
+        'documentation_url': 'documentationURL',
 
  
 
@@ -2494,10 +2598,10 @@ def normalize_repo_url(url):
 
  
 
-def find_api_by_repo(repo_url):
 
  
 
+        'api_hosting_country': 'apiHostingCountry',
 
  
 
@@ -2507,10 +2611,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    """Find API data by repository URL - returns list of all APIs in the repo"""
 
  
 
+        'application_name': 'applicationName',
 
  
 
@@ -2520,10 +2624,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    data = load_api_data()
 
  
 
+      
 
  
 
@@ -2533,10 +2637,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    if data is None:
 
  
 
+        # SNOW data fields (nested under 'snowData') - MANDATORY SECTION
 
  
 
@@ -2546,10 +2650,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        return None
 
  
 
+        'snow_business_application_id': 'snowData.businessApplicationId',  # Fixed: Id not ID
 
  
 
@@ -2559,10 +2663,10 @@ def find_api_by_repo(repo_url):
 
  
 
-  
 
  
 
+        'snow_application_service_id': 'snowData.applicationServiceId',
 
  
 
@@ -2572,10 +2676,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    normalized_input = normalize_repo_url(repo_url)
 
  
 
+      
 
  
 
@@ -2585,10 +2689,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    print(f"Searching for normalized URL: {normalized_input}")
 
  
 
+        # Source code fields (nested under 'sourceCode') - MANDATORY SECTION
 
  
 
@@ -2598,10 +2702,10 @@ def find_api_by_repo(repo_url):
 
  
 
-  
 
  
 
+    'source_code_url': 'sourceCode.url',
 
  
 
@@ -2611,10 +2715,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    # Check if data is dict (transposed format) or DataFrame (normal format)
 
  
 
+    'source_code_reference': 'sourceCode.reference',
 
  
 
@@ -2624,10 +2728,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    if isinstance(data, dict):
 
  
 
+    # Change: treat source_code_path as the URL (we no longer emit pathToSource)
 
  
 
@@ -2637,10 +2741,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        print("Using transposed Excel format (dict)")
 
  
 
+    'source_code_path': 'sourceCode.url',
 
  
 
@@ -2650,10 +2754,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        # Data is already grouped by repo URL
 
  
 
+      
 
  
 
@@ -2663,10 +2767,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        if normalized_input in data:
 
  
 
+        # Platform fields (nested under 'platform') - MANDATORY SECTION, lowercase 'p'
 
  
 
@@ -2676,10 +2780,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            apis = data[normalized_input]
 
  
 
+        'platform_provider': 'platform.provider',
 
  
 
@@ -2689,10 +2793,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            print(f"Found {len(apis)} API(s) in transposed data")
 
  
 
+        'platform_technology': 'platform.technology',
 
  
 
@@ -2702,10 +2806,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            return apis
 
  
 
+        'platform_team': 'platform.team',
 
  
 
@@ -2715,10 +2819,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        else:
 
  
 
+        'gateway_proxy_url': 'platform.proxyURL',
 
  
 
@@ -2728,10 +2832,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            print(f"Repository not found in transposed data")
 
  
 
+        'gateway_config_url': 'platform.configURL',
 
  
 
@@ -2741,10 +2845,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            print(f"Available repos: {list(data.keys())}")
 
  
 
+      
 
  
 
@@ -2754,10 +2858,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            return None
 
  
 
+        # Special array fields
 
  
 
@@ -2767,10 +2871,10 @@ def find_api_by_repo(repo_url):
 
  
 
-  
 
  
 
+        'consumer_application_service_ids': 'consumers',  # Array of {applicationServiceId}
 
  
 
@@ -2780,10 +2884,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    # Handle DataFrame (old CSV/Excel format)
 
  
 
+        'consuming_country_code': 'consumingCountryGroups.countryCode',  # Part of array
 
  
 
@@ -2793,10 +2897,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    df = data
 
  
 
+        'consuming_group_member_code': 'consumingCountryGroups.groupMemberCode',  # Part of array
 
  
 
@@ -2806,10 +2910,10 @@ def find_api_by_repo(repo_url):
 
  
 
-  
 
  
 
+    }
 
  
 
@@ -2819,10 +2923,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    # Check if repository_url column exists
 
  
 
+  
 
  
 
@@ -2832,10 +2936,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    if 'repository_url' not in df.columns:
 
  
 
+    # Helper function to auto-correct and transform field value
 
  
 
@@ -2845,10 +2949,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        print(f"ERROR: 'repository_url' column not found in data file")
 
  
 
+    def auto_correct_field(field_name, value):
 
  
 
@@ -2858,10 +2962,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        print(f"Available columns: {df.columns.tolist()}")
 
  
 
+        """Auto-correct and transform field value according to rules"""
 
  
 
@@ -2871,10 +2975,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        return None
 
  
 
+        if field_name not in VALIDATION_RULES:
 
  
 
@@ -2884,10 +2988,10 @@ def find_api_by_repo(repo_url):
 
  
 
-  
 
  
 
+            # Generic whitespace trim for all string fields (addresses platform.team regex failing on leading space)
 
  
 
@@ -2897,10 +3001,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    # Normalize all repository URLs in the dataframe
 
  
 
+            if isinstance(value, str):
 
  
 
@@ -2910,10 +3014,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    df['normalized_url'] = df['repository_url'].apply(normalize_repo_url)
 
  
 
+                trimmed = value.strip()
 
  
 
@@ -2923,10 +3027,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    print(f"Available URLs in database:")
 
  
 
+                corrections = []
 
  
 
@@ -2936,10 +3040,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    for url in df['normalized_url'].tolist():
 
  
 
+                if trimmed != value:
 
  
 
@@ -2949,10 +3053,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        print(f"  - {url}")
 
  
 
+                    corrections.append(f"Trimmed whitespace: '{value}' → '{trimmed}'")
 
  
 
@@ -2962,10 +3066,10 @@ def find_api_by_repo(repo_url):
 
  
 
-  
 
  
 
+                value = trimmed
 
  
 
@@ -2975,10 +3079,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    # Find all matching rows (multiple APIs per repo)
 
  
 
+                # If platform team becomes empty after trimming, keep original but note warning
 
  
 
@@ -2988,10 +3092,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    matching_rows = df[df['normalized_url'] == normalized_input]
 
  
 
+                if field_name == 'team' and value == '':
 
  
 
@@ -3001,10 +3105,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    print(f"Found {len(matching_rows)} API(s) for this repository")
 
  
 
+                    corrections.append("Warning: platform.team became empty after trimming")
 
  
 
@@ -3014,10 +3118,10 @@ def find_api_by_repo(repo_url):
 
  
 
-  
 
  
 
+                return value, corrections if corrections else None
 
  
 
@@ -3027,10 +3131,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    if len(matching_rows) > 0:
 
  
 
+            return value, None
 
  
 
@@ -3040,10 +3144,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        # Return list of all APIs in this repository
 
  
 
+      
 
  
 
@@ -3053,10 +3157,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        apis = []
 
  
 
+        rule = VALIDATION_RULES[field_name]
 
  
 
@@ -3066,10 +3170,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        for idx, row in matching_rows.iterrows():
 
  
 
+        original_value = value
 
  
 
@@ -3079,10 +3183,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            api_dict = {
 
  
 
+        corrections = []
 
  
 
@@ -3092,10 +3196,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'repository_url': row['repository_url'],
 
  
 
+      
 
  
 
@@ -3105,10 +3209,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'api_technical_name': row['api_technical_name'],
 
  
 
+        # Apply transformation (uppercase)
 
  
 
@@ -3118,10 +3222,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'version': row['version'],
 
  
 
+        if 'transform' in rule and rule['transform'] == 'uppercase':
 
  
 
@@ -3131,10 +3235,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'snow_business_application_id': row['snow_business_application_id'],
 
  
 
+            value = str(value).upper()
 
  
 
@@ -3144,10 +3248,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'platform': row['platform'],
 
  
 
+            if str(original_value) != value:
 
  
 
@@ -3157,10 +3261,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'lifecycle_status': row['lifecycle_status'],
 
  
 
+                corrections.append(f"Converted '{original_value}' to '{value}'")
 
  
 
@@ -3170,7 +3274,6 @@ def find_api_by_repo(repo_url):
 
  
 
-                'classification': row['classification'],
 
  
 
@@ -3183,10 +3286,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            }
 
  
 
+        # Generic whitespace trimming (after case transform) for any string value
 
  
 
@@ -3196,10 +3299,10 @@ def find_api_by_repo(repo_url):
 
  
 
-          
 
  
 
+        if isinstance(value, str):
 
  
 
@@ -3209,10 +3312,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            # Add new optional fields if they exist
 
  
 
+            trimmed = value.strip()
 
  
 
@@ -3222,10 +3325,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            optional_fields = [
 
  
 
+            if trimmed != value:
 
  
 
@@ -3235,10 +3338,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'snow_application_service_id',
 
  
 
+                corrections.append(f"Trimmed whitespace: '{value}' → '{trimmed}'")
 
  
 
@@ -3248,10 +3351,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'api_contract_url',
 
  
 
+                value = trimmed
 
  
 
@@ -3261,10 +3364,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'documentation_url',
 
  
 
+      
 
  
 
@@ -3274,10 +3377,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'api_hosting_country',
 
  
 
+        # Auto-correct apiTechnicalName: remove spaces, special chars, trim hyphens
 
  
 
@@ -3287,10 +3390,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'gateway_type',
 
  
 
+        if field_name == 'apiTechnicalName':
 
  
 
@@ -3300,10 +3403,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'gateway_proxy_url',
 
  
 
+            # Remove spaces and special characters except hyphens
 
  
 
@@ -3313,10 +3416,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'gateway_config_url',
 
  
 
+            cleaned = re.sub(r'[^A-Za-z0-9-]', '', str(value))
 
  
 
@@ -3326,10 +3429,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'consumer_application_service_ids',
 
  
 
+            # Remove leading/trailing hyphens
 
  
 
@@ -3339,10 +3442,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'consuming_country_code',
 
  
 
+            cleaned = cleaned.strip('-')
 
  
 
@@ -3352,10 +3455,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'consuming_group_member_code',
 
  
 
+            if cleaned != str(value):
 
  
 
@@ -3365,10 +3468,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'description',
 
  
 
+                corrections.append(f"Cleaned apiTechnicalName: '{value}' → '{cleaned}'")
 
  
 
@@ -3378,10 +3481,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'owner_team',
 
  
 
+                value = cleaned
 
  
 
@@ -3391,10 +3494,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                'contact_email'
 
  
 
+      
 
  
 
@@ -3404,10 +3507,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            ]
 
  
 
+        # Auto-correct countryCode: uppercase and truncate to 2 chars
 
  
 
@@ -3417,10 +3520,10 @@ def find_api_by_repo(repo_url):
 
  
 
-          
 
  
 
+        if field_name == 'countryCode':
 
  
 
@@ -3430,10 +3533,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            for field in optional_fields:
 
  
 
+            original = value
 
  
 
@@ -3443,10 +3546,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                if field in row and pd.notna(row[field]):
 
  
 
+            value = str(value).upper()[:2]  # Take first 2 chars, uppercase
 
  
 
@@ -3456,10 +3559,10 @@ def find_api_by_repo(repo_url):
 
  
 
-                    api_dict[field] = row[field]
 
  
 
+            if str(original).upper() != value and len(str(original)) > 2:
 
  
 
@@ -3469,10 +3572,10 @@ def find_api_by_repo(repo_url):
 
  
 
-          
 
  
 
+                corrections.append(f"Truncated countryCode: '{original}' → '{value}'")
 
  
 
@@ -3482,10 +3585,10 @@ def find_api_by_repo(repo_url):
 
  
 
-            apis.append(api_dict)
 
  
 
+      
 
  
 
@@ -3495,10 +3598,10 @@ def find_api_by_repo(repo_url):
 
  
 
-        return apis
 
  
 
+        # Auto-correct groupMemberCode: uppercase and truncate to 4 chars
 
  
 
@@ -3508,10 +3611,10 @@ def find_api_by_repo(repo_url):
 
  
 
-  
 
  
 
+        if field_name == 'groupMemberCode':
 
  
 
@@ -3521,10 +3624,10 @@ def find_api_by_repo(repo_url):
 
  
 
-    return None
 
  
 
+            original = value
 
  
 
@@ -3537,6 +3640,7 @@ def find_api_by_repo(repo_url):
 
  
 
+            value = str(value).upper()[:4]  # Take first 4 chars, uppercase
 
  
 
@@ -3546,10 +3650,10 @@ def find_api_by_repo(repo_url):
 
  
 
-def is_valid_value(value):
 
  
 
+            if str(original).upper() != value and len(str(original)) > 4:
 
  
 
@@ -3559,10 +3663,10 @@ def is_valid_value(value):
 
  
 
-    """Check if a value is valid (not empty, not NaN, not None)"""
 
  
 
+                corrections.append(f"Truncated groupMemberCode: '{original}' → '{value}'")
 
  
 
@@ -3572,10 +3676,10 @@ def is_valid_value(value):
 
  
 
-    if value is None:
 
  
 
+      
 
  
 
@@ -3585,10 +3689,10 @@ def is_valid_value(value):
 
  
 
-        return False
 
  
 
+        # Check enum - if not in enum, use first valid value
 
  
 
@@ -3598,10 +3702,10 @@ def is_valid_value(value):
 
  
 
-    if pd.isna(value):
 
  
 
+        if 'enum' in rule:
 
  
 
@@ -3611,10 +3715,10 @@ def is_valid_value(value):
 
  
 
-        return False
 
  
 
+            if value not in rule['enum']:
 
  
 
@@ -3624,10 +3728,10 @@ def is_valid_value(value):
 
  
 
-    if isinstance(value, str) and value.strip() == '':
 
  
 
+                default_value = rule['enum'][0]
 
  
 
@@ -3637,10 +3741,10 @@ def is_valid_value(value):
 
  
 
-        return False
 
  
 
+                corrections.append(f"Invalid {field_name} '{value}', using default '{default_value}'")
 
  
 
@@ -3650,10 +3754,10 @@ def is_valid_value(value):
 
  
 
-    return True
 
  
 
+                value = default_value
 
  
 
@@ -3666,6 +3770,7 @@ def is_valid_value(value):
 
  
 
+      
 
  
 
@@ -3675,10 +3780,10 @@ def is_valid_value(value):
 
  
 
-def validate_and_generate_json(api_data_list):
 
  
 
+        # Final regex check (after corrections)
 
  
 
@@ -3688,10 +3793,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    """
 
  
 
+        if 'regex' in rule:
 
  
 
@@ -3701,10 +3806,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    Generate APIX JSON content from API data (supports multiple APIs)
 
  
 
+            if not re.match(rule['regex'], str(value)):
 
  
 
@@ -3714,10 +3819,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    DYNAMICALLY includes ALL fields present in the data
 
  
 
+                # If still doesn't match, log warning but keep the value
 
  
 
@@ -3727,10 +3832,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    Validates mandatory fields and rules before generating JSON
 
  
 
+                corrections.append(f"Warning: {field_name} '{value}' doesn't match expected pattern")
 
  
 
@@ -3740,10 +3845,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    Returns JSON in apiMetaData wrapper format
 
  
 
+      
 
  
 
@@ -3753,10 +3858,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    """
 
  
 
+        return value, corrections if corrections else None
 
  
 
@@ -3766,10 +3871,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # If single API (for backward compatibility), convert to list
 
  
 
+  
 
  
 
@@ -3779,10 +3884,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    if isinstance(api_data_list, dict):
 
  
 
+    # Generate JSON for multiple APIs
 
  
 
@@ -3792,10 +3897,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        api_data_list = [api_data_list]
 
  
 
+    api_list = []
 
  
 
@@ -3805,10 +3910,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-  
 
  
 
+    skipped_apis = []
 
  
 
@@ -3818,10 +3923,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # Define mandatory fields (internal names)
 
  
 
+    validation_errors = []
 
  
 
@@ -3831,10 +3936,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    MANDATORY_FIELDS = ['api_technical_name', 'version']
 
  
 
+  
 
  
 
@@ -3844,10 +3949,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    MANDATORY_SECTIONS = ['platform', 'snowData', 'sourceCode']  # Must always exist
 
  
 
+    for idx, api_data in enumerate(api_data_list):
 
  
 
@@ -3857,10 +3962,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-  
 
  
 
+        # Validate mandatory fields
 
  
 
@@ -3870,10 +3975,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # Field mapping: internal_name -> JSON key name
 
  
 
+        missing_fields = []
 
  
 
@@ -3883,10 +3988,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # This is the ONLY place to update when adding new fields
 
  
 
+        for field in MANDATORY_FIELDS:
 
  
 
@@ -3896,10 +4001,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    FIELD_MAPPING = {
 
  
 
+            if not is_valid_value(api_data.get(field)):
 
  
 
@@ -3909,10 +4014,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Mandatory fields
 
  
 
+                missing_fields.append(field)
 
  
 
@@ -3922,10 +4027,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'api_technical_name': 'apiTechnicalName',
 
  
 
+      
 
  
 
@@ -3935,10 +4040,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'version': 'version',
 
  
 
+        if missing_fields:
 
  
 
@@ -3948,10 +4053,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+            api_name = api_data.get('api_technical_name', f'API #{idx+1}')
 
  
 
@@ -3961,10 +4066,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Top-level optional fields
 
  
 
+            print(f"⚠️  Skipping {api_name}: Missing mandatory fields: {missing_fields}")
 
  
 
@@ -3974,10 +4079,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'classification': 'classification',
 
  
 
+            skipped_apis.append({'api': api_name, 'missing_fields': missing_fields})
 
  
 
@@ -3987,10 +4092,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'lifecycle_status': 'lifecycleStatus',
 
  
 
+            continue
 
  
 
@@ -4000,10 +4105,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'api_contract_url': 'apiContractURL',
 
  
 
+      
 
  
 
@@ -4013,10 +4118,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'documentation_url': 'documentationURL',
 
  
 
+        # Build the JSON structure DYNAMICALLY
 
  
 
@@ -4026,10 +4131,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'api_hosting_country': 'apiHostingCountry',
 
  
 
+        api_content = {}
 
  
 
@@ -4039,10 +4144,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'application_name': 'applicationName',
 
  
 
+        nested_sections = {}  # For nested objects like snowData, platform, sourceCode, etc.
 
  
 
@@ -4052,10 +4157,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+        api_errors = []
 
  
 
@@ -4065,10 +4170,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # SNOW data fields (nested under 'snowData') - MANDATORY SECTION
 
  
 
+      
 
  
 
@@ -4078,10 +4183,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'snow_business_application_id': 'snowData.businessApplicationId',  # Fixed: Id not ID
 
  
 
+        # Process all fields in api_data dynamically
 
  
 
@@ -4091,10 +4196,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'snow_application_service_id': 'snowData.applicationServiceId',
 
  
 
+        for internal_field, value in api_data.items():
 
  
 
@@ -4104,10 +4209,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+            # Skip if value is not valid
 
  
 
@@ -4117,10 +4222,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Source code fields (nested under 'sourceCode') - MANDATORY SECTION
 
  
 
+            if not is_valid_value(value):
 
  
 
@@ -4130,10 +4235,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    'source_code_url': 'sourceCode.url',
 
  
 
+                continue
 
  
 
@@ -4143,10 +4248,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    'source_code_reference': 'sourceCode.reference',
 
  
 
+          
 
  
 
@@ -4156,10 +4261,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # Change: treat source_code_path as the URL (we no longer emit pathToSource)
 
  
 
+            # Skip repository_url as it's not part of YAML output
 
  
 
@@ -4169,10 +4274,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    'source_code_path': 'sourceCode.url',
 
  
 
+            if internal_field == 'repository_url':
 
  
 
@@ -4182,10 +4287,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+                continue
 
  
 
@@ -4195,10 +4300,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Platform fields (nested under 'platform') - MANDATORY SECTION, lowercase 'p'
 
  
 
+          
 
  
 
@@ -4208,10 +4313,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'platform_provider': 'platform.provider',
 
  
 
+            # Check if field is in our mapping
 
  
 
@@ -4221,10 +4326,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'platform_technology': 'platform.technology',
 
  
 
+            if internal_field not in FIELD_MAPPING:
 
  
 
@@ -4234,10 +4339,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'platform_team': 'platform.team',
 
  
 
+                # Field not in mapping - check if it's a new field
 
  
 
@@ -4247,10 +4352,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'gateway_proxy_url': 'platform.proxyURL',
 
  
 
+                # Add it as-is with camelCase conversion
 
  
 
@@ -4260,10 +4365,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'gateway_config_url': 'platform.configURL',
 
  
 
+                json_key = ''.join(word.capitalize() if i > 0 else word for i, word in enumerate(internal_field.split('_')))
 
  
 
@@ -4273,10 +4378,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+                print(f"ℹ️  New field detected: '{internal_field}' -> '{json_key}'")
 
  
 
@@ -4286,10 +4391,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Special array fields
 
  
 
+                api_content[json_key] = value
 
  
 
@@ -4299,10 +4404,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'consumer_application_service_ids': 'consumers',  # Array of {applicationServiceId}
 
  
 
+                continue
 
  
 
@@ -4312,10 +4417,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'consuming_country_code': 'consumingCountryGroups.countryCode',  # Part of array
 
  
 
+          
 
  
 
@@ -4325,10 +4430,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'consuming_group_member_code': 'consumingCountryGroups.groupMemberCode',  # Part of array
 
  
 
+            json_path = FIELD_MAPPING[internal_field]
 
  
 
@@ -4338,10 +4443,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    }
 
  
 
+          
 
  
 
@@ -4351,10 +4456,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-  
 
  
 
+            # Handle special array fields
 
  
 
@@ -4364,10 +4469,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # Validation rules
 
  
 
+            if internal_field == 'consumer_application_service_ids':
 
  
 
@@ -4377,10 +4482,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    VALIDATION_RULES = {
 
  
 
+                # Convert to array of objects
 
  
 
@@ -4390,10 +4495,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'apiTechnicalName': {
 
  
 
+                consumer_ids = value
 
  
 
@@ -4403,10 +4508,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'regex': r'^[A-Za-z0-9]([A-Za-z0-9-]*[A-Za-z0-9])?$',  # No leading/trailing hyphens
 
  
 
+                if isinstance(consumer_ids, str):
 
  
 
@@ -4416,10 +4521,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'error': 'Must contain only alphanumeric and hyphens, no leading/trailing hyphens'
 
  
 
+                    consumer_ids = [id.strip() for id in consumer_ids.split(',') if id.strip()]
 
  
 
@@ -4429,10 +4534,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        },
 
  
 
+                elif not isinstance(consumer_ids, list):
 
  
 
@@ -4442,10 +4547,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'lifecycleStatus': {
 
  
 
+                    consumer_ids = [consumer_ids]
 
  
 
@@ -4455,10 +4560,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'enum': ['ACTIVE', 'INACTIVE', 'DEPRECATED', 'DEVELOPMENT'],
 
  
 
+              
 
  
 
@@ -4468,10 +4573,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'transform': 'uppercase',
 
  
 
+                if consumer_ids:
 
  
 
@@ -4481,10 +4586,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'error': 'Must be one of: ACTIVE, INACTIVE, DEPRECATED, DEVELOPMENT (uppercase)'
 
  
 
+                    api_content['consumers'] = [
 
  
 
@@ -4494,10 +4599,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        },
 
  
 
+                        {'applicationServiceId': str(cid)} for cid in consumer_ids
 
  
 
@@ -4507,10 +4612,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'classification': {
 
  
 
+                    ]
 
  
 
@@ -4520,10 +4625,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'enum': ['INTERNAL', 'EXTERNAL', 'CONFIDENTIAL', 'PUBLIC'],
 
  
 
+                continue
 
  
 
@@ -4533,10 +4638,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'transform': 'uppercase',
 
  
 
+          
 
  
 
@@ -4546,10 +4651,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'error': 'Must be one of: INTERNAL, EXTERNAL, CONFIDENTIAL, PUBLIC (uppercase)'
 
  
 
+            # Handle consumingCountryGroups (needs both country and group codes)
 
  
 
@@ -4559,10 +4664,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        },
 
  
 
+            if internal_field in ['consuming_country_code', 'consuming_group_member_code']:
 
  
 
@@ -4572,10 +4677,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'countryCode': {
 
  
 
+                # Will be processed together later
 
  
 
@@ -4585,10 +4690,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'regex': r'^[A-Z]{2}$',
 
  
 
+                continue
 
  
 
@@ -4598,10 +4703,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'transform': 'uppercase',
 
  
 
+          
 
  
 
@@ -4611,10 +4716,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'error': 'Must be 2 uppercase letters'
 
  
 
+            # Handle nested fields (contains '.')
 
  
 
@@ -4624,10 +4729,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        },
 
  
 
+            if '.' in json_path:
 
  
 
@@ -4637,10 +4742,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        'groupMemberCode': {
 
  
 
+                parts = json_path.split('.')
 
  
 
@@ -4650,10 +4755,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'regex': r'^[A-Z]{4}$',
 
  
 
+                section = parts[0]
 
  
 
@@ -4663,10 +4768,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'transform': 'uppercase',
 
  
 
+                field_name = parts[1]
 
  
 
@@ -4676,10 +4781,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            'error': 'Must be 4 uppercase letters'
 
  
 
+              
 
  
 
@@ -4689,10 +4794,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        }
 
  
 
+                if section not in nested_sections:
 
  
 
@@ -4702,10 +4807,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    }
 
  
 
+                    nested_sections[section] = {}
 
  
 
@@ -4715,10 +4820,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-  
 
  
 
+              
 
  
 
@@ -4728,10 +4833,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # Helper function to auto-correct and transform field value
 
  
 
+                # Auto-correct and transform value
 
  
 
@@ -4741,10 +4846,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    def auto_correct_field(field_name, value):
 
  
 
+                corrected_value, corrections = auto_correct_field(field_name, value)
 
  
 
@@ -4754,10 +4859,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        """Auto-correct and transform field value according to rules"""
 
  
 
+                if corrections:
 
  
 
@@ -4767,10 +4872,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if field_name not in VALIDATION_RULES:
 
  
 
+                    for correction in corrections:
 
  
 
@@ -4780,10 +4885,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            # Generic whitespace trim for all string fields (addresses platform.team regex failing on leading space)
 
  
 
+                        print(f"  ✓ {correction}")
 
  
 
@@ -4793,10 +4898,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if isinstance(value, str):
 
  
 
+              
 
  
 
@@ -4806,10 +4911,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                trimmed = value.strip()
 
  
 
+                nested_sections[section][field_name] = corrected_value
 
  
 
@@ -4819,10 +4924,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                corrections = []
 
  
 
+            else:
 
  
 
@@ -4832,10 +4937,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                if trimmed != value:
 
  
 
+                # Top-level field - auto-correct and transform
 
  
 
@@ -4845,10 +4950,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    corrections.append(f"Trimmed whitespace: '{value}' → '{trimmed}'")
 
  
 
+                corrected_value, corrections = auto_correct_field(json_path, value)
 
  
 
@@ -4858,10 +4963,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                value = trimmed
 
  
 
+                if corrections:
 
  
 
@@ -4871,10 +4976,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                # If platform team becomes empty after trimming, keep original but note warning
 
  
 
+                    for correction in corrections:
 
  
 
@@ -4884,10 +4989,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                if field_name == 'team' and value == '':
 
  
 
+                        print(f"  ✓ {correction}")
 
  
 
@@ -4897,10 +5002,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    corrections.append("Warning: platform.team became empty after trimming")
 
  
 
+              
 
  
 
@@ -4910,10 +5015,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                return value, corrections if corrections else None
 
  
 
+                api_content[json_path] = corrected_value
 
  
 
@@ -4923,10 +5028,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            return value, None
 
  
 
+      
 
  
 
@@ -4936,10 +5041,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+        # Ensure mandatory sections exist (even if empty)
 
  
 
@@ -4949,10 +5054,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        rule = VALIDATION_RULES[field_name]
 
  
 
+        for mandatory_section in MANDATORY_SECTIONS:
 
  
 
@@ -4962,10 +5067,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        original_value = value
 
  
 
+            if mandatory_section not in nested_sections:
 
  
 
@@ -4975,10 +5080,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        corrections = []
 
  
 
+                nested_sections[mandatory_section] = {}
 
  
 
@@ -4988,10 +5093,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+                print(f"⚠️  Adding empty mandatory section: {mandatory_section}")
 
  
 
@@ -5001,7 +5106,6 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Apply transformation (uppercase)
 
  
 
@@ -5014,10 +5118,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if 'transform' in rule and rule['transform'] == 'uppercase':
 
  
 
+        # Inject hard-coded sourceCode.reference if not already provided
 
  
 
@@ -5027,10 +5131,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            value = str(value).upper()
 
  
 
+        if 'sourceCode' in nested_sections:
 
  
 
@@ -5040,10 +5144,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if str(original_value) != value:
 
  
 
+            if 'reference' not in nested_sections['sourceCode'] or not nested_sections['sourceCode']['reference']:
 
  
 
@@ -5053,10 +5157,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                corrections.append(f"Converted '{original_value}' to '{value}'")
 
  
 
+                # Hard-coded value; adjust if different branch needed
 
  
 
@@ -5069,6 +5173,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
+                nested_sections['sourceCode']['reference'] = 'main'
 
  
 
@@ -5078,10 +5183,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Generic whitespace trimming (after case transform) for any string value
 
  
 
+      
 
  
 
@@ -5091,10 +5196,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if isinstance(value, str):
 
  
 
+        # Add nested sections to main content
 
  
 
@@ -5104,10 +5209,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            trimmed = value.strip()
 
  
 
+        for section, fields in nested_sections.items():
 
  
 
@@ -5117,10 +5222,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if trimmed != value:
 
  
 
+            api_content[section] = fields  # Add even if empty (for mandatory sections)
 
  
 
@@ -5130,10 +5235,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                corrections.append(f"Trimmed whitespace: '{value}' → '{trimmed}'")
 
  
 
+      
 
  
 
@@ -5143,10 +5248,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                value = trimmed
 
  
 
+        # Handle consumingCountryGroups separately (needs both fields)
 
  
 
@@ -5156,10 +5261,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+        country_codes = api_data.get('consuming_country_code', '')
 
  
 
@@ -5169,10 +5274,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Auto-correct apiTechnicalName: remove spaces, special chars, trim hyphens
 
  
 
+        group_codes = api_data.get('consuming_group_member_code', '')
 
  
 
@@ -5182,10 +5287,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if field_name == 'apiTechnicalName':
 
  
 
+      
 
  
 
@@ -5195,10 +5300,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            # Remove spaces and special characters except hyphens
 
  
 
+        if is_valid_value(country_codes) or is_valid_value(group_codes):
 
  
 
@@ -5208,10 +5313,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            cleaned = re.sub(r'[^A-Za-z0-9-]', '', str(value))
 
  
 
+            # Handle comma-separated lists
 
  
 
@@ -5221,10 +5326,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            # Remove leading/trailing hyphens
 
  
 
+            if isinstance(country_codes, str):
 
  
 
@@ -5234,10 +5339,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            cleaned = cleaned.strip('-')
 
  
 
+                country_codes = [c.strip() for c in country_codes.split(',') if c.strip()]
 
  
 
@@ -5247,10 +5352,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if cleaned != str(value):
 
  
 
+            elif not isinstance(country_codes, list):
 
  
 
@@ -5260,10 +5365,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                corrections.append(f"Cleaned apiTechnicalName: '{value}' → '{cleaned}'")
 
  
 
+                country_codes = [country_codes] if country_codes else []
 
  
 
@@ -5273,10 +5378,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                value = cleaned
 
  
 
+          
 
  
 
@@ -5286,10 +5391,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+            if isinstance(group_codes, str):
 
  
 
@@ -5299,10 +5404,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Auto-correct countryCode: uppercase and truncate to 2 chars
 
  
 
+                group_codes = [g.strip() for g in group_codes.split(',') if g.strip()]
 
  
 
@@ -5312,10 +5417,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if field_name == 'countryCode':
 
  
 
+            elif not isinstance(group_codes, list):
 
  
 
@@ -5325,10 +5430,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            original = value
 
  
 
+                group_codes = [group_codes] if group_codes else []
 
  
 
@@ -5338,10 +5443,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            value = str(value).upper()[:2]  # Take first 2 chars, uppercase
 
  
 
+          
 
  
 
@@ -5351,10 +5456,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if str(original).upper() != value and len(str(original)) > 2:
 
  
 
+            if country_codes or group_codes:
 
  
 
@@ -5364,10 +5469,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                corrections.append(f"Truncated countryCode: '{original}' → '{value}'")
 
  
 
+                max_len = max(len(country_codes) if country_codes else 0, len(group_codes) if group_codes else 0)
 
  
 
@@ -5377,10 +5482,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+                country_group_list = []
 
  
 
@@ -5390,10 +5495,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Auto-correct groupMemberCode: uppercase and truncate to 4 chars
 
  
 
+                for i in range(max_len):
 
  
 
@@ -5403,10 +5508,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if field_name == 'groupMemberCode':
 
  
 
+                    cc = country_codes[i] if i < len(country_codes) else (country_codes[0] if country_codes else '')
 
  
 
@@ -5416,10 +5521,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            original = value
 
  
 
+                    gmc = group_codes[i] if i < len(group_codes) else (group_codes[0] if group_codes else '')
 
  
 
@@ -5429,10 +5534,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            value = str(value).upper()[:4]  # Take first 4 chars, uppercase
 
  
 
+                  
 
  
 
@@ -5442,10 +5547,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if str(original).upper() != value and len(str(original)) > 4:
 
  
 
+                    # Auto-correct country and group codes
 
  
 
@@ -5455,10 +5560,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                corrections.append(f"Truncated groupMemberCode: '{original}' → '{value}'")
 
  
 
+                    cc_val, cc_corrections = auto_correct_field('countryCode', cc)
 
  
 
@@ -5468,10 +5573,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+                    gmc_val, gmc_corrections = auto_correct_field('groupMemberCode', gmc)
 
  
 
@@ -5481,10 +5586,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Check enum - if not in enum, use first valid value
 
  
 
+                  
 
  
 
@@ -5494,10 +5599,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if 'enum' in rule:
 
  
 
+                    if cc_corrections:
 
  
 
@@ -5507,10 +5612,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if value not in rule['enum']:
 
  
 
+                        for correction in cc_corrections:
 
  
 
@@ -5520,10 +5625,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                default_value = rule['enum'][0]
 
  
 
+                            print(f"  ✓ {correction}")
 
  
 
@@ -5533,10 +5638,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                corrections.append(f"Invalid {field_name} '{value}', using default '{default_value}'")
 
  
 
+                    if gmc_corrections:
 
  
 
@@ -5546,10 +5651,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                value = default_value
 
  
 
+                        for correction in gmc_corrections:
 
  
 
@@ -5559,10 +5664,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+                            print(f"  ✓ {correction}")
 
  
 
@@ -5572,10 +5677,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Final regex check (after corrections)
 
  
 
+                  
 
  
 
@@ -5585,10 +5690,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if 'regex' in rule:
 
  
 
+                    country_group_list.append({
 
  
 
@@ -5598,10 +5703,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if not re.match(rule['regex'], str(value)):
 
  
 
+                        'countryCode': cc_val,
 
  
 
@@ -5611,10 +5716,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                # If still doesn't match, log warning but keep the value
 
  
 
+                        'groupMemberCode': gmc_val
 
  
 
@@ -5624,10 +5729,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                corrections.append(f"Warning: {field_name} '{value}' doesn't match expected pattern")
 
  
 
+                    })
 
  
 
@@ -5637,10 +5742,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+              
 
  
 
@@ -5650,10 +5755,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        return value, corrections if corrections else None
 
  
 
+                api_content['consumingCountryGroups'] = country_group_list
 
  
 
@@ -5663,10 +5768,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-  
 
  
 
+      
 
  
 
@@ -5676,10 +5781,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # Generate JSON for multiple APIs
 
  
 
+        # Log validation errors but still include API
 
  
 
@@ -5689,10 +5794,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    api_list = []
 
  
 
+        if api_errors:
 
  
 
@@ -5702,10 +5807,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    skipped_apis = []
 
  
 
+            validation_errors.extend(api_errors)
 
  
 
@@ -5715,10 +5820,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    validation_errors = []
 
  
 
+            print(f"⚠️  Validation warnings for {api_data.get('api_technical_name')}: {api_errors}")
 
  
 
@@ -5728,10 +5833,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-  
 
  
 
+      
 
  
 
@@ -5741,10 +5846,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    for idx, api_data in enumerate(api_data_list):
 
  
 
+        api_list.append(api_content)
 
  
 
@@ -5754,10 +5859,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Validate mandatory fields
 
  
 
+  
 
  
 
@@ -5767,10 +5872,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        missing_fields = []
 
  
 
+    # If all APIs were skipped, raise error
 
  
 
@@ -5780,10 +5885,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        for field in MANDATORY_FIELDS:
 
  
 
+    if not api_list:
 
  
 
@@ -5793,10 +5898,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if not is_valid_value(api_data.get(field)):
 
  
 
+        error_msg = "No valid APIs to generate JSON. All APIs are missing mandatory fields.\n"
 
  
 
@@ -5806,10 +5911,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                missing_fields.append(field)
 
  
 
+        for skipped in skipped_apis:
 
  
 
@@ -5819,10 +5924,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+            error_msg += f"  - {skipped['api']}: Missing {skipped['missing_fields']}\n"
 
  
 
@@ -5832,10 +5937,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if missing_fields:
 
  
 
+        raise ValueError(error_msg)
 
  
 
@@ -5845,10 +5950,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            api_name = api_data.get('api_technical_name', f'API #{idx+1}')
 
  
 
+  
 
  
 
@@ -5858,10 +5963,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            print(f"⚠️  Skipping {api_name}: Missing mandatory fields: {missing_fields}")
 
  
 
+    # Wrap in apiMetaData structure
 
  
 
@@ -5871,10 +5976,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            skipped_apis.append({'api': api_name, 'missing_fields': missing_fields})
 
  
 
+    result = {
 
  
 
@@ -5884,10 +5989,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            continue
 
  
 
+        "apiMetaData": {
 
  
 
@@ -5897,10 +6002,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+            "apiMetaDataList": api_list
 
  
 
@@ -5910,10 +6015,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Build the JSON structure DYNAMICALLY
 
  
 
+        }
 
  
 
@@ -5923,10 +6028,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        api_content = {}
 
  
 
+    }
 
  
 
@@ -5936,10 +6041,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        nested_sections = {}  # For nested objects like snowData, platform, sourceCode, etc.
 
  
 
+  
 
  
 
@@ -5949,10 +6054,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        api_errors = []
 
  
 
+    return result
 
  
 
@@ -5962,7 +6067,6 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
@@ -5975,33 +6079,66 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Process all fields in api_data dynamically
 
  
 
-
- 
+def validate_and_generate_json(api_data_list):
+    """Generate APIX JSON content (formatted text of build_apix_document) from API data"""
+    return json.dumps(build_apix_document(api_data_list), indent=2, ensure_ascii=False)
 
 
- 
+@app.route('/api/search', methods=['POST'])
+def search_api():
+    """
+    Search for API data by repository URL - returns all APIs in the repo
+    Optional paging (offset, limit), sorting (sort=field or -field), projection
+    (fields=api_technical_name,version) and summary=true (count only), in the body or query string
+    """
+    data = request.json or {}
+    repo_url = data.get('repository_url', '')
 
+    if not repo_url:
+        return jsonify({'error': 'Repository URL is required'}), 400
 
- 
+    params = {**request.args.to_dict(), **data}
+    listing = None
+    if wants_listing(params):
+        try:
+            listing = parse_listing(params)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
-        for internal_field, value in api_data.items():
+    api_data_list = find_api_by_repo(repo_url)
 
- 
+    if not api_data_list:
+        return jsonify({
+            'found': False,
+            'message': 'No API data found for this repository'
+        }), 404
 
+    if listing is None:
+        return jsonify({
+            'found': True,
+            'count': len(api_data_list),
+            'data': api_data_list  # Now returns array of APIs
+        })
 
- 
+    if listing['summary']:
+        return jsonify({'found': True, 'count': len(api_data_list)})
 
+    page, page_meta = paginate(api_data_list, listing)
+    return jsonify({
+        'found': True,
+        'count': len(api_data_list),
+        'data': [project(api, listing['fields']) for api in page],
+        'page': page_meta
+    })
 
- 
 
+@app.route('/api/generate-json', methods=['POST'])
 
  
 
-            # Skip if value is not valid
 
  
 
@@ -6011,10 +6148,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+def generate_json_endpoint():
 
  
 
-            if not is_valid_value(value):
 
  
 
@@ -6024,10 +6161,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+    """Generate APIX JSON file"""
 
  
 
-                continue
 
  
 
@@ -6037,10 +6174,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+    data = request.json
 
  
 
-          
 
  
 
@@ -6050,10 +6187,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+    repo_url = data.get('repository_url', '')
 
  
 
-            # Skip repository_url as it's not part of YAML output
 
  
 
@@ -6063,10 +6200,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+  
 
  
 
-            if internal_field == 'repository_url':
 
  
 
@@ -6076,10 +6213,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+    if not repo_url:
 
  
 
-                continue
 
  
 
@@ -6089,10 +6226,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+        return jsonify({'error': 'Repository URL is required'}), 400
 
  
 
-          
 
  
 
@@ -6102,10 +6239,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+  
 
  
 
-            # Check if field is in our mapping
 
  
 
@@ -6115,10 +6252,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+    api_data = find_api_by_repo(repo_url)
 
  
 
-            if internal_field not in FIELD_MAPPING:
 
  
 
@@ -6128,10 +6265,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+  
 
  
 
-                # Field not in mapping - check if it's a new field
 
  
 
@@ -6141,10 +6278,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+    if not api_data:
 
  
 
-                # Add it as-is with camelCase conversion
 
  
 
@@ -6154,10 +6291,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+        return jsonify({'error': 'No API data found for this repository'}), 404
 
  
 
-                json_key = ''.join(word.capitalize() if i > 0 else word for i, word in enumerate(internal_field.split('_')))
 
  
 
@@ -6167,10 +6304,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+  
 
  
 
-                print(f"ℹ️  New field detected: '{internal_field}' -> '{json_key}'")
 
  
 
@@ -6180,10 +6317,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+    try:
 
  
 
-                api_content[json_key] = value
 
  
 
@@ -6193,10 +6330,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+        json_content = validate_and_generate_json(api_data)
 
  
 
-                continue
 
  
 
@@ -6206,10 +6343,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+      
 
  
 
-          
 
  
 
@@ -6219,10 +6356,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+        return jsonify({
 
  
 
-            json_path = FIELD_MAPPING[internal_field]
 
  
 
@@ -6232,10 +6369,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+            'json': json_content,
 
  
 
-          
 
  
 
@@ -6245,10 +6382,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+            'filename': 'apix-metadata.json'
 
  
 
-            # Handle special array fields
 
  
 
@@ -6258,10 +6395,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+        })
 
  
 
-            if internal_field == 'consumer_application_service_ids':
 
  
 
@@ -6271,10 +6408,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+    except ValueError as e:
 
  
 
-                # Convert to array of objects
 
  
 
@@ -6284,10 +6421,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+        return jsonify({'error': str(e)}), 400
 
  
 
-                consumer_ids = value
 
  
 
@@ -6300,7 +6437,6 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                if isinstance(consumer_ids, str):
 
  
 
@@ -6310,64 +6446,231 @@ def validate_and_generate_json(api_data_list):
 
  
 
+@app.route('/api/validate', methods=['POST'])
+def validate_json():
+    """Validate JSON against APIX API"""
+    data = request.json
+    json_content = data.get('json_content', '')
 
- 
-
-                    consumer_ids = [id.strip() for id in consumer_ids.split(',') if id.strip()]
+    if not json_content:
+        return jsonify({'error': 'JSON content is required'}), 400
 
- 
+    try:
+        print(f"Validating JSON against: {apix.validate_url}")
 
+        # Parse JSON string to dict for validation
+        try:
+            json_data = json.loads(json_content) if isinstance(json_content, str) else json_content
+        except json.JSONDecodeError as je:
+            return jsonify({'error': 'Provided json_content is not valid JSON', 'detail': str(je), 'offset': je.pos}), 400
 
- 
+        # Documents failing the local schema check never reach APIX
+        local_errors = local_validation_errors(json_data)
+        if local_errors:
+            return jsonify({
+                'valid': False,
+                'message': 'JSON validation failed (local schema check)',
+                'errors': local_errors,
+                'validated_by': 'local'
+            }), 400
 
+        outcome = validate_document(json_data, cache=validation_cache, client=apix)
+        if outcome['valid']:
+            return jsonify({
+                'valid': True,
+                'message': outcome['message'],
+                'details': outcome['details'],
+                'cached': outcome.get('cached', False)
+            })
+        if 'error' in outcome:
+            # Non-JSON answer from the validation service
+            return jsonify({key: value for key, value in outcome.items() if key != 'valid'}), 502
+        return jsonify(outcome), 400
 
- 
+    except DependencyUnavailable as e:
+        return jsonify(e.to_dict()), 503
+    except requests.exceptions.RequestException as e:
+        return jsonify({'error': f'Validation API request failed: {str(e)}'}), 500
+    except json.JSONDecodeError as e:
+        return jsonify({'error': f'Invalid JSON format: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
 
- 
+@app.route('/api/validate/bulk', methods=['POST'])
+def validate_bulk():
+    """
+    Validate many repositories' generated JSON against APIX concurrently
+    Request body: { repository_urls: [...] } or { all: true }, optional concurrency
+    (capped at the APIX bulkhead size; bulk calls queue for a slot rather than being rejected)
+    Streams one JSON line per repository as soon as its validation finishes
+    (application/x-ndjson), then a summary line with passed / failed / errors counts and
+    unavailable (not sent: APIX circuit open) kept apart from APIX errors.
+    """
+    data = request.json or {}
+    catalog = get_catalog()
+    if catalog is None:
+        return jsonify({'error': 'API metadata catalog could not be loaded'}), 500
 
-                elif not isinstance(consumer_ids, list):
+    repo_urls = catalog_repo_urls(catalog) if data.get('all') else data.get('repository_urls') or []
+    if not repo_urls:
+        return jsonify({'error': 'repository_urls (list) or all=true is required'}), 400
 
- 
+    try:
+        concurrency = max(1, int(data.get('concurrency', APIX_BULK_VALIDATE_CONCURRENCY)))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'concurrency must be an integer'}), 400
+
+    # Generate every repo's document up front; repos that cannot be generated are reported immediately
+    documents = []
+    rejected = []
+    locally_invalid = []
+    for repo_url in dict.fromkeys(repo_urls):
+        api_data_list = find_api_by_repo(repo_url, data=catalog)
+        if not api_data_list:
+            rejected.append({'repository_url': repo_url, 'valid': False, 'error': 'No API data found for this repository'})
+            continue
+        try:
+            document = build_apix_document(api_data_list)
+        except ValueError as e:
+            rejected.append({'repository_url': repo_url, 'valid': False, 'error': str(e)})
+            continue
+        # Only locally valid documents are sent to APIX
+        local_errors = local_validation_errors(document)
+        if local_errors:
+            locally_invalid.append({'repository_url': repo_url, 'valid': False, 'errors': local_errors, 'validated_by': 'local'})
+        else:
+            documents.append((repo_url, document))
 
+    print(f"Bulk validation: {len(documents)} documents, concurrency {concurrency}, "
+          f"{len(locally_invalid)} failed the local schema check, {len(rejected)} rejected")
+    outcomes = queue.Queue()
 
- 
+    def run_bulk():
+        summary = {'passed': 0, 'failed': 0, 'errors': 0, 'unavailable': 0}
+        try:
+            summary = validate_many(documents, lambda repo_url, outcome: outcomes.put({'repository_url': repo_url, **outcome}),
+                                    concurrency=concurrency, client=apix, cache=validation_cache)
+        except Exception as e:
+            outcomes.put({'valid': False, 'error': f'Bulk validation aborted: {str(e)}'})
+        outcomes.put({
+            'summary': True,
+            'total': len(documents) + len(locally_invalid) + len(rejected),
+            'passed': summary['passed'],
+            'failed': summary['failed'] + len(locally_invalid),
+            'errors': summary['errors'] + len(rejected),
+            'unavailable': summary['unavailable']
+        })
+        outcomes.put(None)
 
+    threading.Thread(target=run_bulk, name='apix-bulk-validate', daemon=True).start()
 
- 
+    def generate():
+        for outcome in rejected + locally_invalid:
+            yield json.dumps(outcome) + '\n'
+        while True:
+            outcome = outcomes.get()
+            if outcome is None:
+                break
+            yield json.dumps(outcome) + '\n'
 
+    return Response(generate(), mimetype='application/x-ndjson')
 
- 
 
-                    consumer_ids = [consumer_ids]
+APIX_FILE_PATH = 'apix-metadata.json'
 
- 
+APIX_PR_BODY = 'This PR adds the APIX metadata JSON file for API repository audit.\n\nGenerated automatically by APIX Automation Tool.\n\nFile: `apix-metadata.json`'
 
 
- 
+def timed(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) and return (result, elapsed_ms)"""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round((time.perf_counter() - started) * 1000, 1)
 
 
- 
+def finish_timings(name, timings, started):
+    """Add total_ms to a request's timings and record it as '<name>.total'"""
+    timings['total_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    latency_stats.record(f'{name}.total', timings['total_ms'])
+    return timings
 
 
- 
+def is_wdp_repo(api_data_list):
+    """WDP repos need the WDP JIRA ID in commit message and PR title"""
+    if not api_data_list:
+        return False
+    first_api = api_data_list[0] if isinstance(api_data_list, list) else api_data_list
+    return str(first_api.get('eim_id', 'unknown-eim')) == WDP_EIM_ID
 
-              
 
- 
+def apix_commit_texts(api_data_list):
+    """Commit message and PR title (with the WDP JIRA ID for the WDP repo)"""
+    commit_message = 'Add APIX metadata JSON file for API audit'
+    pr_title = 'Add APIX metadata JSON file'
+    if is_wdp_repo(api_data_list):
+        commit_message = f'{WDP_JIRA_ID}: {commit_message}'
+        pr_title = f'{WDP_JIRA_ID}: {pr_title}'
+    return commit_message, pr_title
 
 
- 
+def catalog_repo_urls(data):
+    """All (normalized) repository URLs in loaded catalog data"""
+    if data is None:
+        return []
+    if isinstance(data, dict):
+        return list(data.keys())
+    if 'repository_url' not in data.columns:
+        return []
+    return sorted(set(data['repository_url'].apply(normalize_repo_url)) - {''})
 
 
- 
+def build_pr_job(repo_url, catalog):
+    """
+    Everything needed to commit the APIX file and open the PR for one catalog repo
+    Raises ValueError if the repo is not in the catalog or its JSON cannot be generated
+    """
+    api_data_list = find_api_by_repo(repo_url, data=catalog)
+    if not api_data_list:
+        raise ValueError('No API data found for this repository')
+    json_content = validate_and_generate_json(api_data_list)
+    commit_message, pr_title = apix_commit_texts(api_data_list)
+    parts = repo_url.rstrip('/').split('/')
+    return {
+        'repository_url': repo_url,
+        'owner': parts[-2],
+        'repo': parts[-1].replace('.git', ''),
+        'branch_name': apix_branch_name(api_data_list),
+        'file_path': APIX_FILE_PATH,
+        'content': json_content,
+        'commit_message': commit_message,
+        'pr_title': pr_title,
+        'pr_body': APIX_PR_BODY
+    }
 
 
- 
+def apix_branch_name(api_data_list):
+    """Branch used for the APIX PR: apix_<eim id>, or a timestamp branch if the repo is not in the catalog"""
+    if api_data_list:
+        # Use first API's EIM ID for branch naming
+        first_api = api_data_list[0] if isinstance(api_data_list, list) else api_data_list
+        eim_id = first_api.get('eim_id', 'unknown-eim')
+        # Clean EIM ID for branch naming (remove special chars, lowercase)
+        clean_eim_id = re.sub(r'[^a-zA-Z0-9-]', '', str(eim_id).lower())
+        branch_name = f'apix_{clean_eim_id}'
+        print(f"Using EIM ID: {eim_id} -> branch: {branch_name}")
+        # Special validation for WDP repo
+        if str(eim_id) == WDP_EIM_ID:
+            print(f"WDP repo detected (EIM ID: {eim_id}), will add  JIRA ID to commit message")
+        return branch_name
 
-                if consumer_ids:
+    # Fallback to timestamp if no API data found
+    branch_name = f'apix-metadata-{datetime.now().strftime("%Y%m%d-%H%M%S")}'
+    print(f"No API data found, using timestamp branch: {branch_name}")
+    return branch_name
 
- 
+
+@app.route('/api/create-pr', methods=['POST'])
 
 
  
@@ -6378,7 +6681,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    api_content['consumers'] = [
+def create_pr():
 
  
 
@@ -6391,7 +6694,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                        {'applicationServiceId': str(cid)} for cid in consumer_ids
+    """Create a pull request with the APIX JSON file"""
 
  
 
@@ -6404,7 +6707,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    ]
+    data = request.json
 
  
 
@@ -6417,7 +6720,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                continue
+    repo_url = data.get('repository_url', '')
 
  
 
@@ -6430,7 +6733,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-          
+    json_content = data.get('json_content', '')
 
  
 
@@ -6443,7 +6746,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            # Handle consumingCountryGroups (needs both country and group codes)
+    # GitHub token now sourced from environment (service account) instead of request body
 
  
 
@@ -6456,7 +6759,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if internal_field in ['consuming_country_code', 'consuming_group_member_code']:
+    github_token = os.environ.get('SERVICE_GITHUB_TOKEN') or os.environ.get('GITHUB_TOKEN') or ''
 
  
 
@@ -6469,7 +6772,6 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                # Will be processed together later
 
  
 
@@ -6482,7 +6784,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                continue
+    if not all([repo_url, json_content]):
 
  
 
@@ -6495,7 +6797,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-          
+        return jsonify({'error': 'Missing required fields (repository_url, json_content)'}), 400
 
  
 
@@ -6508,7 +6810,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            # Handle nested fields (contains '.')
+    if not github_token:
 
  
 
@@ -6521,7 +6823,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if '.' in json_path:
+        return jsonify({'error': 'Server is not configured with SERVICE_GITHUB_TOKEN or GITHUB_TOKEN environment variable'}), 500
 
  
 
@@ -6534,7 +6836,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                parts = json_path.split('.')
+  
 
  
 
@@ -6547,7 +6849,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                section = parts[0]
+    try:
 
  
 
@@ -6560,7 +6862,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                field_name = parts[1]
+        # Parse repository owner and name from URL
 
  
 
@@ -6573,7 +6875,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-              
+        # Example: https://github.com/owner/repo or https://github.company.com/owner/repo
 
  
 
@@ -6586,7 +6888,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                if section not in nested_sections:
+        parts = repo_url.rstrip('/').split('/')
 
  
 
@@ -6599,7 +6901,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    nested_sections[section] = {}
+        owner = parts[-2]
 
  
 
@@ -6612,7 +6914,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-              
+        repo = parts[-1].replace('.git', '')
 
  
 
@@ -6625,7 +6927,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                # Auto-correct and transform value
+      
 
  
 
@@ -6638,7 +6940,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                corrected_value, corrections = auto_correct_field(field_name, value)
+        # Support both old (token) and new (Bearer) GitHub auth formats
 
  
 
@@ -6651,7 +6953,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                if corrections:
+        auth_header = github_auth_header(github_token)
 
  
 
@@ -6664,7 +6966,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    for correction in corrections:
+        headers = {
 
  
 
@@ -6677,7 +6979,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                        print(f"  ✓ {correction}")
+            'Authorization': auth_header,
 
  
 
@@ -6690,7 +6992,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-              
+            # Use vendor-specific accept plus fallback behavior
 
  
 
@@ -6703,7 +7005,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                nested_sections[section][field_name] = corrected_value
+            'Accept': 'application/vnd.github.v3+json',
 
  
 
@@ -6716,7 +7018,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            else:
+            'User-Agent': 'apix-automation-tool',
 
  
 
@@ -6729,7 +7031,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                # Top-level field - auto-correct and transform
+            'X-GitHub-Api-Version': '2022-11-28'
 
  
 
@@ -6742,7 +7044,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                corrected_value, corrections = auto_correct_field(json_path, value)
+        }
 
  
 
@@ -6755,7 +7057,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                if corrections:
+        print(f"Using auth format: {auth_header.split()[0]} (env token)")
 
  
 
@@ -6768,7 +7070,6 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    for correction in corrections:
 
  
 
@@ -6781,7 +7082,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                        print(f"  ✓ {correction}")
+        # Detect if user accidentally supplied YAML instead of JSON and convert
 
  
 
@@ -6794,7 +7095,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-              
+        def attempt_yaml_to_json(text):
 
  
 
@@ -6807,7 +7108,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                api_content[json_path] = corrected_value
+            import yaml as _yaml
 
  
 
@@ -6820,7 +7121,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
+            try:
 
  
 
@@ -6833,7 +7134,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Ensure mandatory sections exist (even if empty)
+                # Quick heuristic: Presence of ':' line separators without braces
 
  
 
@@ -6846,7 +7147,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        for mandatory_section in MANDATORY_SECTIONS:
+                if isinstance(text, str) and ('\n' in text or ':' in text) and not text.strip().startswith('{'):
 
  
 
@@ -6859,7 +7160,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if mandatory_section not in nested_sections:
+                    loaded = _yaml.safe_load(text)
 
  
 
@@ -6872,7 +7173,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                nested_sections[mandatory_section] = {}
+                    if isinstance(loaded, dict) or isinstance(loaded, list):
 
  
 
@@ -6885,7 +7186,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                print(f"⚠️  Adding empty mandatory section: {mandatory_section}")
+                        return json.dumps(loaded, indent=2), True, None
 
  
 
@@ -6898,6 +7199,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
+                return text, False, None
 
  
 
@@ -6910,7 +7212,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Inject hard-coded sourceCode.reference if not already provided
+            except Exception as _e:
 
  
 
@@ -6923,7 +7225,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if 'sourceCode' in nested_sections:
+                return text, False, str(_e)
 
  
 
@@ -6936,7 +7238,6 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if 'reference' not in nested_sections['sourceCode'] or not nested_sections['sourceCode']['reference']:
 
  
 
@@ -6949,7 +7250,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                # Hard-coded value; adjust if different branch needed
+        converted_content, was_yaml, yaml_error = attempt_yaml_to_json(json_content)
 
  
 
@@ -6962,7 +7263,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                nested_sections['sourceCode']['reference'] = 'main'
+        if yaml_error:
 
  
 
@@ -6975,7 +7276,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
+            print(f"YAML parse attempt failed (ignored): {yaml_error}")
 
  
 
@@ -6988,7 +7289,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Add nested sections to main content
+        if was_yaml:
 
  
 
@@ -7001,7 +7302,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        for section, fields in nested_sections.items():
+            print("Detected YAML input; converted to JSON before commit.")
 
  
 
@@ -7014,7 +7315,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            api_content[section] = fields  # Add even if empty (for mandatory sections)
+            json_content = converted_content
 
  
 
@@ -7027,7 +7328,6 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
@@ -7040,7 +7340,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Handle consumingCountryGroups separately (needs both fields)
+        # Validate that json_content is valid JSON now
 
  
 
@@ -7053,7 +7353,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        country_codes = api_data.get('consuming_country_code', '')
+        try:
 
  
 
@@ -7066,7 +7366,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        group_codes = api_data.get('consuming_group_member_code', '')
+            parsed_json = json.loads(json_content)
 
  
 
@@ -7079,7 +7379,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
+        except json.JSONDecodeError as je:
 
  
 
@@ -7092,10 +7392,60 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if is_valid_value(country_codes) or is_valid_value(group_codes):
+            return jsonify({'error': 'json_content is not valid JSON after optional YAML conversion', 'detail': str(je), 'offset': je.pos}), 400
 
- 
+        # Catalog lookup (workbook parse) runs in the background while GitHub is queried
+        started = time.perf_counter()
+        catalog_future = IO_EXECUTOR.submit(timed, find_api_by_repo, repo_url)
+
+        # Fast path: one GraphQL lookup + one GraphQL mutation (branch, commit and PR)
+        if GITHUB_COMMIT_MODE == 'graphql':
+            timings = {}
+            try:
+                # The branch name comes from the catalog: list the apix_ branches meanwhile
+                context, timings['github_lookup_ms'] = timed(fetch_repository_context, owner, repo, headers)
+                (api_data_list, timings['catalog_lookup_ms']), timings['catalog_wait_ms'] = timed(catalog_future.result)
+                branch_name = apix_branch_name(api_data_list)
+                context, timings['branch_lookup_ms'] = timed(complete_commit_context, context, owner, repo, headers, branch_name)
+                commit_message, pr_title = apix_commit_texts(api_data_list)
+
+                result, timings['commit_and_pr_ms'] = timed(
+                    commit_file_and_open_pr, owner, repo, headers, context, branch_name, APIX_FILE_PATH,
+                    json_content, commit_message, pr_title, APIX_PR_BODY
+                )
+                finish_timings('create_pr', timings, started)
+                if result['up_to_date']:
+                    print(f"APIX file already up to date on {owner}/{repo} (PR: {result['pr_url']}, timings: {timings})")
+                else:
+                    print(f"PR ready via GraphQL: {result['pr_url']} (timings: {timings})")
+                if result['pr_number']:
+                    pr_state_store.record(owner, repo, branch_name, True, {
+                        'number': result['pr_number'], 'html_url': result['pr_url'], 'state': 'open', 'merged': False, 'merged_at': None
+                    })
+                response = {
+                    'success': True,
+                    'pr_url': result['pr_url'],
+                    'pr_number': result['pr_number'],
+                    'branch': branch_name,
+                    'branch_created': result['branch_created'],
+                    'pr_created': result['pr_created'],
+                    'up_to_date': result['up_to_date'],
+                    'commit_path': 'graphql',
+                    'timings_ms': timings
+                }
+                if result['up_to_date'] and not result['pr_created']:
+                    response['message'] = 'APIX metadata is already up to date' + ('' if result['pr_url'] else ' on the default branch')
+                return jsonify(response)
+            except GraphQLUnavailable as e:
+                print(f"GraphQL commit path unavailable, falling back to REST: {e}")
+            except GraphQLError as e:
+                print(f"GraphQL commit path failed: {e}")
+                return jsonify({'error': str(e), 'status_code': e.status_code, 'details': e.errors, 'commit_path': 'graphql'}), e.http_status()
+
+        # REST fallback: one call per step, each timed
+        timings = {}
 
+        # Get default branch
 
  
 
@@ -7105,10 +7455,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            # Handle comma-separated lists
 
  
 
+        repo_info_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}'
 
  
 
@@ -7118,10 +7468,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if isinstance(country_codes, str):
 
  
 
+        print(f"Fetching repo info: {repo_info_url}")
 
  
 
@@ -7131,10 +7481,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                country_codes = [c.strip() for c in country_codes.split(',') if c.strip()]
 
  
 
+        def safe_json(resp, phase):
 
  
 
@@ -7144,10 +7494,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            elif not isinstance(country_codes, list):
 
  
 
+            try:
 
  
 
@@ -7157,10 +7507,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                country_codes = [country_codes] if country_codes else []
 
  
 
+                return resp.json(), None
 
  
 
@@ -7170,10 +7520,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-          
 
  
 
+            except ValueError as ve:
 
  
 
@@ -7183,10 +7533,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if isinstance(group_codes, str):
 
  
 
+                sample = (resp.text or '')[:400]
 
  
 
@@ -7196,10 +7546,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                group_codes = [g.strip() for g in group_codes.split(',') if g.strip()]
 
  
 
+                return None, {
 
  
 
@@ -7209,10 +7559,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            elif not isinstance(group_codes, list):
 
  
 
+                    'error': 'Non-JSON response',
 
  
 
@@ -7222,10 +7572,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                group_codes = [group_codes] if group_codes else []
 
  
 
+                    'phase': phase,
 
  
 
@@ -7235,10 +7585,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-          
 
  
 
+                    'status_code': resp.status_code,
 
  
 
@@ -7248,10 +7598,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            if country_codes or group_codes:
 
  
 
+                    'content_type': resp.headers.get('Content-Type'),
 
  
 
@@ -7261,10 +7611,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                max_len = max(len(country_codes) if country_codes else 0, len(group_codes) if group_codes else 0)
 
  
 
+                    'body_sample': sample,
 
  
 
@@ -7274,10 +7624,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                country_group_list = []
 
  
 
+                    'exception': str(ve)
 
  
 
@@ -7287,10 +7637,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                for i in range(max_len):
 
  
 
+                }
 
  
 
@@ -7300,7 +7650,6 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    cc = country_codes[i] if i < len(country_codes) else (country_codes[0] if country_codes else '')
 
  
 
@@ -7313,10 +7662,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    gmc = group_codes[i] if i < len(group_codes) else (group_codes[0] if group_codes else '')
 
  
 
+        repo_response, timings['repo_info_ms'] = timed(github.get, repo_info_url, headers=headers)
 
  
 
@@ -7326,10 +7675,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                  
 
  
 
+        repo_json, repo_err = safe_json(repo_response, 'repo_info')
 
  
 
@@ -7339,10 +7688,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    # Auto-correct country and group codes
 
  
 
+        if repo_err:
 
  
 
@@ -7352,10 +7701,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    cc_val, cc_corrections = auto_correct_field('countryCode', cc)
 
  
 
+            return jsonify(repo_err), 502
 
  
 
@@ -7365,10 +7714,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    gmc_val, gmc_corrections = auto_correct_field('groupMemberCode', gmc)
 
  
 
+        if repo_response.status_code != 200:
 
  
 
@@ -7378,10 +7727,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                  
 
  
 
+            error_msg = repo_json.get('message', 'Unknown error') if repo_json else 'Unknown'
 
  
 
@@ -7391,10 +7740,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    if cc_corrections:
 
  
 
+            print(f"Failed to access repo: {repo_response.status_code} - {error_msg}")
 
  
 
@@ -7404,10 +7753,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                        for correction in cc_corrections:
 
  
 
+            return jsonify({'error': 'Failed to access repository', 'status_code': repo_response.status_code, 'details': repo_json}), 400
 
  
 
@@ -7417,10 +7766,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                            print(f"  ✓ {correction}")
 
  
 
+        default_branch = repo_json.get('default_branch')
 
  
 
@@ -7430,10 +7779,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    if gmc_corrections:
 
  
 
+        print(f"Default branch: {default_branch}")
 
  
 
@@ -7443,10 +7792,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                        for correction in gmc_corrections:
 
  
 
+      
 
  
 
@@ -7456,10 +7805,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                            print(f"  ✓ {correction}")
 
  
 
+        # Get the SHA of the default branch
 
  
 
@@ -7469,10 +7818,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                  
 
  
 
+        ref_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/git/refs/heads/{default_branch}'
 
  
 
@@ -7482,10 +7831,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    country_group_list.append({
 
  
 
+        ref_response, timings['base_ref_ms'] = timed(github.get, ref_url, headers=headers)
 
  
 
@@ -7495,10 +7844,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                        'countryCode': cc_val,
 
  
 
+        ref_json, ref_err = safe_json(ref_response, 'ref_lookup')
 
  
 
@@ -7508,10 +7857,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                        'groupMemberCode': gmc_val
 
  
 
+        if ref_err:
 
  
 
@@ -7521,10 +7870,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                    })
 
  
 
+            return jsonify(ref_err), 502
 
  
 
@@ -7534,10 +7883,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-              
 
  
 
+        if ref_response.status_code != 200:
 
  
 
@@ -7547,10 +7896,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-                api_content['consumingCountryGroups'] = country_group_list
 
  
 
+            error_msg = ref_json.get('message', 'Unknown error') if ref_json else 'Unknown'
 
  
 
@@ -7560,10 +7909,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+            print(f"Failed to get branch ref: {ref_response.status_code} - {error_msg}")
 
  
 
@@ -7573,10 +7922,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        # Log validation errors but still include API
 
  
 
+            return jsonify({'error': 'Failed to get branch reference', 'status_code': ref_response.status_code, 'details': ref_json}), 400
 
  
 
@@ -7586,10 +7935,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        if api_errors:
 
  
 
+        try:
 
  
 
@@ -7599,10 +7948,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            validation_errors.extend(api_errors)
 
  
 
+            base_sha = ref_json['object']['sha']
 
  
 
@@ -7612,10 +7961,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            print(f"⚠️  Validation warnings for {api_data.get('api_technical_name')}: {api_errors}")
 
  
 
+        except Exception:
 
  
 
@@ -7625,10 +7974,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-      
 
  
 
+            return jsonify({'error': 'object.sha missing in ref response', 'ref_json': ref_json}), 502
 
  
 
@@ -7638,10 +7987,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        api_list.append(api_content)
 
  
 
+        print(f"Base SHA: {base_sha}")
 
  
 
@@ -7651,10 +8000,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
-  
 
  
 
+      
 
  
 
@@ -7664,85 +8013,134 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # If all APIs were skipped, raise error
 
  
 
+        # Get API data to determine EIM ID for branch naming (lookup started above)
+        (api_data_list, timings['catalog_lookup_ms']), timings['catalog_wait_ms'] = timed(catalog_future.result)
+        branch_name = apix_branch_name(api_data_list)
+        commit_message, pr_title = apix_commit_texts(api_data_list)
 
  
 
+        # Create a new branch
 
- 
+        # First, check if the branch already exists so we can reuse it
+
+        existing_branch_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/git/refs/heads/{branch_name}'
 
+        existing_branch_response, timings['branch_lookup_ms'] = timed(github.get, existing_branch_url, headers=headers)
 
  
 
-    if not api_list:
+        branch_exists = existing_branch_response.status_code == 200
+        open_pr = None
+        if branch_exists:
+            # Branch already exists – reuse it instead of trying to create again
+            print(f"Branch already exists, reusing: {branch_name}")
+            open_pulls, timings['pr_lookup_ms'] = timed(github.get, f'{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls', headers=headers,
+                                                        params={'head': f'{owner}:{branch_name}', 'state': 'open'})
+            open_pulls_json, _ = safe_json(open_pulls, 'pr_lookup')
+            if open_pulls.status_code == 200 and open_pulls_json:
+                open_pr = open_pulls_json[0]
+
+        if open_pr is None:
+            # No open PR: if the default branch already has this content there is nothing to
+            # commit or propose (a new PR would only end in a 422 "No commits between"),
+            # e.g. the earlier PR was merged and its branch kept - same as commit_plan
+            base_file, timings['base_file_check_ms'] = timed(
+                github.get, f'{GITHUB_API_BASE}/repos/{owner}/{repo}/contents/{APIX_FILE_PATH}',
+                headers=headers, params={'ref': default_branch}
+            )
+            base_file_json, _ = safe_json(base_file, 'base_file_check')
+            if base_file.status_code == 200 and base_file_json and base_file_json.get('sha') == git_blob_sha(json_content):
+                print(f"APIX file already up to date on {owner}/{repo} default branch {default_branch}")
+                return jsonify({
+                    'success': True,
+                    'pr_url': None,
+                    'pr_number': None,
+                    'branch': branch_name,
+                    'branch_created': False,
+                    'pr_created': False,
+                    'up_to_date': True,
+                    'message': 'APIX metadata is already up to date on the default branch',
+                    'commit_path': 'rest',
+                    'timings_ms': finish_timings('create_pr', timings, started)
+                })
 
- 
+        if not branch_exists:
+            # Only attempt to create the branch if it does not already exist
 
+            create_branch_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/git/refs'
 
  
 
+            branch_data = {
 
  
 
+                'ref': f'refs/heads/{branch_name}',
 
  
 
-        error_msg = "No valid APIs to generate JSON. All APIs are missing mandatory fields.\n"
-
- 
-
+                'sha': base_sha
 
  
 
+            }
 
  
 
+            print(f"Creating branch: {branch_name}")
 
  
 
-        for skipped in skipped_apis:
+            branch_response, timings['branch_create_ms'] = timed(github.post, create_branch_url, json=branch_data, headers=headers)
 
  
 
+            branch_json, branch_err = safe_json(branch_response, 'branch_create')
 
  
 
+            if branch_err:
 
  
 
+                return jsonify(branch_err), 502
 
  
 
-            error_msg += f"  - {skipped['api']}: Missing {skipped['missing_fields']}\n"
+            if branch_response.status_code not in (200, 201):
 
  
 
+                error_msg = branch_json.get('message', 'Unknown error') if branch_json else 'Unknown'
 
  
 
+                # If GitHub reports that the reference already exists, treat it as a non-fatal condition
 
- 
+                if branch_response.status_code == 422 and 'Reference already exists' in str(error_msg):
 
+                    print(f"Branch {branch_name} already exists according to GitHub; continuing with existing branch")
 
- 
+                else:
 
-        raise ValueError(error_msg)
+                    print(f"Failed to create branch: {branch_response.status_code} - {error_msg}")
 
  
 
+                    return jsonify({'error': 'Failed to create branch', 'status_code': branch_response.status_code, 'details': branch_json}), 400
 
  
 
-
- 
+            print(f"Branch created successfully: {branch_name}")
 
 
  
 
-  
+      
 
  
 
@@ -7755,7 +8153,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # Wrap in apiMetaData structure
+        # Create or update the file
 
  
 
@@ -7768,7 +8166,8 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    result = {
+        file_path = APIX_FILE_PATH
+        file_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/contents/{file_path}'
 
  
 
@@ -7781,7 +8180,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        "apiMetaData": {
+      
 
  
 
@@ -7794,7 +8193,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-            "apiMetaDataList": api_list
+        # Check if file exists
 
  
 
@@ -7807,7 +8206,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-        }
+        file_check, timings['file_check_ms'] = timed(github.get, file_url, headers=headers, params={'ref': branch_name})
 
  
 
@@ -7820,7 +8219,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    }
+        file_check_json, file_check_err = safe_json(file_check, 'file_check')
 
  
 
@@ -7833,7 +8232,6 @@ def validate_and_generate_json(api_data_list):
 
  
 
-  
 
  
 
@@ -7846,7 +8244,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    # Return JSON string with proper formatting
+        file_data = {
 
  
 
@@ -7859,7 +8257,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
-    return json.dumps(result, indent=2, ensure_ascii=False)
+            'message': commit_message,
 
  
 
@@ -7869,6 +8267,7 @@ def validate_and_generate_json(api_data_list):
 
  
 
+            'content': base64.b64encode(json_content.encode()).decode(),
 
  
 
@@ -7881,10 +8280,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+            'branch': branch_name,
 
  
 
-@app.route('/api/search', methods=['POST'])
 
  
 
@@ -7894,10 +8293,10 @@ def validate_and_generate_json(api_data_list):
 
  
 
+            # Add committer info optionally (GitHub may attribute to token user automatically)
 
  
 
-def search_api():
 
  
 
@@ -7907,10 +8306,10 @@ def search_api():
 
  
 
+        }
 
  
 
-    """Search for API data by repository URL - returns all APIs in the repo"""
 
  
 
@@ -7920,10 +8319,10 @@ def search_api():
 
  
 
+      
 
  
 
-    data = request.json
 
  
 
@@ -7933,10 +8332,11 @@ def search_api():
 
  
 
+        file_unchanged = False
+        if file_check.status_code == 200 and not file_check_err:
 
  
 
-    repo_url = data.get('repository_url', '')
 
  
 
@@ -7946,10 +8346,10 @@ def search_api():
 
  
 
+            sha = file_check_json.get('sha') if file_check_json else None
 
  
 
-  
 
  
 
@@ -7959,10 +8359,10 @@ def search_api():
 
  
 
+            if not sha:
 
  
 
-    if not repo_url:
 
  
 
@@ -7972,10 +8372,10 @@ def search_api():
 
  
 
+                return jsonify({'error': 'Missing sha in existing file response', 'details': file_check_json}), 502
 
  
 
-        return jsonify({'error': 'Repository URL is required'}), 400
 
  
 
@@ -7985,10 +8385,11 @@ def search_api():
 
  
 
+            file_data['sha'] = sha
+            file_unchanged = sha == git_blob_sha(json_content)
 
  
 
-  
 
  
 
@@ -7998,10 +8399,10 @@ def search_api():
 
  
 
+            print(f"File exists, {'already up to date' if file_unchanged else 'updating...'}")
 
  
 
-    api_data_list = find_api_by_repo(repo_url)
 
  
 
@@ -8011,10 +8412,10 @@ def search_api():
 
  
 
+        else:
 
  
 
-  
 
  
 
@@ -8024,10 +8425,10 @@ def search_api():
 
  
 
+            print(f"File doesn't exist, creating new...")
 
  
 
-    if api_data_list:
 
  
 
@@ -8037,10 +8438,10 @@ def search_api():
 
  
 
+      
 
  
 
-        return jsonify({
 
  
 
@@ -8050,10 +8451,24 @@ def search_api():
 
  
 
+        if file_unchanged:
+            # Identical content: no commit; the branch's open PR (if any) already proposes it
+            if open_pr:
+                return jsonify({
+                    'success': True,
+                    'pr_url': open_pr['html_url'],
+                    'pr_number': open_pr['number'],
+                    'branch': branch_name,
+                    'up_to_date': True,
+                    'message': 'APIX metadata is already up to date',
+                    'commit_path': 'rest',
+                    'timings_ms': finish_timings('create_pr', timings, started)
+                })
+        else:
+            file_response, timings['file_put_ms'] = timed(github.put, file_url, json=file_data, headers=headers)
 
  
 
-            'found': True,
 
  
 
@@ -8063,10 +8478,10 @@ def search_api():
 
  
 
+            file_resp_json, file_resp_err = safe_json(file_response, 'file_put')
 
  
 
-            'count': len(api_data_list),
 
  
 
@@ -8076,10 +8491,10 @@ def search_api():
 
  
 
+            if file_resp_err:
 
  
 
-            'data': api_data_list  # Now returns array of APIs
 
  
 
@@ -8089,10 +8504,10 @@ def search_api():
 
  
 
+                return jsonify(file_resp_err), 502
 
  
 
-        })
 
  
 
@@ -8102,10 +8517,10 @@ def search_api():
 
  
 
+            if file_response.status_code not in (200, 201):
 
  
 
-    else:
 
  
 
@@ -8115,10 +8530,10 @@ def search_api():
 
  
 
+                error_msg = file_resp_json.get('message', 'Unknown error') if file_resp_json else 'Unknown'
 
  
 
-        return jsonify({
 
  
 
@@ -8128,10 +8543,10 @@ def search_api():
 
  
 
+                print(f"Failed to create file: {file_response.status_code} - {error_msg}")
 
  
 
-            'found': False,
 
  
 
@@ -8141,10 +8556,10 @@ def search_api():
 
  
 
+                return jsonify({'error': 'Failed to create file', 'status_code': file_response.status_code, 'details': file_resp_json}), 400
 
  
 
-            'message': 'No API data found for this repository'
 
  
 
@@ -8154,10 +8569,10 @@ def search_api():
 
  
 
+      
 
  
 
-        }), 404
 
  
 
@@ -8167,6 +8582,18 @@ def search_api():
 
  
 
+            print(f"File created/updated successfully")
+            if open_pr:
+                # The commit updated the branch's open PR
+                return jsonify({
+                    'success': True,
+                    'pr_url': open_pr['html_url'],
+                    'pr_number': open_pr['number'],
+                    'branch': branch_name,
+                    'pr_created': False,
+                    'commit_path': 'rest',
+                    'timings_ms': finish_timings('create_pr', timings, started)
+                })
 
  
 
@@ -8179,10 +8606,10 @@ def search_api():
 
  
 
+      
 
  
 
-@app.route('/api/generate-json', methods=['POST'])
 
  
 
@@ -8192,10 +8619,10 @@ def search_api():
 
  
 
+        # Create pull request
 
  
 
-def generate_json_endpoint():
 
  
 
@@ -8205,10 +8632,10 @@ def generate_json_endpoint():
 
  
 
+        pr_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls'
 
  
 
-    """Generate APIX JSON file"""
 
  
 
@@ -8218,10 +8645,10 @@ def generate_json_endpoint():
 
  
 
+        pr_data = {
 
  
 
-    data = request.json
 
  
 
@@ -8231,250 +8658,257 @@ def generate_json_endpoint():
 
  
 
+            'title': pr_title,
 
  
 
-    repo_url = data.get('repository_url', '')
 
  
 
 
  
 
+            'body': APIX_PR_BODY,
 
  
 
 
  
 
-  
 
  
 
 
  
 
+            'head': branch_name,
 
  
 
 
  
 
-    if not repo_url:
 
  
 
 
  
 
+            'base': default_branch
 
  
 
 
  
 
-        return jsonify({'error': 'Repository URL is required'}), 400
 
  
 
 
  
 
+        }
 
  
 
 
  
 
-  
 
  
 
 
  
 
+        print(f"Creating pull request from {branch_name} to {default_branch}")
 
  
 
 
  
 
-    api_data = find_api_by_repo(repo_url)
 
  
 
 
  
 
+        pr_response, timings['pr_create_ms'] = timed(github.post, pr_url, json=pr_data, headers=headers)
 
  
 
 
  
 
-  
 
  
 
 
  
 
+        pr_json, pr_err = safe_json(pr_response, 'pr_create')
 
  
 
 
  
 
-    if not api_data:
 
  
 
 
  
 
+        if pr_err:
 
  
 
 
  
 
-        return jsonify({'error': 'No API data found for this repository'}), 404
 
  
 
 
  
 
+            return jsonify(pr_err), 502
 
  
 
 
  
 
-  
 
  
 
 
  
 
+        if pr_response.status_code == 201:
 
  
 
 
  
 
-    try:
 
  
 
 
  
 
+            pr_info = pr_json
 
  
 
 
  
 
-        json_content = validate_and_generate_json(api_data)
 
  
 
 
  
 
+            print(f"PR created successfully: {pr_info['html_url']}")
+            pr_state_store.record(owner, repo, branch_name, True, {
+                'number': pr_info['number'], 'html_url': pr_info['html_url'], 'state': 'open', 'merged': False, 'merged_at': None
+            })
 
  
 
 
  
 
-      
 
  
 
 
  
 
+            return jsonify({
 
  
 
 
  
 
-        return jsonify({
 
  
 
 
  
 
+                'success': True,
 
  
 
 
  
 
-            'json': json_content,
 
  
 
 
  
 
+                'pr_url': pr_info['html_url'],
 
  
 
 
  
 
-            'filename': 'apix-metadata.json'
 
  
 
 
  
 
+                'pr_number': pr_info['number'],
+                'branch': branch_name,
+                'commit_path': 'rest',
+                'timings_ms': finish_timings('create_pr', timings, started)
 
  
 
 
  
 
-        })
 
  
 
 
  
 
+            })
 
  
 
 
  
 
-    except ValueError as e:
 
  
 
 
  
 
+        else:
 
  
 
 
  
 
-        return jsonify({'error': str(e)}), 400
 
  
 
 
  
 
+            error_msg = pr_json.get('message', 'Unknown error') if pr_json else 'Unknown'
 
  
 
@@ -8487,5535 +8921,1189 @@ def generate_json_endpoint():
 
  
 
+            errors = pr_json.get('errors', []) if pr_json else []
 
  
 
 
  
 
-@app.route('/api/validate', methods=['POST'])
 
  
 
 
  
 
+            print(f"Failed to create PR: {pr_response.status_code} - {error_msg}")
 
  
 
 
  
 
-def validate_json():
 
  
 
 
  
 
+            if errors:
 
  
 
 
  
 
-    """Validate JSON against APIX API"""
 
  
 
 
  
 
+                print(f"Errors: {errors}")
 
  
 
 
  
 
-    data = request.json
 
  
 
 
  
 
+            return jsonify({'error': 'Failed to create pull request', 'status_code': pr_response.status_code, 'details': pr_json}), 400
 
  
 
 
  
 
-    json_content = data.get('json_content', '')
 
  
 
 
  
 
+          
 
  
 
 
  
 
-  
 
  
 
 
  
 
+    except GitHubRateLimited as e:
+        return jsonify({'error': str(e), 'retry_after': int(e.wait_seconds) + 1}), 429
+    except DependencyUnavailable as e:
+        return jsonify(e.to_dict()), 503
 
- 
+    except Exception as e:
 
+        return jsonify({'error': str(e)}), 500
 
  
 
-  
 
  
 
+@app.route('/api/create-pr/bulk', methods=['POST'])
+def create_pr_bulk():
+    """
+    Create APIX PRs for many repositories concurrently
+    Request body: { repository_urls: [...] } or { all: true }, optional concurrency
+    JSON is generated from the catalog for each repo. Streams one JSON line per
+    repository as soon as it finishes (application/x-ndjson), then a summary line.
+    """
+    data = request.json or {}
+    github_token = os.environ.get('SERVICE_GITHUB_TOKEN') or os.environ.get('GITHUB_TOKEN') or ''
 
- 
-
+    if not github_token:
+        return jsonify({'error': 'Server is not configured with SERVICE_GITHUB_TOKEN or GITHUB_TOKEN environment variable'}), 500
 
- 
+    catalog = get_catalog()
+    if catalog is None:
+        return jsonify({'error': 'API metadata catalog could not be loaded'}), 500
 
+    repo_urls = catalog_repo_urls(catalog) if data.get('all') else data.get('repository_urls') or []
+    if not repo_urls:
+        return jsonify({'error': 'repository_urls (list) or all=true is required'}), 400
+    # Duplicates would race to write the same branch and PR
+    repo_urls = list(dict.fromkeys(repo_urls))
 
- 
+    try:
+        concurrency = max(1, int(data.get('concurrency', BULK_PR_CONCURRENCY)))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'concurrency must be an integer'}), 400
+
+    headers = {
+        'Authorization': github_auth_header(github_token),
+        'Accept': 'application/vnd.github+json',
+        'User-Agent': 'apix-automation-tool',
+        'X-GitHub-Api-Version': '2022-11-28'
+    }
 
-    if not json_content:
+    # Build every repo's job up front; repos that cannot be generated are reported immediately
+    jobs = []
+    rejected = []
+    for repo_url in repo_urls:
+        try:
+            jobs.append(build_pr_job(repo_url, catalog))
+        except ValueError as e:
+            rejected.append({'repository_url': repo_url, 'success': False, 'error': str(e)})
+
+    print(f"Bulk PR creation: {len(jobs)} repos, concurrency {concurrency}, {len(rejected)} rejected")
+    outcomes = queue.Queue()
+    jobs_by_url = {job['repository_url']: job for job in jobs}
+
+    def on_result(outcome):
+        # Same as the single-PR path: later status checks are answered without polling GitHub
+        if outcome.get('success') and outcome.get('pr_number'):
+            job = jobs_by_url[outcome['repository_url']]
+            pr_state_store.record(job['owner'], job['repo'], job['branch_name'], True, {
+                'number': outcome['pr_number'], 'html_url': outcome['pr_url'], 'state': 'open', 'merged': False, 'merged_at': None
+            })
+        outcomes.put(outcome)
 
- 
+    def run_bulk():
+        summary = {'succeeded': 0, 'failed': 0}
+        try:
+            summary = asyncio.run(create_prs_concurrently(jobs, headers, on_result, concurrency=concurrency))
+        except Exception as e:
+            outcomes.put({'success': False, 'error': f'Bulk PR creation aborted: {str(e)}'})
+        outcomes.put({
+            'summary': True,
+            'total': len(repo_urls),
+            'succeeded': summary['succeeded'],
+            'failed': summary['failed'] + len(rejected)
+        })
+        outcomes.put(None)
 
+    threading.Thread(target=run_bulk, name='apix-bulk-pr', daemon=True).start()
 
- 
+    def generate():
+        for outcome in rejected:
+            yield json.dumps(outcome) + '\n'
+        while True:
+            outcome = outcomes.get()
+            if outcome is None:
+                break
+            yield json.dumps(outcome) + '\n'
 
+    return Response(generate(), mimetype='application/x-ndjson')
 
- 
 
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({'error': f'Upload too large (max {MAX_UPLOAD_BYTES / (1024 * 1024):.1f} MB)', 'max_bytes': MAX_UPLOAD_BYTES}), 413
 
- 
 
-        return jsonify({'error': 'JSON content is required'}), 400
+@app.route('/api/upload-excel', methods=['POST'])
+def upload_excel():
+    """
+    Upload and parse transposed Excel file
+    The file is parsed within the request and all APIs are returned grouped by repository
+    URL, plus the upload_id: the parsed catalog is kept server-side so
+    /api/generate-json-from-upload only needs the id. With offset / limit / sort / fields /
+    summary in the query string the repositories come back as one page of a list instead
+    (see GET /api/uploads/<upload_id>)
+    Clients that opt in with ?async=1 or a Prefer: respond-async header get a 202 with the
+    upload_id right away while the parse runs in the background: progress streams from
+    GET /api/uploads/<upload_id>/events and the parsed repositories are paged from
+    GET /api/uploads/<upload_id> once done (listing parameters are rejected in that mode).
+    UPLOAD_ASYNC_PARSE=false parses within the request even for those clients.
+    A workbook identical to a live upload (same SHA-256) is not parsed again: its upload
+    session (or running parse) is returned with deduplicated: true
+    """
+    parse_async = UPLOAD_ASYNC_PARSE and wants_async_upload(request)
+    listing = None
+    if wants_listing(request.args):
+        if parse_async:
+            return jsonify({'error': 'offset / limit / sort / fields / summary are not supported with async uploads; '
+                                     'page GET /api/uploads/<upload_id> once the parse is done'}), 400
+        try:
+            listing = parse_listing(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
- 
+    try:
+        # Reject oversized uploads before the body is read
+        if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+            return request_too_large(None)
 
+        if 'file' not in request.files:
+            return jsonify({'error': 'No file provided'}), 400
 
- 
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
 
+        if not file.filename.lower().endswith(ALLOWED_UPLOAD_EXTENSIONS):
+            return jsonify({'error': 'Only Excel files (.xlsx, .xls) are supported'}), 400
 
- 
+        content_hash = upload_content_hash(file) if UPLOAD_DEDUPE_ENABLED else None
 
+        # Same bytes as a live upload: answer from its session instead of parsing again
+        session = upload_sessions.find(content_hash) if content_hash else None
+        if session is not None:
+            file.close()
+            print(f"Upload {session['upload_id']}: {file.filename} is identical to {session['filename']}, parse reused")
+            if not parse_async:
+                return jsonify({**upload_response(session, listing), 'deduplicated': True})
+            return jsonify({
+                'upload_id': session['upload_id'],
+                'status': 'done',
+                'deduplicated': True,
+                'total_repos': session['total_repos'],
+                'total_apis': session['total_apis'],
+                'events_url': f"/api/uploads/{session['upload_id']}/events",
+                'result_url': f"/api/uploads/{session['upload_id']}"
+            })
 
- 
+        if parse_async:
+            # An identical workbook still being parsed: follow that parse
+            upload = upload_progress.find_active(content_hash) if content_hash else None
+            deduplicated = upload is not None
+            if deduplicated:
+                file.close()
+                upload_id = upload['upload_id']
+            else:
+                upload_id = upload_progress.start(file.filename, content_hash)
+                UPLOAD_EXECUTOR.submit(parse_upload_in_background, upload_id, detach_upload_stream(file),
+                                       file.filename, content_hash)
+                print(f"Upload {upload_id}: {file.filename} queued for parsing")
+            return jsonify({
+                'upload_id': upload_id,
+                'status': upload['status'] if deduplicated else 'queued',
+                'deduplicated': deduplicated,
+                'events_url': f'/api/uploads/{upload_id}/events',
+                'result_url': f'/api/uploads/{upload_id}'
+            }), 202
+
+        # Parse straight from the spooled upload; the buffer is released even if parsing fails
+        try:
+            grouped_apis = parse_upload(file.stream)
+        finally:
+            file.close()
 
-  
+        if not grouped_apis:
+            return jsonify({'error': 'No valid API data found in Excel file'}), 400
 
- 
+        session = upload_sessions.create(grouped_apis, file.filename, content_hash=content_hash)
+        print(f"Upload session {session['upload_id']}: {session['total_repos']} repositories, {session['total_apis']} APIs")
+        return jsonify({**upload_response(session, listing), 'deduplicated': False})
 
+    except RequestEntityTooLarge as e:
+        return request_too_large(e)
+    except Exception as e:
+        print(f"Error in upload_excel: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
 
- 
 
+def upload_response(session, listing=None):
+    """Synchronous /api/upload-excel body: every repository with its APIs, or one page with a listing"""
+    if listing is not None:
+        return upload_listing(session, listing)
+    return {
+        'upload_id': session['upload_id'],
+        'expires_in': int(upload_sessions.ttl),
+        'total_repos': session['total_repos'],
+        'total_apis': session['total_apis'],
+        'repositories': {
+            repo_url: {'count': len(apis), 'apis': apis}
+            for repo_url, apis in session['repositories'].items()
+        }
+    }
 
- 
 
+def parse_upload_in_background(upload_id, stream, filename, content_hash=None):
+    """Parse a detached upload stream into an upload session, publishing progress events as it goes"""
+    errors = []
 
- 
+    def on_progress(**progress):
+        if 'error' in progress:
+            errors.append(progress['error'])
+        else:
+            upload_progress.publish(upload_id, 'progress', progress, status='parsing')
 
     try:
+        grouped_apis = parse_upload(stream, on_progress=on_progress)
+    except Exception as e:
+        print(f"Error parsing upload {upload_id}: {e}")
+        errors.append(str(e))
+        grouped_apis = None
+    finally:
+        stream.close()
+
+    if not grouped_apis:
+        error = f"Failed to parse Excel file: {errors[-1]}" if errors else 'No valid API data found in Excel file'
+        upload_progress.publish(upload_id, 'failed', {'error': error}, status='failed')
+        return
+
+    session = upload_sessions.create(grouped_apis, filename, upload_id=upload_id, content_hash=content_hash)
+    print(f"Upload session {upload_id}: {session['total_repos']} repositories, {session['total_apis']} APIs")
+    upload_progress.publish(upload_id, 'done', {
+        'total_repos': session['total_repos'],
+        'total_apis': session['total_apis'],
+        'result_url': f'/api/uploads/{upload_id}'
+    }, status='done')
+
+
+def upload_listing(session, listing):
+    """
+    One page of an upload session's repositories (sortable by repository_url or count),
+    with each repository's APIs projected to listing['fields']; summary lists counts only
+    """
+    repositories = [
+        {'repository_url': repo_url, 'count': len(apis), 'apis': apis}
+        for repo_url, apis in session['repositories'].items()
+    ]
+    page, page_meta = paginate(repositories, listing)
+    if listing['summary']:
+        page = [{'repository_url': repo['repository_url'], 'count': repo['count']} for repo in page]
+    else:
+        page = [{**repo, 'apis': [project(api, listing['fields']) for api in repo['apis']]} for repo in page]
+    return {
+        'upload_id': session['upload_id'],
+        'expires_in': int(upload_sessions.ttl),
+        'total_repos': session['total_repos'],
+        'total_apis': session['total_apis'],
+        'repositories': page,
+        'page': page_meta
+    }
 
- 
 
+def upload_json_result(repo_url, apis):
+    return {
+        'json': validate_and_generate_json(apis),
+        'filename': 'apix-metadata.json',
+        'repository_url': repo_url,
+        'api_count': len(apis)
+    }
 
- 
 
+@app.route('/api/generate-json-from-upload', methods=['POST'])
+def generate_json_from_upload():
+    """
+    Generate JSON from uploaded data
+    Request body: { upload_id, repository_url } for one repository of an upload session,
+    { upload_id, all: true } for every repository in it (results + per-repo errors),
+    or (legacy) { repository_url, apis: [...] } with the APIs sent back by the client
+    """
+    try:
+        data = request.json or {}
+        repo_url = data.get('repository_url')
+        upload_id = data.get('upload_id')
+
+        if not upload_id:
+            apis = data.get('apis', [])
+            if not repo_url or not apis:
+                return jsonify({'error': 'upload_id (with repository_url or all) or repository_url and apis are required'}), 400
+            # Generate JSON for these APIs
+            return jsonify(upload_json_result(repo_url, apis))
+
+        session = upload_sessions.get(upload_id)
+        if session is None:
+            return jsonify({'error': 'Upload session not found or expired - please upload the Excel file again'}), 404
+        repositories = session['repositories']
+
+        if data.get('all'):
+            results, errors = [], []
+            for url, apis in repositories.items():
+                try:
+                    results.append(upload_json_result(url, apis))
+                except ValueError as e:
+                    errors.append({'repository_url': url, 'error': str(e)})
+            return jsonify({'upload_id': upload_id, 'total_repos': len(repositories), 'results': results, 'errors': errors})
+
+        if not repo_url:
+            return jsonify({'error': 'repository_url or all=true is required with upload_id'}), 400
+        apis = repositories.get(normalize_repo_url(repo_url))
+        if not apis:
+            return jsonify({'error': f'Repository {repo_url} is not in upload {upload_id}'}), 404
+        return jsonify({**upload_json_result(repo_url, apis), 'upload_id': upload_id})
 
- 
+    except ValueError as e:
+        print(f"Error generating JSON: {e}")
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"Error generating JSON: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
 
 
- 
+@app.route('/api/uploads', methods=['GET'])
+def upload_session_stats():
+    """Upload session store and background parse statistics"""
+    return jsonify({**upload_sessions.metrics(), 'parses': upload_progress.metrics()})
 
-        # Validation API endpoint (external). TODO: move Authorization to ENV.
 
- 
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload_session(upload_id):
+    """
+    A page of an upload session (offset, limit, sort, fields, summary as in /api/upload-excel)
+    While the upload is still being parsed: 202 with its status and latest progress
+    """
+    session = upload_sessions.get(upload_id)
+    if session is None:
+        upload = upload_progress.get(upload_id)
+        if upload and upload['status'] == 'failed':
+            return jsonify({'upload_id': upload_id, 'status': 'failed', 'error': upload['error']}), 400
+        if upload and upload['status'] != 'done':
+            return jsonify({
+                'upload_id': upload_id,
+                'status': upload['status'],
+                'progress': upload['progress'],
+                'events_url': f'/api/uploads/{upload_id}/events'
+            }), 202
+        return jsonify({'error': 'Upload session not found or expired - please upload the Excel file again'}), 404
+    try:
+        listing = parse_listing(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(upload_listing(session, listing))
 
 
- 
+@app.route('/api/uploads/<upload_id>/events', methods=['GET'])
+def upload_events(upload_id):
+    """
+    Server-Sent Events stream of an upload's parse: queued, progress (sheet, sheets_processed,
+    sheets_total, apis_found), then done (total_repos, total_apis, result_url) or failed (error).
+    Reconnecting with Last-Event-ID (or ?after=<id>) resumes after that event.
+    """
+    if upload_progress.get(upload_id) is None:
+        session = upload_sessions.get(upload_id)
+        if session is None:
+            return jsonify({'error': 'Upload not found or expired'}), 404
+        # Parse finished long ago (or was reused): the stream is just its outcome
+        done = {'upload_id': upload_id, 'status': 'done', 'total_repos': session['total_repos'],
+                'total_apis': session['total_apis'], 'result_url': f'/api/uploads/{upload_id}'}
+        return Response(f"event: done\ndata: {json.dumps(done)}\n\n", mimetype='text/event-stream')
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after') or 0)
+    except ValueError:
+        after = 0
+
+    def generate():
+        last_id = after
+        while True:
+            polled = upload_progress.events(upload_id, last_id, UPLOAD_EVENTS_KEEPALIVE)
+            if polled is None:
+                return
+            events, finished = polled
+            if not events and not finished:
+                yield ': keep-alive\n\n'
+                continue
+            for event in events:
+                last_id = event['id']
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+            if finished:
+                return
 
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
- 
 
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+def delete_upload_session(upload_id):
+    """Drop an upload session once the client is done with it"""
+    if not upload_sessions.delete(upload_id):
+        return jsonify({'error': 'Upload session not found'}), 404
+    return jsonify({'deleted': upload_id})
 
- 
 
-        validation_url = 'https://dev.apix.uk.hsbc/api/v1/validate/apis'
+def build_pr_status(branch_exists, pr=None):
+    """
+    Response body of /api/check-pr-status
+    pr: latest PR for the apix branch in REST shape (number, html_url, state, merged, merged_at)
+    """
+    if not branch_exists:
+        # If branch doesn't exist, treat as no PR regardless of PR history
+        return {
+            'pr_exists': False,
+            'is_merged': False,
+            'branch_exists': False,
+            'is_approved': False,
+            'message': 'No active branch found. Please create a new PR.',
+            'can_publish': False
+        }
 
- 
+    if not pr:
+        return {
+            'pr_exists': False,
+            'is_merged': False,
+            'branch_exists': True,
+            'is_approved': False,
+            'message': 'No PR found for this repository. Please create a PR first.',
+            'can_publish': False
+        }
 
+    pr_number = pr['number']
+    is_merged = bool(pr.get('merged', False))
+    pr_status = {
+        'pr_exists': True,
+        'pr_number': pr_number,
+        'pr_url': pr['html_url'],
+        'pr_state': pr['state'],
+        'is_merged': is_merged,
+        'merged_at': pr.get('merged_at'),
+        'branch_exists': True,
+        'can_publish': False,
+        'message': ''
+    }
 
- 
+    if is_merged:
+        pr_status['can_publish'] = True
+        pr_status['message'] = f'✅ PR #{pr_number} has been merged! You can now publish.'
+    elif pr['state'] == 'open':
+        pr_status['message'] = f'⏳ PR #{pr_number} is still open. Waiting for approval and merge.'
+    elif pr['state'] == 'closed' and not is_merged:
+        pr_status['message'] = f'❌ PR #{pr_number} was closed without merging. Please create a new PR.'
 
+    return pr_status
 
- 
 
+def get_pr_status(repo_url, api_data_list=None):
+    """
+    Check if the PR for a repository has been merged (service behind /api/check-pr-status)
+    Pass the repo's already loaded catalog records to skip the lookup.
+    Returns (response dict, HTTP status code)
+    """
+    # GitHub token from environment
+    github_token = os.environ.get('SERVICE_GITHUB_TOKEN') or os.environ.get('GITHUB_TOKEN') or ''
+    if not github_token:
+        return {'error': 'Server is not configured with GitHub token'}, 500
 
- 
+    try:
+        started = time.perf_counter()
+        timings = {}
 
+        # Parse repository owner and name from URL
+        parts = repo_url.rstrip('/').split('/')
+        owner = parts[-2]
+        repo = parts[-1].replace('.git', '')
 
- 
+        # Get API data to determine EIM ID for branch naming (in-memory catalog)
+        if api_data_list is None:
+            api_data_list, timings['catalog_lookup_ms'] = latency_stats.measure('check_pr_status.catalog_lookup', find_api_by_repo, repo_url)
+        if not api_data_list:
+            return {'error': 'No API data found for this repository'}, 404
 
+        # Same branch naming as create_pr
+        branch_name = apix_branch_name(api_data_list)
 
- 
+        # Answer from the webhook-fed state store while it is fresh
+        known_state = pr_state_store.get(owner, repo, branch_name)
+        if known_state:
+            print(f"PR state for {owner}/{repo}:{branch_name} served from {known_state['source']} state")
+            latency_stats.record('check_pr_status.total', round((time.perf_counter() - started) * 1000, 1))
+            return {**build_pr_status(known_state['branch_exists'], known_state['pr']), 'state_source': known_state['source']}, 200
 
+        # Setup headers
+        auth_header = github_auth_header(github_token)
+        headers = {
+            'Authorization': auth_header,
+            'Accept': 'application/vnd.github+json',
+            'User-Agent': 'apix-automation-tool',
+            'X-GitHub-Api-Version': '2022-11-28'
+        }
 
- 
-
-
- 
-
-        headers = {
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'Content-Type': 'application/json',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'Accept': 'application/json',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'Invocation-Source': 'CD_ABC',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            # WARNING: hard-coded token; replace with ENV var and never commit real secrets.
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'Authorization': os.environ.get('APIX_VALIDATION_TOKEN', 'REPLACE_ME')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        }
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"Validating JSON against: {validation_url}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Parse JSON string to dict for validation
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        try:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            json_data = json.loads(json_content) if isinstance(json_content, str) else json_content
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        except json.JSONDecodeError as je:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'Provided json_content is not valid JSON', 'detail': str(je), 'offset': je.pos}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        def safe_json(resp):
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            try:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                return resp.json(), None
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            except ValueError as ve:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                sample = (resp.text or '')[:400]
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                return None, {
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'error': 'Non-JSON response from validation service',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'status_code': resp.status_code,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'content_type': resp.headers.get('Content-Type'),
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'body_sample': sample,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'exception': str(ve)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                }
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        response = requests.post(
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            validation_url,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            json=json_data,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            headers=headers,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            proxies=PROXIES if PROXIES else None,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            verify=SSL_VERIFY,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            timeout=30
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        )
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        body_json, body_err = safe_json(response)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if body_err:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify(body_err), 502
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if response.status_code == 200:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'valid': True,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'message': 'JSON validation successful',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'details': body_json
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            })
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        else:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'valid': False,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'message': 'JSON validation failed',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'status_code': response.status_code,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'errors': body_json
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            }), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-          
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    except requests.exceptions.RequestException as e:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify({'error': f'Validation API request failed: {str(e)}'}), 500
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    except json.JSONDecodeError as e:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify({'error': f'Invalid JSON format: {str(e)}'}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    except Exception as e:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify({'error': str(e)}), 500
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-@app.route('/api/create-pr', methods=['POST'])
-
-
- 
-
-
- 
-
-
- 
-
-def create_pr():
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    """Create a pull request with the APIX JSON file"""
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    data = request.json
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    repo_url = data.get('repository_url', '')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    json_content = data.get('json_content', '')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    # GitHub token now sourced from environment (service account) instead of request body
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    github_token = os.environ.get('SERVICE_GITHUB_TOKEN') or os.environ.get('GITHUB_TOKEN') or ''
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    if not all([repo_url, json_content]):
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify({'error': 'Missing required fields (repository_url, json_content)'}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    if not github_token:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify({'error': 'Server is not configured with SERVICE_GITHUB_TOKEN or GITHUB_TOKEN environment variable'}), 500
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-  
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    try:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Parse repository owner and name from URL
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Example: https://github.com/owner/repo or https://github.company.com/owner/repo
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        parts = repo_url.rstrip('/').split('/')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        owner = parts[-2]
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        repo = parts[-1].replace('.git', '')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Support both old (token) and new (Bearer) GitHub auth formats
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        auth_header = f'Bearer {github_token}' if github_token.startswith('ghp_') or github_token.startswith('github_pat_') else f'token {github_token}'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        headers = {
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'Authorization': auth_header,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            # Use vendor-specific accept plus fallback behavior
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'Accept': 'application/vnd.github.v3+json',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'User-Agent': 'apix-automation-tool',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'X-GitHub-Api-Version': '2022-11-28'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        }
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"Using auth format: {auth_header.split()[0]} (env token)")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Detect if user accidentally supplied YAML instead of JSON and convert
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        def attempt_yaml_to_json(text):
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            import yaml as _yaml
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            try:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                # Quick heuristic: Presence of ':' line separators without braces
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                if isinstance(text, str) and ('\n' in text or ':' in text) and not text.strip().startswith('{'):
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    loaded = _yaml.safe_load(text)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    if isinstance(loaded, dict) or isinstance(loaded, list):
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                        return json.dumps(loaded, indent=2), True, None
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                return text, False, None
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            except Exception as _e:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                return text, False, str(_e)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        converted_content, was_yaml, yaml_error = attempt_yaml_to_json(json_content)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if yaml_error:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            print(f"YAML parse attempt failed (ignored): {yaml_error}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if was_yaml:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            print("Detected YAML input; converted to JSON before commit.")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            json_content = converted_content
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Validate that json_content is valid JSON now
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        try:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            parsed_json = json.loads(json_content)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        except json.JSONDecodeError as je:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'json_content is not valid JSON after optional YAML conversion', 'detail': str(je), 'offset': je.pos}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Get default branch
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        repo_info_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"Fetching repo info: {repo_info_url}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        def safe_json(resp, phase):
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            try:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                return resp.json(), None
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            except ValueError as ve:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                sample = (resp.text or '')[:400]
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                return None, {
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'error': 'Non-JSON response',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'phase': phase,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'status_code': resp.status_code,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'content_type': resp.headers.get('Content-Type'),
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'body_sample': sample,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                    'exception': str(ve)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                }
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        repo_response = requests.get(
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            repo_info_url,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            headers=headers,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            proxies=PROXIES if PROXIES else None,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            verify=SSL_VERIFY
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        )
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        repo_json, repo_err = safe_json(repo_response, 'repo_info')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if repo_err:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify(repo_err), 502
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if repo_response.status_code != 200:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            error_msg = repo_json.get('message', 'Unknown error') if repo_json else 'Unknown'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            print(f"Failed to access repo: {repo_response.status_code} - {error_msg}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'Failed to access repository', 'status_code': repo_response.status_code, 'details': repo_json}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        default_branch = repo_json.get('default_branch')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"Default branch: {default_branch}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Get the SHA of the default branch
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        ref_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/git/refs/heads/{default_branch}'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        ref_response = requests.get(ref_url, headers=headers, proxies=PROXIES if PROXIES else None, verify=SSL_VERIFY)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        ref_json, ref_err = safe_json(ref_response, 'ref_lookup')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if ref_err:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify(ref_err), 502
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if ref_response.status_code != 200:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            error_msg = ref_json.get('message', 'Unknown error') if ref_json else 'Unknown'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            print(f"Failed to get branch ref: {ref_response.status_code} - {error_msg}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'Failed to get branch reference', 'status_code': ref_response.status_code, 'details': ref_json}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        try:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            base_sha = ref_json['object']['sha']
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        except Exception:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'object.sha missing in ref response', 'ref_json': ref_json}), 502
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"Base SHA: {base_sha}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Get API data to determine EIM ID for branch naming
-
- 
-
-
- 
-
-        api_data_list = find_api_by_repo(repo_url)
-
- 
-
-
- 
-
-        if api_data_list:
-
- 
-
-
- 
-
-            # Use first API's EIM ID for branch naming
-
- 
-
-
- 
-
-            first_api = api_data_list[0] if isinstance(api_data_list, list) else api_data_list
-
- 
-
-
- 
-
-            eim_id = first_api.get('eim_id', 'unknown-eim')
-
- 
-
-
- 
-
-            # Clean EIM ID for branch naming (remove special chars, lowercase)
-
- 
-
-
- 
-
-            clean_eim_id = re.sub(r'[^a-zA-Z0-9-]', '', str(eim_id).lower())
-
- 
-
-
- 
-
-            branch_name = f'apix_{clean_eim_id}'
-
- 
-
-            print(f"Using EIM ID: {eim_id} -> branch: {branch_name}")
-
-           
-
-            # Special validation for WDP repo
-
-            if str(eim_id) == WDP_EIM_ID:
-
-                print(f"WDP repo detected (EIM ID: {eim_id}), will add  JIRA ID to commit message")
-
- 
-
-
- 
-
-        else:
-
- 
-
-            # Fallback to timestamp if no API data found
-
- 
-
-            branch_name = f'apix-metadata-{datetime.now().strftime("%Y%m%d-%H%M%S")}'
-
- 
-
-            print(f"No API data found, using timestamp branch: {branch_name}")
-
- 
-
-        # Create a new branch
-
-        # First, check if the branch already exists so we can reuse it
-
-        existing_branch_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/git/refs/heads/{branch_name}'
-
-        existing_branch_response = requests.get(
-
-            existing_branch_url,
-
-            headers=headers,
-
-            proxies=PROXIES if PROXIES else None,
-
-            verify=SSL_VERIFY
-
-        )
-
- 
-
-        if existing_branch_response.status_code == 200:
-
-            # Branch already exists – reuse it instead of trying to create again
-
-            print(f"Branch already exists, reusing: {branch_name}")
-
-        else:
-
-            # Only attempt to create the branch if it does not already exist
-
-            create_branch_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/git/refs'
-
- 
-
-            branch_data = {
-
- 
-
-                'ref': f'refs/heads/{branch_name}',
-
- 
-
-                'sha': base_sha
-
- 
-
-            }
-
- 
-
-            print(f"Creating branch: {branch_name}")
-
- 
-
-            branch_response = requests.post(create_branch_url, json=branch_data, headers=headers, proxies=PROXIES if PROXIES else None, verify=SSL_VERIFY)
-
- 
-
-            branch_json, branch_err = safe_json(branch_response, 'branch_create')
-
- 
-
-            if branch_err:
-
- 
-
-                return jsonify(branch_err), 502
-
- 
-
-            if branch_response.status_code not in (200, 201):
-
- 
-
-                error_msg = branch_json.get('message', 'Unknown error') if branch_json else 'Unknown'
-
- 
-
-                # If GitHub reports that the reference already exists, treat it as a non-fatal condition
-
-                if branch_response.status_code == 422 and 'Reference already exists' in str(error_msg):
-
-                    print(f"Branch {branch_name} already exists according to GitHub; continuing with existing branch")
-
-                else:
-
-                    print(f"Failed to create branch: {branch_response.status_code} - {error_msg}")
-
- 
-
-                    return jsonify({'error': 'Failed to create branch', 'status_code': branch_response.status_code, 'details': branch_json}), 400
-
- 
-
-            print(f"Branch created successfully: {branch_name}")
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Create or update the file
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        file_path = 'apix-metadata.json'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        file_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/contents/{file_path}'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Check if file exists
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        file_check = requests.get(f'{file_url}?ref={branch_name}', headers=headers, proxies=PROXIES if PROXIES else None, verify=SSL_VERIFY)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        file_check_json, file_check_err = safe_json(file_check, 'file_check')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Create commit message with WDP JIRA ID if needed
-
-        commit_message = 'Add APIX metadata JSON file for API audit'
-
-       
-
-        # Check if this is WDP repo and add JIRA ID
-
-        if api_data_list:
-
-            first_api = api_data_list[0] if isinstance(api_data_list, list) else api_data_list
-
-            eim_id = first_api.get('eim_id', 'unknown-eim')
-
-            if str(eim_id) == WDP_EIM_ID:
-
-                commit_message = f'{WDP_JIRA_ID}: Add APIX metadata JSON file for API audit'
-
-                print(f"Using WDP JIRA ID in commit message for EIM ID: {eim_id}")
-
- 
-
-        file_data = {
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'message': commit_message,
-
- 
-
-
- 
-
-
- 
-
-            'content': base64.b64encode(json_content.encode()).decode(),
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'branch': branch_name,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            # Add committer info optionally (GitHub may attribute to token user automatically)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        }
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if file_check.status_code == 200 and not file_check_err:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            sha = file_check_json.get('sha') if file_check_json else None
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            if not sha:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                return jsonify({'error': 'Missing sha in existing file response', 'details': file_check_json}), 502
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            file_data['sha'] = sha
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            print(f"File exists, updating...")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        else:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            print(f"File doesn't exist, creating new...")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        file_response = requests.put(file_url, json=file_data, headers=headers, proxies=PROXIES if PROXIES else None, verify=SSL_VERIFY)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        file_resp_json, file_resp_err = safe_json(file_response, 'file_put')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if file_resp_err:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify(file_resp_err), 502
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if file_response.status_code not in (200, 201):
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            error_msg = file_resp_json.get('message', 'Unknown error') if file_resp_json else 'Unknown'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            print(f"Failed to create file: {file_response.status_code} - {error_msg}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'Failed to create file', 'status_code': file_response.status_code, 'details': file_resp_json}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"File created/updated successfully")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Create pull request
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        pr_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Create PR title with WDP JIRA ID if needed
-
-        pr_title = 'Add APIX metadata JSON file'
-
-        if api_data_list:
-
-            first_api = api_data_list[0] if isinstance(api_data_list, list) else api_data_list
-
-            eim_id = first_api.get('eim_id', 'unknown-eim')
-
-            if str(eim_id) == WDP_EIM_ID:
-
-                pr_title = f'{WDP_JIRA_ID}: Add APIX metadata JSON file'
-
- 
-
-        pr_data = {
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'title': pr_title,
-
- 
-
-
- 
-
-
- 
-
-            'body': 'This PR adds the APIX metadata JSON file for API repository audit.\n\nGenerated automatically by APIX Automation Tool.\n\nFile: `apix-metadata.json`',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'head': branch_name,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'base': default_branch
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        }
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"Creating pull request from {branch_name} to {default_branch}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        pr_response = requests.post(pr_url, json=pr_data, headers=headers, proxies=PROXIES if PROXIES else None, verify=SSL_VERIFY)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        pr_json, pr_err = safe_json(pr_response, 'pr_create')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if pr_err:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify(pr_err), 502
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if pr_response.status_code == 201:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            pr_info = pr_json
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            print(f"PR created successfully: {pr_info['html_url']}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'success': True,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'pr_url': pr_info['html_url'],
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'pr_number': pr_info['number']
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            })
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        else:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            error_msg = pr_json.get('message', 'Unknown error') if pr_json else 'Unknown'
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            errors = pr_json.get('errors', []) if pr_json else []
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            print(f"Failed to create PR: {pr_response.status_code} - {error_msg}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            if errors:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                print(f"Errors: {errors}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'Failed to create pull request', 'status_code': pr_response.status_code, 'details': pr_json}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-          
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    except Exception as e:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify({'error': str(e)}), 500
-
- 
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-@app.route('/api/upload-excel', methods=['POST'])
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-def upload_excel():
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    """
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    Upload and parse transposed Excel file
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    Returns all APIs grouped by repository URL
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    """
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    try:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if 'file' not in request.files:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'No file provided'}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        file = request.files['file']
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if file.filename == '':
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'No file selected'}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if not file.filename.endswith(('.xlsx', '.xls')):
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'Only Excel files (.xlsx, .xls) are supported'}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Save temporarily
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        temp_path = os.path.join('/tmp', f'upload_{datetime.now().timestamp()}.xlsx')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        file.save(temp_path)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"Uploaded file saved to: {temp_path}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Parse the transposed Excel
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        grouped_apis = parse_transposed_excel(temp_path)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Clean up temp file
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        os.remove(temp_path)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if not grouped_apis:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'No valid API data found in Excel file'}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Convert to response format
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        result = {
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'total_repos': len(grouped_apis),
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'total_apis': sum(len(apis) for apis in grouped_apis.values()),
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'repositories': {}
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        }
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        for repo_url, apis in grouped_apis.items():
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            result['repositories'][repo_url] = {
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'count': len(apis),
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-                'apis': apis
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            }
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify(result)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    except Exception as e:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"Error in upload_excel: {e}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        import traceback
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        traceback.print_exc()
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify({'error': str(e)}), 500
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-@app.route('/api/generate-json-from-upload', methods=['POST'])
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-def generate_json_from_upload():
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    """
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    Generate JSON for a specific repository from uploaded data
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    Request body: { repository_url: string, apis: [...] }
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    """
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    try:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        data = request.json
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        repo_url = data.get('repository_url')
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        apis = data.get('apis', [])
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        if not repo_url or not apis:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            return jsonify({'error': 'repository_url and apis are required'}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        # Generate JSON for these APIs
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        json_content = validate_and_generate_json(apis)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify({
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'json': json_content,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'filename': 'apix-metadata.json',
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'repository_url': repo_url,
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-            'api_count': len(apis)
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        })
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-      
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    except ValueError as e:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"Error generating JSON: {e}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify({'error': str(e)}), 400
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-    except Exception as e:
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        print(f"Error generating JSON: {e}")
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        import traceback
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        traceback.print_exc()
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-        return jsonify({'error': str(e)}), 500
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-
- 
-
-@app.route('/api/check-pr-status', methods=['POST'])
-
- 
-
-def check_pr_status():
-
- 
-
-    """Check if PR for a repository has been merged"""
-
- 
-
-    data = request.json
-
- 
-
-    repo_url = data.get('repository_url', '')
-
- 
-
-  
-
- 
-
-    if not repo_url:
-
- 
-
-        return jsonify({'error': 'Repository URL is required'}), 400
-
- 
-
-  
-
- 
-
-    # GitHub token from environment
-
- 
-
-    github_token = os.environ.get('SERVICE_GITHUB_TOKEN') or os.environ.get('GITHUB_TOKEN') or ''
-
- 
-
-  
-
- 
-
-    if not github_token:
-
- 
-
-        return jsonify({'error': 'Server is not configured with GitHub token'}), 500
-
- 
-
-  
-
- 
-
-    try:
-
- 
-
-        # Parse repository owner and name from URL
-
- 
-
-        parts = repo_url.rstrip('/').split('/')
-
- 
-
-        owner = parts[-2]
-
- 
-
-        repo = parts[-1].replace('.git', '')
-
- 
-
-      
-
- 
-
-        # Get API data to determine EIM ID for branch naming
-
- 
-
-        api_data_list = find_api_by_repo(repo_url)
-
- 
-
-        if not api_data_list:
-
- 
-
-            return jsonify({'error': 'No API data found for this repository'}), 404
-
- 
-
-      
-
- 
-
-        # Use first API's EIM ID for branch naming (same logic as create_pr)
-
- 
-
-        first_api = api_data_list[0] if isinstance(api_data_list, list) else api_data_list
-
- 
-
-        eim_id = first_api.get('eim_id', 'unknown-eim')
-
- 
-
-        clean_eim_id = re.sub(r'[^a-zA-Z0-9-]', '', str(eim_id).lower())
-
- 
-
-        branch_name = f'apix_{clean_eim_id}'
-
- 
-
-      
-
- 
-
-        # Setup headers
-
- 
-
-        auth_header = f'Bearer {github_token}' if github_token.startswith('ghp_') or github_token.startswith('github_pat_') else f'token {github_token}'
-
- 
-
-        headers = {
-
- 
-
-            'Authorization': auth_header,
-
- 
-
-            'Accept': 'application/vnd.github+json',
-
- 
-
-            'User-Agent': 'apix-automation-tool',
-
- 
-
-            'X-GitHub-Api-Version': '2022-11-28'
-
- 
-
-        }
-
- 
-
-      
-
- 
-
-        # First, check if the branch actually exists in the repository
-
-        branch_check_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/git/refs/heads/{branch_name}'
-
-        branch_response = requests.get(
-
-            branch_check_url,
-
-            headers=headers,
-
-            proxies=PROXIES if PROXIES else None,
-
-            verify=SSL_VERIFY
-
-        )
-
-       
-
-        branch_exists = branch_response.status_code == 200
-
-        print(f"Branch {branch_name} exists: {branch_exists}")
-
-       
-
-        # If branch doesn't exist, treat as no PR regardless of PR history
-
-        if not branch_exists:
-
-            return jsonify({
-
-                'pr_exists': False,
-
-                'is_merged': False,
-
-                'branch_exists': False,
-
-                'is_approved': False,
-
-                'message': 'No active branch found. Please create a new PR.',
-
-                'can_publish': False
-
-            })
-
- 
-
-        # Search for PRs from our branch
-
- 
-
-        pr_search_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls'
-
- 
-
-        pr_params = {
-
- 
-
-            'head': f'{owner}:{branch_name}',
-
- 
-
-            'state': 'all'  # Include both open and closed PRs
-
- 
-
-        }
-
- 
-
-      
-
- 
-
-        pr_response = requests.get(
-
- 
-
-            pr_search_url,
-
- 
-
-            headers=headers,
-
- 
-
-            params=pr_params,
-
- 
-
-            proxies=PROXIES if PROXIES else None,
-
- 
-
-            verify=SSL_VERIFY
-
- 
-
-        )
-
- 
-
-      
-
- 
-
-        if pr_response.status_code != 200:
-
- 
-
-            return jsonify({
-
- 
-
-                'error': 'Failed to fetch PR information',
-
- 
-
-                'status_code': pr_response.status_code
-
- 
-
-            }), 400
-
- 
-
-      
-
- 
-
-        prs = pr_response.json()
-
- 
-
-      
-
- 
-
-        if not prs:
-
- 
-
-            return jsonify({
-
- 
-
-                'pr_exists': False,
-
- 
-
-                'is_merged': False,
-
- 
-
-                'branch_exists': True,
-
- 
-
-                'is_approved': False,
-
- 
-
-                'message': 'No PR found for this repository. Please create a PR first.',
-
- 
-
-                'can_publish': False
-
- 
-
-            })
-
- 
-
-      
-
- 
-
-        # Get the most recent PR
-
- 
-
-        latest_pr = prs[0]
-
- 
-
-        pr_number = latest_pr['number']
-
- 
-
-      
-
- 
-
-        # For closed PRs, we need to check the specific PR details to get accurate merge status
-
- 
-
-        # GitHub's PR list API doesn't always include the 'merged' field accurately
-
- 
-
-        if latest_pr['state'] == 'closed':
-
- 
-
-            pr_detail_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls/{pr_number}'
-
- 
-
-            print(f"Checking detailed PR info: {pr_detail_url}")
-
- 
-
-          
-
- 
-
-            pr_detail_response = requests.get(
-
- 
-
-                pr_detail_url,
-
- 
-
-                headers=headers,
-
- 
-
-                proxies=PROXIES if PROXIES else None,
-
- 
-
-                verify=SSL_VERIFY
-
- 
-
-            )
-
- 
-
-          
-
- 
-
-            if pr_detail_response.status_code == 200:
-
- 
-
-                pr_details = pr_detail_response.json()
-
- 
-
-                is_merged = pr_details.get('merged', False)
-
- 
-
-                merged_at = pr_details.get('merged_at')
-
- 
-
-                print(f"PR #{pr_number} detailed check - Merged: {is_merged}, Merged at: {merged_at}")
-
- 
-
-            else:
-
- 
-
-                print(f"Failed to get PR details, using list data. Status: {pr_detail_response.status_code}")
-
- 
-
-                # Fallback to the list response data
-
- 
-
-                is_merged = latest_pr.get('merged', False)
-
- 
-
-                merged_at = latest_pr.get('merged_at')
-
- 
-
-        else:
-
- 
-
-            is_merged = latest_pr.get('merged', False)
-
- 
-
-            merged_at = latest_pr.get('merged_at')
-
- 
-
-      
-
- 
-
-        pr_status = {
-
- 
-
-            'pr_exists': True,
-
- 
-
-            'pr_number': pr_number,
-
- 
-
-            'pr_url': latest_pr['html_url'],
-
- 
-
-            'pr_state': latest_pr['state'],
-
- 
-
-            'is_merged': is_merged,
-
- 
-
-            'merged_at': merged_at,
-
- 
-
-            'branch_exists': True,
-
- 
-
-            'can_publish': False,
-
- 
-
-            'message': ''
-
- 
-
-        }
-
- 
-
-      
-
- 
-
-        print(f"Final PR status - PR #{pr_number}, State: {latest_pr['state']}, Merged: {is_merged}")
-
- 
-
-      
-
- 
-
-        if is_merged:
-
- 
-
-            pr_status['can_publish'] = True
-
- 
-
-            pr_status['message'] = f'✅ PR #{pr_number} has been merged! You can now publish.'
-
- 
-
-        elif latest_pr['state'] == 'open':
-
- 
-
-            pr_status['message'] = f'⏳ PR #{pr_number} is still open. Waiting for approval and merge.'
-
- 
-
-        elif latest_pr['state'] == 'closed' and not is_merged:
-
- 
-
-            pr_status['message'] = f'❌ PR #{pr_number} was closed without merging. Please create a new PR.'
-
- 
-
-      
-
- 
-
-        return jsonify(pr_status)
-
- 
-
-      
-
- 
-
-    except Exception as e:
-
- 
-
-        return jsonify({'error': str(e)}), 500
-
- 
-
-
- 
-
-@app.route('/api/publish', methods=['POST'])
-
- 
-
-def publish_api():
-
- 
-
-    """Publish API metadata (placeholder for actual publish logic)"""
-
- 
-
-    data = request.json
-
- 
-
-    repo_url = data.get('repository_url', '')
-
- 
-
-  
-
- 
-
-    if not repo_url:
-
- 
-
-        return jsonify({'error': 'Repository URL is required'}), 400
-
- 
-
-  
-
- 
-
-    try:
-
- 
-
-        # First check if PR is merged by calling the check function directly
-
- 
-
-        # We need to create a mock request object for the check function
-
- 
-
-        from flask import Flask
-
- 
-
-        with app.test_request_context(json={'repository_url': repo_url}):
-
- 
-
-            pr_status_response = check_pr_status()
-
- 
-
-            if isinstance(pr_status_response, tuple):
-
- 
-
-                pr_status_data = pr_status_response[0].get_json()
-
- 
-
-            else:
-
- 
-
-                pr_status_data = pr_status_response.get_json()
-
- 
-
-      
-
- 
-
-        if not pr_status_data.get('can_publish', False):
-
- 
-
-            return jsonify({
-
- 
-
-                'error': 'Cannot publish: PR not merged yet',
-
- 
-
-                'message': pr_status_data.get('message', 'PR status unknown')
-
- 
-
-            }), 400
-
- 
-
-      
+        # Branch check and PR search are independent: run them concurrently
+        branch_check_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/git/refs/heads/{branch_name}'
+        pr_search_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls'
+        pr_params = {
+            'head': f'{owner}:{branch_name}',
+            'state': 'all'  # Include both open and closed PRs
+        }
+        branch_future = IO_EXECUTOR.submit(latency_stats.measure, 'check_pr_status.branch_ref', github.get, branch_check_url, headers=headers)
+        pr_future = IO_EXECUTOR.submit(latency_stats.measure, 'check_pr_status.pulls_list', github.get, pr_search_url, headers=headers, params=pr_params)
 
- 
+        branch_response, timings['branch_ref_ms'] = branch_future.result()
+        pr_response, timings['pulls_list_ms'] = pr_future.result()
 
-        # Get API data
+        branch_exists = branch_response.status_code == 200
+        print(f"Branch {branch_name} exists: {branch_exists}")
 
- 
+        # If branch doesn't exist, treat as no PR regardless of PR history
+        if not branch_exists:
+            pr_state_store.record(owner, repo, branch_name, False)
+            return {**build_pr_status(False), 'timings_ms': finish_timings('check_pr_status', timings, started)}, 200
 
-        api_data_list = find_api_by_repo(repo_url)
+        if pr_response.status_code != 200:
+            return {
+                'error': 'Failed to fetch PR information',
+                'status_code': pr_response.status_code
+            }, 400
 
- 
+        prs = pr_response.json()
 
-        if not api_data_list:
+        if not prs:
+            pr_state_store.record(owner, repo, branch_name, True)
+            return {**build_pr_status(True), 'timings_ms': finish_timings('check_pr_status', timings, started)}, 200
 
- 
+        # Get the most recent PR
+        latest_pr = prs[0]
+        pr_number = latest_pr['number']
 
-            return jsonify({'error': 'No API data found for this repository'}), 404
+        # List entries carry merged_at (set exactly when the PR was merged), so the
+        # detail request is only needed if a closed PR comes back without it
+        if latest_pr['state'] == 'closed' and 'merged_at' not in latest_pr:
+            pr_detail_url = f'{GITHUB_API_BASE}/repos/{owner}/{repo}/pulls/{pr_number}'
+            print(f"Checking detailed PR info: {pr_detail_url}")
+            pr_detail_response, timings['pull_detail_ms'] = latency_stats.measure('check_pr_status.pull_detail', github.get, pr_detail_url, headers=headers)
+            if pr_detail_response.status_code == 200:
+                latest_pr = {**latest_pr, **pr_detail_response.json()}
+            else:
+                print(f"Failed to get PR details, using list data. Status: {pr_detail_response.status_code}")
 
- 
+        merged_at = latest_pr.get('merged_at')
+        is_merged = bool(latest_pr.get('merged') or merged_at)
 
-        # Extract EIM ID from API data
-        first_api = api_data_list[0] if isinstance(api_data_list, list) else api_data_list
-        eim_id = first_api.get('eim_id', 'unknown')
-        
-        # Generate JSON content for publishing
+        print(f"Final PR status - PR #{pr_number}, State: {latest_pr['state']}, Merged: {is_merged}")
 
- 
+        latest_pr_state = {
+            'number': pr_number,
+            'html_url': latest_pr['html_url'],
+            'state': latest_pr['state'],
+            'merged': is_merged,
+            'merged_at': merged_at
+        }
+        pr_state_store.record(owner, repo, branch_name, True, latest_pr_state)
+        return {**build_pr_status(True, latest_pr_state), 'timings_ms': finish_timings('check_pr_status', timings, started)}, 200
 
-        json_content = validate_and_generate_json(api_data_list)
+    except GitHubRateLimited as e:
+        return {'error': str(e), 'retry_after': int(e.wait_seconds) + 1}, 429
+    except DependencyUnavailable as e:
+        return e.to_dict(), 503
+    except Exception as e:
+        return {'error': str(e)}, 500
 
- 
 
-      
+@app.route('/api/check-pr-status', methods=['POST'])
+def check_pr_status():
+    """Check if PR for a repository has been merged"""
+    data = request.json
+    repo_url = data.get('repository_url', '')
 
- 
+    if not repo_url:
+        return jsonify({'error': 'Repository URL is required'}), 400
 
-        # Call the actual APIX publish API
+    result, status_code = get_pr_status(repo_url)
+    return jsonify(result), status_code
 
- 
 
-        publish_url = 'https://dev.apix.uk.hsbc/api/v1/publish/apis'
+def get_pr_statuses(candidates, headers):
+    """
+    PR status for many repositories (service behind /api/check-pr-status/bulk)
+    candidates: list of (repo_url, api_data_list) pairs
+    Fresh webhook-fed state answers first; the rest is looked up with one aliased GraphQL
+    query per chunk of repos, falling back to get_pr_status (REST) per repo where GraphQL
+    is not available.
+    Returns dict repo_url -> status dict (shape of get_pr_status; errors carry status_code)
+    """
+    results = {}
+    lookups = []
+    api_data_by_url = dict(candidates)
+    for repo_url, api_data_list in candidates:
+        parts = repo_url.rstrip('/').split('/')
+        owner, repo, branch_name = parts[-2], parts[-1].replace('.git', ''), apix_branch_name(api_data_list)
+        known_state = pr_state_store.get(owner, repo, branch_name)
+        if known_state:
+            results[repo_url] = {**build_pr_status(known_state['branch_exists'], known_state['pr']), 'state_source': known_state['source']}
+            continue
+        lookups.append((repo_url, owner, repo, branch_name))
 
- 
+    lookup_targets = {repo_url: (owner, repo, branch_name) for repo_url, owner, repo, branch_name in lookups}
+    rest_lookups = []
+    for repo_url, state in fetch_pr_statuses(lookups, headers, executor=IO_EXECUTOR).items():
+        if state.get('graphql_unavailable'):
+            rest_lookups.append(repo_url)
+            continue
+        if 'error' in state:
+            results[repo_url] = state
+            continue
+        pr = state['pr']
+        pr_state_store.record(*lookup_targets[repo_url], state['branch_exists'], pr)
+        pr_status = build_pr_status(state['branch_exists'], pr)
+        if pr:
+            pr_status['review_decision'] = pr.get('review_decision')
+            pr_status['is_approved'] = pr.get('review_decision') == 'APPROVED'
+        results[repo_url] = pr_status
+
+    if rest_lookups:
+        print(f"GraphQL not available: checking {len(rest_lookups)} PR statuses over REST")
+        # get_pr_status waits on IO_EXECUTOR work, so it must not occupy an IO worker
+        with ThreadPoolExecutor(max_workers=max(1, min(BULK_PR_CONCURRENCY, len(rest_lookups))),
+                                thread_name_prefix='apix-pr-status') as status_executor:
+            statuses = status_executor.map(lambda repo_url: get_pr_status(repo_url, api_data_by_url[repo_url]), rest_lookups)
+            for repo_url, (pr_status, status_code) in zip(rest_lookups, statuses):
+                results[repo_url] = pr_status if status_code == 200 else {'status_code': status_code, **pr_status}
+    return results
+
+
+@app.route('/api/check-pr-status/bulk', methods=['POST'])
+def check_pr_status_bulk():
+    """
+    Check PR status for many repositories at once
+    Request body: { repository_urls: [string, ...] }
+    Uses one aliased GraphQL query per chunk of ~50 repos; each result has the
+    same shape as /api/check-pr-status (plus review_decision / is_approved)
+    """
+    data = request.json or {}
+    repo_urls = data.get('repository_urls') or []
 
-        # Use EIM ID in Invocation-Source header
-        invocation_source = f'UI_{eim_id}'
-        print(f"Using Invocation-Source: {invocation_source}")
+    if not repo_urls or not isinstance(repo_urls, list):
+        return jsonify({'error': 'repository_urls (list) is required'}), 400
 
- 
+    github_token = os.environ.get('SERVICE_GITHUB_TOKEN') or os.environ.get('GITHUB_TOKEN') or ''
+    if not github_token:
+        return jsonify({'error': 'Server is not configured with GitHub token'}), 500
 
+    try:
         headers = {
-
- 
-
-            'Content-Type': 'application/json',
-
- 
-
-            'Accept': 'application/json',
-
- 
-
-            'Invocation-Source': invocation_source,
-
- 
-
-            'Authorization': os.environ.get('APIX_VALIDATION_TOKEN', 'REPLACE_ME')
-
- 
-
+            'Authorization': github_auth_header(github_token),
+            'Accept': 'application/vnd.github+json',
+            'User-Agent': 'apix-automation-tool',
+            'X-GitHub-Api-Version': '2022-11-28'
         }
 
- 
-
-      
-
- 
-
-        print(f"Publishing API metadata to: {publish_url}")
-
- 
-
-        print(f"Repository: {repo_url}")
-
- 
-
-        print(f"API count: {len(api_data_list) if isinstance(api_data_list, list) else 1}")
-
- 
-
-      
-
- 
-
-        # Parse JSON content for the API call
-
- 
-
-        try:
-
- 
-
-            json_data = json.loads(json_content) if isinstance(json_content, str) else json_content
-
- 
-
-        except json.JSONDecodeError as je:
-
- 
+        # Parse the workbook once for all repos
+        catalog = get_catalog()
+        results = {}
+        candidates = []
+        for repo_url in repo_urls:
+            api_data_list = find_api_by_repo(repo_url, data=catalog) if catalog is not None else None
+            if not api_data_list:
+                results[repo_url] = {'error': 'No API data found for this repository'}
+                continue
+            candidates.append((repo_url, api_data_list))
+        results.update(get_pr_statuses(candidates, headers))
 
-            return jsonify({'error': 'Generated JSON content is invalid', 'detail': str(je)}), 500
+        return jsonify({
+            'total': len(repo_urls),
+            'can_publish_count': sum(1 for status in results.values() if status.get('can_publish')),
+            'results': results
+        })
 
- 
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-      
 
- 
+def api_ref(block):
+    return {'apiTechnicalName': block.get('apiTechnicalName'), 'version': block.get('version')}
 
-        # Make the publish API call
 
- 
+def plan_publish(eim_id, blocks, force=False):
+    """
+    (changes, unchanged) for a repo's API blocks: changes is a list of (block, change dict)
+    to send, unchanged the blocks identical to their last published snapshot.
+    Everything is sent when snapshots are disabled or force is set.
+    """
+    if snapshot_store is None or force:
+        return [(block, {**api_ref(block), 'change': 'forced' if force else 'not_compared'}) for block in blocks], []
+    return snapshot_store.plan(eim_id, blocks)
 
-        response = requests.post(
 
- 
+def publish_repository(repo_url, document=None, force=False):
+    """
+    Publish one repository's API metadata to APIX (PR must be merged first)
+    The repo's records are looked up once; the PR status check runs while the
+    APIX document is generated, and the document is posted without a JSON round trip.
+    Only APIs that differ from their last published snapshot are sent (all of them with
+    force); when nothing changed APIX is not called and the skipped APIs are reported.
+    document: publish this (already generated) document instead, e.g. the one a queued publish was keyed on
+    The Idempotency-Key header is derived from the repo and the posted content, so APIX applies
+    a re-sent or re-submitted publish of the same content once.
+    Returns (response dict, HTTP status code)
+    """
+    started = time.perf_counter()
+    timings = {}
 
-            publish_url,
+    # Get API data
+    api_data_list, timings['catalog_lookup_ms'] = timed(find_api_by_repo, repo_url)
+    if not api_data_list:
+        return {'error': 'No API data found for this repository'}, 404
 
- 
+    # PR status (GitHub) and payload preparation (CPU) are independent. The status check
+    # runs on this thread: it waits on IO_EXECUTOR work itself, so it must not occupy an IO worker
+    document_future = IO_EXECUTOR.submit(timed, build_apix_document, api_data_list) if document is None else None
+    try:
+        (pr_status_data, pr_status_code), timings['pr_status_ms'] = timed(get_pr_status, repo_url, api_data_list)
+    finally:
+        if document_future is not None:
+            document, timings['payload_ms'] = document_future.result()
+
+    if pr_status_code != 200:
+        return pr_status_data, pr_status_code
+
+    if not pr_status_data.get('can_publish', False):
+        return {
+            'error': 'Cannot publish: PR not merged yet',
+            'message': pr_status_data.get('message', 'PR status unknown')
+        }, 400
+
+    # Extract EIM ID from API data
+    first_api = api_data_list[0] if isinstance(api_data_list, list) else api_data_list
+    eim_id = first_api.get('eim_id', 'unknown')
+
+    # Use EIM ID in Invocation-Source header
+    invocation_source = f'UI_{eim_id}'
+    print(f"Using Invocation-Source: {invocation_source}")
+
+    (changes, unchanged), timings['diff_ms'] = timed(plan_publish, eim_id, document['apiMetaData']['apiMetaDataList'], force)
+    unchanged_apis = [api_ref(block) for block in unchanged]
+    if not changes:
+        print(f"Nothing to publish for {repo_url}: {len(unchanged)} API(s) unchanged since the last publish")
+        return {
+            'success': True,
+            'skipped': True,
+            'message': 'ℹ️ Nothing changed since the last publish - APIX was not called',
+            'repository_url': repo_url,
+            'published_apis': 0,
+            'unchanged_apis': unchanged_apis,
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'timings_ms': finish_timings('publish', timings, started)
+        }, 200
+    if unchanged:
+        document = {'apiMetaData': {'apiMetaDataList': [block for block, _ in changes]}}
+
+    print(f"Publishing API metadata to: {apix.publish_url}")
+    print(f"Repository: {repo_url}")
+    print(f"API count: {len(changes)} ({len(unchanged)} unchanged, skipped)")
+
+    # Make the publish API call
+    idempotency_key = publish_idempotency_key(normalize_repo_url(repo_url), document)
+    response, timings['publish_ms'] = latency_stats.measure('publish.apix', apix.publish, document, invocation_source,
+                                                              idempotency_key=idempotency_key)
+    finish_timings('publish', timings, started)
+
+    if response.status_code == 200:
+        if snapshot_store is not None:
+            snapshot_store.record(eim_id, [block for block, _ in changes], repo_url)
+        return {
+            'success': True,
+            'message': '🎉 API metadata published successfully!',
+            'repository_url': repo_url,
+            'published_apis': len(changes),
+            'changes': [change for _, change in changes],
+            'unchanged_apis': unchanged_apis,
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'publish_response': response.json() if response.text else {},
+            'idempotency_key': idempotency_key,
+            'timings_ms': timings
+        }, 200
+
+    error_details = response.json() if response.text else {'error': response.text}
+    return {
+        'error': 'Failed to publish API metadata',
+        'status_code': response.status_code,
+        'details': error_details,
+        'idempotency_key': idempotency_key
+    }, 400
 
-            json=json_data,
 
- 
+@app.route('/api/publish', methods=['POST'])
+def publish_api():
+    """
+    Queue a publish of the repository's API metadata to APIX
+    Request body: { repository_url, force?: bool }
+    Returns 202 with the job id right away; poll GET /api/publish/<job_id> for the outcome.
+    The job is keyed by repo + content hash: while a publish of the same content is queued
+    or running (or succeeded within APIX_PUBLISH_DEDUPE_WINDOW, unless force) that job is
+    returned instead of publishing twice. force also re-sends APIs identical to their last
+    published snapshot. With JOBS_ENABLED=false the publish runs inline.
+    """
+    data = request.json or {}
+    repo_url = data.get('repository_url', '')
 
-            headers=headers,
+    if not repo_url:
+        return jsonify({'error': 'Repository URL is required'}), 400
 
- 
+    try:
+        if not JOBS_ENABLED:
+            try:
+                result, status_code = publish_repository(repo_url, force=bool(data.get('force')))
+            except DependencyUnavailable as e:
+                return jsonify(e.to_dict()), 503
+            return jsonify(result), status_code
 
-            proxies=PROXIES if PROXIES else None,
+        api_data_list = find_api_by_repo(repo_url)
+        if not api_data_list:
+            return jsonify({'error': 'No API data found for this repository'}), 404
 
- 
+        document = build_apix_document(api_data_list)
+        idempotency_key = publish_idempotency_key(normalize_repo_url(repo_url), document)
+        job_id, created = job_store.submit_once(
+            'publish', repo_url, {'document': document, 'force': bool(data.get('force'))}, idempotency_key,
+            {'max_attempts': APIX_PUBLISH_MAX_ATTEMPTS, 'retry_delay': APIX_PUBLISH_RETRY_DELAY},
+            reuse_succeeded_for=0 if data.get('force') else APIX_PUBLISH_DEDUPE_WINDOW
+        )
+        if created:
+            job_runner.start()
+            job_runner.notify()
+            print(f"Publish job {job_id} queued for {repo_url} (key {idempotency_key})")
+        else:
+            print(f"Publish of {repo_url} deduplicated onto job {job_id} (key {idempotency_key})")
 
-            verify=SSL_VERIFY,
+        outcome = publish_outcome(job_store.get_job(job_id))
+        outcome['deduplicated'] = not created
+        return jsonify(outcome), 200 if outcome['done'] else 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
- 
 
-            timeout=30
+@app.route('/api/publish/<job_id>', methods=['GET'])
+def publish_status(job_id):
+    """Outcome of a queued publish (status, attempts, last error, APIX response once done)"""
+    job = job_store.get_job(job_id)
+    if job is None or job['kind'] != 'publish' or job['total'] != 1:
+        return jsonify({'error': 'Publish job not found'}), 404
+    return jsonify(publish_outcome(job))
 
- 
 
-        )
+@app.route('/api/publish/bulk', methods=['POST'])
+def publish_bulk():
+    """
+    Publish many merged repositories with API blocks packed into shared APIX requests
+    Request body: { repository_urls: [...] } or { all: true }, optional max_batch_apis,
+    max_batch_bytes, concurrency (capped at the APIX bulkhead size), force
+    APIs identical to their last published snapshot are skipped (unless force); the rest
+    are grouped per EIM (one Invocation-Source per request) and packed into size-bounded
+    apiMetaDataList batches; a rejected batch is published again without the APIs APIX
+    rejected (in halves when it does not say which). PR statuses are looked up in one batch.
+    Streams one JSON line per repository (application/x-ndjson) once all of its APIs
+    have an outcome, then a summary line.
+    """
+    data = request.json or {}
+    catalog = get_catalog()
+    if catalog is None:
+        return jsonify({'error': 'API metadata catalog could not be loaded'}), 500
 
- 
+    repo_urls = catalog_repo_urls(catalog) if data.get('all') else data.get('repository_urls') or []
+    if not repo_urls:
+        return jsonify({'error': 'repository_urls (list) or all=true is required'}), 400
 
-      
+    try:
+        max_apis = max(1, int(data.get('max_batch_apis', APIX_PUBLISH_BATCH_MAX_APIS)))
+        max_bytes = max(1, int(data.get('max_batch_bytes', APIX_PUBLISH_BATCH_MAX_BYTES)))
+        concurrency = max(1, int(data.get('concurrency', APIX_BULK_PUBLISH_CONCURRENCY)))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_batch_apis, max_batch_bytes and concurrency must be integers'}), 400
+    github_token = os.environ.get('SERVICE_GITHUB_TOKEN') or os.environ.get('GITHUB_TOKEN') or ''
+    if not github_token:
+        return jsonify({'error': 'Server is not configured with GitHub token'}), 500
+    headers = {
+        'Authorization': github_auth_header(github_token),
+        'Accept': 'application/vnd.github+json',
+        'User-Agent': 'apix-automation-tool',
+        'X-GitHub-Api-Version': '2022-11-28'
+    }
 
- 
+    force = bool(data.get('force'))
 
-        if response.status_code == 200:
+    rejected = []
+    candidates = []
+    for repo_url in dict.fromkeys(repo_urls):
+        api_data_list = find_api_by_repo(repo_url, data=catalog)
+        if api_data_list:
+            candidates.append((repo_url, api_data_list))
+        else:
+            rejected.append({'repository_url': repo_url, 'status': 'rejected', 'error': 'No API data found for this repository'})
 
- 
+    outcomes = queue.Queue()
 
-            return jsonify({
+    def run_bulk():
+        started = time.perf_counter()
+        summary = {'published': 0, 'partial': 0, 'failed': 0, 'unchanged': 0, 'skipped': 0,
+                   'apis_published': 0, 'apis_failed': 0, 'apis_unavailable': 0, 'apis_unchanged': 0}
+        try:
+            # Only repos whose APIX PR is merged are published; their statuses come from one
+            # batched lookup (state store, then aliased GraphQL chunks) for the whole set
+            statuses = get_pr_statuses(candidates, headers)
+            by_source = {}
+            pending = {}
+            for repo_url, api_data_list in candidates:
+                pr_status_data = statuses[repo_url]
+                if 'error' in pr_status_data or not pr_status_data.get('can_publish', False):
+                    summary['skipped'] += 1
+                    outcomes.put({
+                        'repository_url': repo_url,
+                        'status': 'skipped',
+                        'error': pr_status_data.get('error') or 'Cannot publish: PR not merged yet',
+                        'message': pr_status_data.get('message')
+                    })
+                    continue
+                try:
+                    blocks = build_apix_document(api_data_list)['apiMetaData']['apiMetaDataList']
+                except ValueError as e:
+                    summary['failed'] += 1
+                    outcomes.put({'repository_url': repo_url, 'status': 'failed', 'error': str(e)})
+                    continue
+                eim_id = api_data_list[0].get('eim_id', 'unknown')
+                changes, unchanged = plan_publish(eim_id, blocks, force)
+                unchanged_apis = [api_ref(block) for block in unchanged]
+                summary['apis_unchanged'] += len(unchanged)
+                if not changes:
+                    summary['unchanged'] += 1
+                    outcomes.put({'repository_url': repo_url, 'status': 'unchanged', 'published_apis': 0, 'unchanged_apis': unchanged_apis})
+                    continue
+                blocks = [block for block, _ in changes]
+                by_source.setdefault(f'UI_{eim_id}', []).extend(((repo_url, index), block) for index, block in enumerate(blocks))
+                pending[repo_url] = {
+                    'eim_id': eim_id, 'remaining': len(blocks), 'blocks': blocks,
+                    'published': [], 'failed_apis': [], 'unchanged_apis': unchanged_apis
+                }
 
- 
+            batches = [(source, batch) for source, items in by_source.items() for batch in pack_batches(items, max_apis, max_bytes)]
+            print(f"Bulk publish: {len(pending)} repositories, {sum(len(batch) for _, batch in batches)} APIs "
+                  f"in {len(batches)} batches, {summary['apis_unchanged']} APIs unchanged, "
+                  f"{summary['skipped']} repositories skipped, {len(rejected)} rejected")
+
+            def on_result(key, outcome):
+                repo_url, index = key
+                state = pending[repo_url]
+                state['remaining'] -= 1
+                if outcome['published']:
+                    state['published'].append(state['blocks'][index])
+                else:
+                    block = state['blocks'][index]
+                    state['failed_apis'].append({
+                        'apiTechnicalName': block.get('apiTechnicalName'),
+                        'version': block.get('version'),
+                        **{field: value for field, value in outcome.items() if field != 'published'}
+                    })
+                if state['remaining'] == 0:
+                    if snapshot_store is not None and state['published']:
+                        snapshot_store.record(state['eim_id'], state['published'], repo_url)
+                    status = 'failed' if not state['published'] else 'partial' if state['failed_apis'] else 'published'
+                    summary[status] += 1
+                    summary['apis_published'] += len(state['published'])
+                    # APIs not sent because APIX's circuit was open are not APIX failures
+                    unavailable = sum(1 for api in state['failed_apis'] if 'unavailable' in api)
+                    summary['apis_unavailable'] += unavailable
+                    summary['apis_failed'] += len(state['failed_apis']) - unavailable
+                    outcomes.put({
+                        'repository_url': repo_url,
+                        'status': status,
+                        'published_apis': len(state['published']),
+                        'failed_apis': state['failed_apis'],
+                        'unchanged_apis': state['unchanged_apis']
+                    })
 
-                'success': True,
+            publish_summary = publish_many(batches, on_result, concurrency=concurrency, client=apix)
+            summary['batches'] = len(batches)
+            summary['requests'] = publish_summary['requests']
+        except Exception as e:
+            outcomes.put({'status': 'error', 'error': f'Bulk publish aborted: {str(e)}'})
+        outcomes.put({
+            'summary': True,
+            'total': len(candidates) + len(rejected),
+            'rejected': len(rejected),
+            **summary,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
+        })
+        outcomes.put(None)
+
+    threading.Thread(target=run_bulk, name='apix-bulk-publish', daemon=True).start()
+
+    def generate():
+        for outcome in rejected:
+            yield json.dumps(outcome) + '\n'
+        while True:
+            outcome = outcomes.get()
+            if outcome is None:
+                break
+            yield json.dumps(outcome) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
+
+def publish_outcome(job):
+    """Flatten a single-task publish job for the UI"""
+    task = job['tasks'][0]
+    return {
+        'job_id': job['job_id'],
+        'repository_url': task['repository_url'],
+        # The key sent to APIX once an attempt was made (it covers only the APIs that changed)
+        'idempotency_key': (task['result'] or {}).get('idempotency_key') or task['idempotency_key'],
+        'status': task['status'],
+        'done': task['status'] in ('succeeded', 'failed', 'cancelled'),
+        'attempts': task['attempts'],
+        'next_attempt_at': task['not_before'] if task['status'] == 'pending' and task['attempts'] else None,
+        'error': task['last_error'],
+        'result': task['result'],
+        'status_url': f"/api/publish/{job['job_id']}"
+    }
 
- 
 
-                'message': '🎉 API metadata published successfully!',
+@app.route('/api/health', methods=['GET'])
 
  
 
-                'repository_url': repo_url,
 
  
 
-                'published_apis': len(api_data_list) if isinstance(api_data_list, list) else 1,
 
  
 
-                'timestamp': datetime.utcnow().isoformat() + 'Z',
 
  
 
-                'publish_response': response.json() if response.text else {}
+def health():
 
  
 
-            })
 
  
 
-        else:
 
  
 
-            error_details = response.json() if response.text else {'error': response.text}
 
  
 
-            return jsonify({
+    """Health check endpoint"""
 
  
 
-                'error': 'Failed to publish API metadata',
 
  
 
-                'status_code': response.status_code,
 
  
 
-                'details': error_details
 
  
 
-            }), 400
+    # APIX / GitHub being degraded does not make this service unhealthy (search and generate still work)
+    return jsonify({
+        'status': 'healthy',
+        'dependencies': {name: metrics['circuit']['state'] for name, metrics in dependencies_metrics().items()}
+    })
 
  
 
-      
 
  
 
-    except Exception as e:
 
  
 
-        return jsonify({'error': str(e)}), 500
 
  
 
 
  
 
-@app.route('/api/health', methods=['GET'])
 
  
 
@@ -14025,59 +10113,240 @@ def publish_api():
 
  
 
+@app.route('/api/github/webhook', methods=['POST'])
+def github_webhook():
+    """
+    GitHub webhook receiver (content type application/json, secret GITHUB_WEBHOOK_SECRET)
+    Handles pull_request, create and delete events for apix_* branches so that
+    check-pr-status can answer from memory instead of polling GitHub
+    """
+    if not GITHUB_WEBHOOK_SECRET:
+        return jsonify({'error': 'Server is not configured with GITHUB_WEBHOOK_SECRET'}), 503
 
- 
-
-def health():
+    body = request.get_data()
+    if not verify_webhook_signature(GITHUB_WEBHOOK_SECRET, body, request.headers.get('X-Hub-Signature-256')):
+        return jsonify({'error': 'Invalid webhook signature'}), 401
 
- 
+    event = request.headers.get('X-GitHub-Event', '')
+    if event == 'ping':
+        return jsonify({'pong': True})
 
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return jsonify({'error': 'Webhook payload is not valid JSON'}), 400
 
- 
+    applied = pr_state_store.apply_webhook(event, payload)
+    if applied:
+        print(f"Webhook {request.headers.get('X-GitHub-Delivery')}: {applied}")
+    return jsonify({'event': event, 'applied': bool(applied), 'detail': applied})
 
 
- 
+@app.route('/api/github/pr-state', methods=['GET'])
+def github_pr_state_stats():
+    """PR state store statistics (hits are status checks answered without GitHub calls)"""
+    return jsonify(pr_state_store.metrics())
 
 
- 
+@app.route('/api/github/rate-limit', methods=['GET'])
+def github_rate_limit():
+    """GitHub API budget as seen by the request scheduler (quota, pacing, waits)"""
+    return jsonify(get_rate_limiter().metrics())
 
-    """Health check endpoint"""
 
- 
+@app.route('/api/github/cache', methods=['GET'])
+def github_cache_stats():
+    """Conditional-request cache statistics (hits are 304 revalidations)"""
+    if github.cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(github.cache.metrics())
 
 
- 
+def run_create_pr_task(repo_url, payload, options):
+    """Job handler: commit the APIX file and open (or reuse) the PR for one repo via GraphQL"""
+    if payload.get('error'):
+        raise TaskFailed(payload['error'])
 
+    github_token = os.environ.get('SERVICE_GITHUB_TOKEN') or os.environ.get('GITHUB_TOKEN') or ''
+    if not github_token:
+        raise TaskFailed('Server is not configured with SERVICE_GITHUB_TOKEN or GITHUB_TOKEN environment variable', retryable=True)
 
- 
+    headers = {
+        'Authorization': github_auth_header(github_token),
+        'Accept': 'application/vnd.github+json',
+        'User-Agent': 'apix-automation-tool',
+        'X-GitHub-Api-Version': '2022-11-28'
+    }
+    owner, repo, branch_name = payload['owner'], payload['repo'], payload['branch_name']
+    try:
+        context = fetch_commit_context(owner, repo, headers, branch_name)
+        result = commit_file_and_open_pr(
+            owner, repo, headers, context, branch_name, payload['file_path'], payload['content'],
+            payload['commit_message'], payload['pr_title'], payload['pr_body']
+        )
+    except GitHubRateLimited as e:
+        raise TaskFailed(str(e), retryable=True, retry_after=e.wait_seconds)
+    except DependencyUnavailable as e:
+        raise TaskFailed(str(e), retryable=True, retry_after=e.retry_after)
+    except GraphQLUnavailable as e:
+        raise TaskFailed(f'GraphQL commit path unavailable: {e}')
+    except GraphQLError as e:
+        # Typically a race on the branch head, the next attempt re-reads the branch; auth errors stay failed
+        raise TaskFailed(str(e), retryable=e.http_status() == 502, result={'details': e.errors})
+
+    if result['pr_number']:
+        pr_state_store.record(owner, repo, branch_name, True, {
+            'number': result['pr_number'], 'html_url': result['pr_url'], 'state': 'open', 'merged': False, 'merged_at': None
+        })
+    return {
+        'result_url': result['pr_url'],
+        'pr_number': result['pr_number'],
+        'branch': branch_name,
+        'branch_created': result['branch_created'],
+        'pr_created': result['pr_created'],
+        'up_to_date': result['up_to_date']
+    }
 
 
- 
+def run_publish_task(repo_url, payload, options):
+    """
+    Job handler: publish one repo to APIX (same checks as publish_repository)
+    Posts the document stored with the task when there is one (queued /api/publish).
+    APIX 5xx, timeouts / connection errors, open circuits and GitHub rate limits are retried with backoff:
+    the Idempotency-Key derived from the content makes a re-sent publish count once at APIX.
+    """
+    try:
+        payload = payload or {}
+        result, status_code = publish_repository(repo_url, payload.get('document'), bool(payload.get('force')))
+    except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+        raise TaskFailed(f'APIX publish request failed: {e}', retryable=True)
+    except DependencyUnavailable as e:
+        raise TaskFailed(str(e), retryable=True, retry_after=e.retry_after)
+    if status_code != 200:
+        upstream_status = result.get('status_code') or status_code
+        message = result.get('error', 'Publish failed')
+        if result.get('message'):
+            message = f"{message} ({result['message']})"
+        raise TaskFailed(
+            message, retryable=upstream_status >= 500 or status_code == 429,
+            retry_after=result.get('retry_after'), result=result
+        )
+    return result
 
-    return jsonify({'status': 'healthy'})
 
- 
+# Durable bulk jobs: tasks survive restarts and are resumed by the runner.
+# Not started in the debug reloader's watcher process, only in the process serving requests,
+# nor in a pre-fork server's master (JOB_RUNNER_AUTOSTART=false): see init_worker_process.
+job_store = JobStore()
+job_runner = JobRunner(job_store, {'create_pr': run_create_pr_task, 'publish': run_publish_task})
+if JOBS_ENABLED and JOB_RUNNER_AUTOSTART and (__name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+    job_runner.start()
 
 
- 
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Submit a durable bulk job
+    Request body: { kind: 'create_pr' | 'publish', repository_urls: [...] } or { kind, all: true }
+    Returns 202 with the job id; progress via GET /api/jobs/<job_id>
+    """
+    data = request.json or {}
+    kind = data.get('kind')
+    if kind not in ('create_pr', 'publish'):
+        return jsonify({'error': "kind must be 'create_pr' or 'publish'"}), 400
+    if not JOBS_ENABLED:
+        return jsonify({'error': 'Bulk jobs are disabled (JOBS_ENABLED=false)'}), 503
 
+    try:
+        catalog = get_catalog()
+        if catalog is None:
+            return jsonify({'error': 'API metadata catalog could not be loaded'}), 500
+
+        repo_urls = catalog_repo_urls(catalog) if data.get('all') else data.get('repository_urls') or []
+        if not repo_urls:
+            return jsonify({'error': 'repository_urls (list) or all=true is required'}), 400
+
+        tasks = []
+        for repo_url in dict.fromkeys(repo_urls):
+            if kind == 'create_pr':
+                # Content is generated now and stored with the task, so a resumed job commits what was submitted
+                try:
+                    payload = build_pr_job(repo_url, catalog)
+                except ValueError as e:
+                    payload = {'error': str(e)}
+            else:
+                payload = {}
+            tasks.append((repo_url, payload))
+
+        job_id = job_store.create_job(kind, tasks, {'all': bool(data.get('all'))})
+        job_runner.start()
+        job_runner.notify()
+        print(f"Job {job_id} submitted: {kind} for {len(tasks)} repositories")
+        return jsonify(job_store.get_job(job_id, include_tasks=False)), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
- 
 
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """Most recent jobs with per-status task counts (?limit=, default 50)"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify({'jobs': job_store.list_jobs(limit)})
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Job status with every task (status, attempts, last_error, result_url)"""
+    job = job_store.get_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+
+@app.route('/api/jobs/<job_id>/<action>', methods=['POST'])
+def control_job(job_id, action):
+    """Pause, resume or cancel a job (running tasks finish; pending ones wait or are cancelled)"""
+    if action not in ('pause', 'resume', 'cancel'):
+        return jsonify({'error': "action must be 'pause', 'resume' or 'cancel'"}), 404
+    try:
+        status = job_store.set_job_status(job_id, action)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if action == 'resume':
+        job_runner.notify()
+    return jsonify(job_store.get_job(job_id, include_tasks=False))
 
- 
 
+@app.route('/api/validate/cache', methods=['GET'])
+def validation_cache_stats():
+    """APIX validation cache statistics (hits are validations answered without calling APIX)"""
+    return jsonify(validation_cache.metrics())
 
- 
 
+@app.route('/api/metrics/latency', methods=['GET'])
+def latency_metrics():
+    """p50 / p95 / max latency per instrumented call (rolling window of recent samples)"""
+    return jsonify(latency_stats.summary())
 
- 
 
+@app.route('/api/publish/snapshots', methods=['GET'])
+def publish_snapshot_stats():
+    """Last-published snapshot store statistics (unchanged APIs were not re-sent to APIX)"""
+    if snapshot_store is None:
+        return jsonify({'enabled': False})
+    return jsonify(snapshot_store.metrics())
 
- 
 
+@app.route('/api/metrics/dependencies', methods=['GET'])
+def dependency_metrics():
+    """Circuit breaker state and bulkhead usage for APIX and GitHub"""
+    return jsonify(dependencies_metrics())
 
- 
 
 @app.route('/api/ping', methods=['GET'])
 
@@ -14343,6 +10612,40 @@ def echo():
  
 
 
+def warm_up():
+    """
+    Load what requests would otherwise load on first use (the API catalog), so a production
+    server does it once before accepting traffic (see wsgi.py). Runs in a pre-fork master:
+    must not start threads or use the thread pools.
+    """
+    started = time.perf_counter()
+    repos = len(catalog_repo_urls(get_catalog()))
+    print(f"Warm-up: catalog with {repos} repositories loaded in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return {'repositories': repos}
+
+
+def release_process_resources():
+    """Close the master's database connections before forking, so no worker shares one"""
+    job_store.close()
+    pr_state_store.close()
+    upload_sessions.close()
+    upload_progress.close()
+    if snapshot_store is not None:
+        snapshot_store.close()
+
+
+def init_worker_process():
+    """Per-worker setup after a fork: its own database connections, then its own job runner"""
+    job_store.connect()
+    pr_state_store.connect()
+    upload_sessions.connect()
+    upload_progress.connect()
+    if snapshot_store is not None:
+        snapshot_store.connect()
+    if JOBS_ENABLED:
+        job_runner.start()
+
+
 if __name__ == '__main__':
 
     app.run(host='0.0.0.0', debug=True, port=5001)
\ No newline at end of file
@@ -0,0 +1,177 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+from github_client import (
+    GITHUB_CONNECT_TIMEOUT, GITHUB_MAX_RETRIES, GITHUB_READ_TIMEOUT, GITHUB_RETRY_BACKOFF,
+    RETRY_STATUS_CODES, get_github_client
+)
+from github_graphql import (
+    COMMIT_CONTEXT_QUERY, GraphQLError, GraphQLUnavailable, build_commit_mutation, commit_context_variables, commit_plan,
+    parse_commit_context, parse_commit_result, parse_graphql_response, up_to_date_result
+)
+from rate_limit import GITHUB_BULK_MAX_RATE_LIMIT_WAIT, GITHUB_RATE_LIMIT_RETRIES, GitHubRateLimited, get_rate_limiter
+from resilience import FAILURE_STATUS_CODES, DependencyUnavailable, get_dependency
+
+
+# Bulk PR creation settings
+BULK_PR_CONCURRENCY = int(os.environ.get('BULK_PR_CONCURRENCY', '10'))
+GITHUB_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('GITHUB_MAX_CONNECTIONS_PER_HOST', '10'))
+
+
+class AsyncGitHubClient:
+    """
+    asyncio GitHub client on httpx.AsyncClient.
+
+    Uses the same base URL / proxies / SSL settings as the shared sync client.
+    All calls go to one GitHub host, so the pool limit is effectively a
+    per-host connection limit. Idempotent calls are retried on connection
+    errors and 5xx with the same backoff settings as the sync client.
+    Requests are paced by the shared GitHubRateLimiter as bulk (non-interactive)
+    traffic: they stop at the quota reserve and wait out rate limits.
+
+    Usage:
+        async with AsyncGitHubClient() as client:
+            context = await client.fetch_commit_context(owner, repo, headers, branch_name)
+    """
+
+    def __init__(self, max_connections=GITHUB_MAX_CONNECTIONS_PER_HOST):
+        sync_client = get_github_client()
+        self.api_base = sync_client.api_base
+        self.graphql_url = sync_client.graphql_url
+        self.limiter = get_rate_limiter()
+        self.breaker = get_dependency('github').breaker
+
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        transport_kwargs = {'verify': sync_client.verify, 'limits': limits, 'retries': GITHUB_MAX_RETRIES}
+        mounts = {
+            f'{scheme}://': httpx.AsyncHTTPTransport(proxy=proxy_url, **transport_kwargs)
+            for scheme, proxy_url in (sync_client.proxies or {}).items()
+        }
+        self.client = httpx.AsyncClient(
+            transport=httpx.AsyncHTTPTransport(**transport_kwargs),
+            mounts=mounts,
+            timeout=httpx.Timeout(GITHUB_READ_TIMEOUT, connect=GITHUB_CONNECT_TIMEOUT)
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    def url(self, path):
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.api_base}/{path.lstrip('/')}"
+
+    async def request(self, method, url, retry=None, **kwargs):
+        """Send a request; retry defaults to True for GET and False otherwise"""
+        if retry is None:
+            retry = method == 'GET'
+        attempts = GITHUB_MAX_RETRIES + 1 if retry else 1
+
+        full_url = self.url(url)
+        resource = 'graphql' if full_url == self.graphql_url else 'core'
+        attempt = 0
+        rate_limited = 0
+        while True:
+            await self.limiter.acquire_async(resource, max_wait=GITHUB_BULK_MAX_RATE_LIMIT_WAIT)
+            # Shares the 'github' circuit with the sync client; concurrency is bounded by BULK_PR_CONCURRENCY
+            probe = self.breaker.before_call()
+            started = time.perf_counter()
+            ok = False
+            try:
+                response = await self.client.request(method, full_url, **kwargs)
+                ok = response.status_code not in FAILURE_STATUS_CODES
+            except httpx.TransportError:
+                if attempt == attempts - 1:
+                    raise
+            else:
+                limited = response.status_code in (403, 429)
+                pause = self.limiter.record_response(response.status_code, response.headers, response.text if limited else '')
+                if pause is not None and rate_limited < GITHUB_RATE_LIMIT_RETRIES:
+                    # Next acquire_async waits until the limit clears
+                    rate_limited += 1
+                    continue
+                if response.status_code not in RETRY_STATUS_CODES or attempt == attempts - 1:
+                    return response
+            finally:
+                self.breaker.record(ok, (time.perf_counter() - started) * 1000, probe=probe)
+            await asyncio.sleep(GITHUB_RETRY_BACKOFF * (2 ** attempt))
+            attempt += 1
+
+    async def graphql(self, query, variables, headers, retry=False):
+        response = await self.request('POST', self.graphql_url, retry=retry,
+                                      json={'query': query, 'variables': variables}, headers=headers)
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return parse_graphql_response(response.status_code, body)
+
+    async def fetch_commit_context(self, owner, repo, headers, branch_name):
+        # Read-only query, safe to retry
+        data = await self.graphql(COMMIT_CONTEXT_QUERY, commit_context_variables(owner, repo, branch_name), headers, retry=True)
+        return parse_commit_context(data, owner, repo)
+
+    async def commit_file_and_open_pr(self, owner, repo, headers, context, branch_name, file_path, content,
+                                      commit_message, pr_title, pr_body):
+        plan = commit_plan(context, branch_name, file_path, content)
+        if plan == 'noop':
+            return up_to_date_result(context, branch_name)
+
+        mutation, variables = build_commit_mutation(owner, repo, context, branch_name, file_path, content,
+                                                    commit_message, pr_title, pr_body, commit=plan == 'commit')
+        try:
+            data = await self.graphql(mutation, variables, headers)
+        finally:
+            # Keep the sync client's conditional-request cache consistent with the write
+            get_github_client().invalidate_repo(owner, repo)
+        return parse_commit_result(data, context, branch_name, commit=plan == 'commit')
+
+
+async def create_prs_concurrently(jobs, headers, on_result, concurrency=BULK_PR_CONCURRENCY,
+                                  max_connections=GITHUB_MAX_CONNECTIONS_PER_HOST):
+    """
+    Run the branch/commit/PR flow for many repositories concurrently.
+
+    Args:
+        jobs: list of dicts with repository_url, owner, repo, branch_name, file_path,
+              content, commit_message, pr_title, pr_body
+        headers: GitHub auth headers
+        on_result: callback invoked with each repo's outcome dict as soon as it finishes
+        concurrency: max repositories in flight at once
+        max_connections: max open connections to the GitHub host
+
+    Returns:
+        dict with succeeded / failed counts
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    summary = {'succeeded': 0, 'failed': 0}
+
+    async with AsyncGitHubClient(max_connections=max_connections) as client:
+
+        async def run_job(job):
+            async with semaphore:
+                started = time.perf_counter()
+                outcome = {'repository_url': job['repository_url'], 'branch': job['branch_name']}
+                try:
+                    context = await client.fetch_commit_context(job['owner'], job['repo'], headers, job['branch_name'])
+                    result = await client.commit_file_and_open_pr(
+                        job['owner'], job['repo'], headers, context, job['branch_name'], job['file_path'],
+                        job['content'], job['commit_message'], job['pr_title'], job['pr_body']
+                    )
+                    outcome.update(result, success=True)
+                    summary['succeeded'] += 1
+                except (GraphQLError, GraphQLUnavailable, GitHubRateLimited, DependencyUnavailable, httpx.HTTPError) as e:
+                    outcome.update(success=False, error=str(e), details=getattr(e, 'errors', None))
+                    summary['failed'] += 1
+                outcome['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                on_result(outcome)
+
+        await asyncio.gather(*(run_job(job) for job in jobs))
+
+    return summary
@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+import pandas as pd
+
+
+def normalize_repo_url(url):
+    """Normalize GitHub repository URL for comparison"""
+    if not url:
+        return ""
+    url = str(url).strip().lower()
+    # Remove trailing slashes
+    url = url.rstrip('/')
+    # Remove .git suffix if present
+    if url.endswith('.git'):
+        url = url[:-4]
+    return url
+
+
+def parse_transposed_excel(file_path, on_progress=None):
+    """
+    Parse transposed Excel format where:
+    - Each sheet represents an EIM ID (for reference)
+    - Column A = Field names (vertical)
+    - Columns B, C, D... = Different APIs (horizontal)
+    - Returns dict grouped by repository URL
+    file_path may also be a binary file object (e.g. an uploaded file's stream);
+    the workbook is opened once and every sheet parsed from it
+    on_progress(**progress) is called before each sheet and at the end (sheet, sheets_processed,
+    sheets_total, apis_found), and with error=... if parsing fails
+    """
+    try:
+        excel_file = pd.ExcelFile(file_path, engine='openpyxl')
+        all_apis = []
+        print(f"\n=== Parsing Transposed Excel ===")
+        print(f"Found {len(excel_file.sheet_names)} sheets: {excel_file.sheet_names}")
+        # Field name mapping from Excel to our internal structure
+        field_mapping = {
+            'API Repo': 'repository_url',
+            'apiId': 'repository_url',  # Alternative name
+            'API Object/API Technical Name': 'api_technical_name',
+            'version': 'version',
+            'apiContractURL': 'api_contract_url',
+            'businessApplicationID': 'snow_business_application_id',
+            'applicationServiceId': 'snow_application_service_id',
+            'classification': 'classification',
+            'sourceCode.pathToSource': 'source_code_path',
+            # Source code fields - exact Excel column names
+            'SourceCodeURL': 'source_code_url',
+            'SourceCode Reference': 'source_code_reference',
+            'Platform.provider': 'platform_provider',
+            'Platform.technology': 'platform_technology',
+            'Platform.team': 'platform_team',
+            'lifecycleStatus': 'lifecycle_status',
+            'consumers': 'consumers',
+            'consumers[].applicationServiceId': 'consumer_application_service_ids',
+            'gatewayType': 'gateway_type',
+            'proxyURL': 'gateway_proxy_url',
+            'configURL': 'gateway_config_url',
+            'apiHostingCountry': 'api_hosting_country',
+            'documentationURL': 'documentation_url',
+            'consumingCountryGroups': 'consuming_country_groups',
+            'countryCode': 'consuming_country_code',
+            'groupMemberCode': 'consuming_group_member_code',
+            'Application Name': 'application_name'
+        }
+        for sheet_index, sheet_name in enumerate(excel_file.sheet_names):
+            if on_progress:
+                on_progress(sheet=sheet_name, sheets_processed=sheet_index,
+                            sheets_total=len(excel_file.sheet_names), apis_found=len(all_apis))
+            print(f"\n--- Processing sheet: {sheet_name} ---")
+            df = excel_file.parse(sheet_name, header=None)
+            if df.empty or len(df.columns) < 2:
+                print(f"Skipping empty sheet: {sheet_name}")
+                continue
+            # Store EIM ID from sheet name for each API in this sheet
+            eim_id = sheet_name.strip()
+            # Column A (index 0) contains field names
+            # Columns B onwards (index 1+) contain API data
+            field_names = df.iloc[:, 0].tolist()
+            # Process each API column (starting from column B = index 1)
+            num_apis = len(df.columns) - 1
+            print(f"Found {num_apis} API columns")
+            for col_idx in range(1, len(df.columns)):
+                api_data = {}
+                api_values = df.iloc[:, col_idx].tolist()
+                # Map field names to values
+                for field_name, value in zip(field_names, api_values):
+                    if pd.notna(field_name) and pd.notna(value):
+                        field_name_clean = str(field_name).strip()
+                        # Map to internal field name
+                        internal_field = field_mapping.get(field_name_clean, field_name_clean.lower().replace(' ', '_'))
+                        api_data[internal_field] = value
+                # Only add if we have a repository URL
+                if 'repository_url' in api_data and api_data['repository_url']:
+                    # Add EIM ID to each API data
+                    api_data['eim_id'] = eim_id
+                    all_apis.append(api_data)
+                    print(f"  API {col_idx}: {api_data.get('api_technical_name', 'N/A')} -> {api_data.get('repository_url', 'N/A')} (EIM: {eim_id})")
+        if on_progress:
+            on_progress(sheet=None, sheets_processed=len(excel_file.sheet_names),
+                        sheets_total=len(excel_file.sheet_names), apis_found=len(all_apis))
+        print(f"\n=== Total APIs parsed: {len(all_apis)} ===")
+        # Group APIs by repository URL
+        grouped_by_repo = defaultdict(list)
+        for api in all_apis:
+            repo_url = normalize_repo_url(api['repository_url'])
+            grouped_by_repo[repo_url].append(api)
+        print(f"\n=== Grouped into {len(grouped_by_repo)} unique repositories ===")
+        for repo_url, apis in grouped_by_repo.items():
+            print(f"  {repo_url}: {len(apis)} API(s)")
+        return dict(grouped_by_repo)
+    except Exception as e:
+        print(f"Error parsing transposed Excel: {e}")
+        if on_progress:
+            on_progress(error=str(e))
+        import traceback
+        traceback.print_exc()
+        return None
@@ -4,12 +4,15 @@ from io import BytesIO
 import os
 import base64
 
+from github_client import get_github_client, github_auth_header
+
 
 def fetch_excel_from_github(repo_owner, repo_name, file_path, branch="main", github_base_url=None, token=None):
     """
     Fetches an Excel file from GitHub (including Enterprise) and returns parsed data.
     Handles transposed format where rows are field names and columns are records.
     Uses GitHub API with base64 decoding (proven working approach from app.py)
+    through the shared pooled GitHub client
     
     Args:
         repo_owner: GitHub repository owner/organization name
@@ -47,37 +50,15 @@ def fetch_excel_from_github(repo_owner, repo_name, file_path, branch="main", git
     
     # Add authentication if token provided
     if token:
-        headers['Authorization'] = f'Bearer {token}' if token.startswith('ghp_') or token.startswith('github_pat_') else f'token {token}'
+        headers['Authorization'] = github_auth_header(token)
         print("Using GitHub token authentication")
     else:
         print("WARNING: No GitHub token provided")
     
     params = {'ref': branch}
     
-    proxies = {
-        'http': os.environ.get('HTTP_PROXY', os.environ.get('http_proxy')),
-        'https': os.environ.get('HTTPS_PROXY', os.environ.get('https_proxy'))
-    }
-    proxies = {k: v for k, v in proxies.items() if v is not None}
-    
-    ssl_verify = os.environ.get('SSL_VERIFY', 'true').lower() != 'false'
-    ssl_cert_path = os.environ.get('SSL_CERT_PATH', None)
-    
-    if not ssl_verify:
-        import urllib3
-        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    elif ssl_cert_path:
-        ssl_verify = ssl_cert_path
-    
     try:
-        response = requests.get(
-            api_url,
-            headers=headers,
-            params=params,
-            proxies=proxies if proxies else None,
-            verify=ssl_verify,
-            timeout=30
-        )
+        response = get_github_client().get(api_url, headers=headers, params=params)
         
         response.raise_for_status()
         
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import requests
+
+
+GITHUB_CACHE_ENABLED = os.environ.get('GITHUB_CACHE_ENABLED', 'true').lower() != 'false'
+GITHUB_CACHE_MAX_ENTRIES = int(os.environ.get('GITHUB_CACHE_MAX_ENTRIES', '2048'))
+
+REPO_PATH_RE = re.compile(r'/repos/([^/?#]+)/([^/?#]+)')
+
+
+def repo_key_from_url(url):
+    """'owner/repo' (lowercase) for a /repos/{owner}/{repo}/... URL, else None"""
+    match = REPO_PATH_RE.search(url)
+    if not match:
+        return None
+    return f'{match.group(1).lower()}/{match.group(2).lower()}'
+
+
+class ConditionalRequestCache:
+    """
+    ETag / Last-Modified cache for GitHub GET responses.
+
+    - 200 responses carrying an ETag or Last-Modified are stored
+    - Replays send If-None-Match / If-Modified-Since; a 304 (which does not
+      count against the primary rate limit) is answered from the stored body
+    - Entries are keyed per token (hash of the Authorization header), URL
+      including query string and Accept header, so tokens never share data
+    - Any write to /repos/{owner}/{repo}/... drops that repository's entries
+    - LRU-bounded to GITHUB_CACHE_MAX_ENTRIES
+    """
+
+    def __init__(self, max_entries=GITHUB_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.repo_index = {}
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'invalidations': 0, 'evictions': 0}
+
+    @staticmethod
+    def cache_key(url, params, headers):
+        prepared = requests.models.PreparedRequest()
+        prepared.prepare_url(url, params)
+        headers = headers or {}
+        token_hash = hashlib.sha256((headers.get('Authorization') or '').encode()).hexdigest()[:16]
+        return (token_hash, prepared.url, headers.get('Accept', ''))
+
+    def conditional_headers(self, key):
+        """Validators to send for a cached entry (empty dict if nothing cached)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return {}
+            self.entries.move_to_end(key)
+            validators = {}
+            if entry['etag']:
+                validators['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                validators['If-Modified-Since'] = entry['last_modified']
+            return validators
+
+    def store(self, key, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if response.status_code != 200 or not (etag or last_modified):
+            return
+        repo_key = repo_key_from_url(key[1])
+        with self.lock:
+            self.entries[key] = {
+                'etag': etag,
+                'last_modified': last_modified,
+                'status_code': response.status_code,
+                'headers': dict(response.headers),
+                'content': response.content,
+                'encoding': response.encoding,
+                'repo': repo_key
+            }
+            self.entries.move_to_end(key)
+            if repo_key:
+                self.repo_index.setdefault(repo_key, set()).add(key)
+            self.stats['stores'] += 1
+            while len(self.entries) > self.max_entries:
+                old_key, old_entry = self.entries.popitem(last=False)
+                if old_entry['repo']:
+                    self.repo_index.get(old_entry['repo'], set()).discard(old_key)
+                self.stats['evictions'] += 1
+
+    def replay(self, key, not_modified):
+        """Rebuild the cached response for a 304 answer (fresh rate-limit headers are kept)"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.stats['misses'] += 1
+                return not_modified
+            self.stats['hits'] += 1
+
+        response = requests.Response()
+        response.status_code = entry['status_code']
+        response.headers = requests.structures.CaseInsensitiveDict(entry['headers'])
+        response.headers.update(not_modified.headers)
+        response._content = entry['content']
+        response.encoding = entry['encoding']
+        response.url = not_modified.url
+        response.request = not_modified.request
+        response.elapsed = not_modified.elapsed
+        response.from_cache = True
+        return response
+
+    def record_miss(self):
+        with self.lock:
+            self.stats['misses'] += 1
+
+    def invalidate_repo(self, owner, repo):
+        self.invalidate_repo_key(f'{owner.lower()}/{repo.lower()}')
+
+    def invalidate_repo_key(self, repo_key):
+        with self.lock:
+            keys = self.repo_index.pop(repo_key, set())
+            for key in keys:
+                self.entries.pop(key, None)
+            if keys:
+                self.stats['invalidations'] += len(keys)
+
+    def metrics(self):
+        with self.lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return {
+                'enabled': GITHUB_CACHE_ENABLED,
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hit_rate': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+                **self.stats
+            }
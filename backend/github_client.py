@@ -0,0 +1,197 @@
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from github_cache import GITHUB_CACHE_ENABLED, ConditionalRequestCache, repo_key_from_url
+from rate_limit import GITHUB_MAX_RATE_LIMIT_WAIT, GITHUB_RATE_LIMIT_RETRIES, get_rate_limiter
+from resilience import get_dependency
+
+
+# Connection pool / timeout / retry settings for GitHub Enterprise calls
+GITHUB_POOL_SIZE = int(os.environ.get('GITHUB_POOL_SIZE', '20'))
+GITHUB_CONNECT_TIMEOUT = float(os.environ.get('GITHUB_CONNECT_TIMEOUT', '5'))
+GITHUB_READ_TIMEOUT = float(os.environ.get('GITHUB_READ_TIMEOUT', '30'))
+GITHUB_MAX_RETRIES = int(os.environ.get('GITHUB_MAX_RETRIES', '3'))
+GITHUB_RETRY_BACKOFF = float(os.environ.get('GITHUB_RETRY_BACKOFF', '0.5'))
+
+# Optional explicit GraphQL endpoint; derived from the REST base URL when unset
+GITHUB_GRAPHQL_URL = os.environ.get('GITHUB_GRAPHQL_URL')
+
+# Only server-side failures are retried; 4xx answers are returned to the caller as-is
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+
+class GitHubClient:
+    """
+    Shared GitHub (Enterprise) HTTP client built on a pooled requests.Session.
+
+    - Keep-alive connections are reused across calls (one TCP+TLS handshake per
+      pooled connection instead of one per request through the proxy)
+    - Every request gets a default (connect, read) timeout unless one is passed
+    - Connection errors and 5xx responses are retried with exponential backoff;
+      non-idempotent methods (POST/PATCH) are only retried on connect errors
+    - PROXIES / SSL_VERIFY are applied to every request
+    - Every request is scheduled by the shared GitHubRateLimiter; rate-limited
+      responses pause traffic and are re-sent once the limit clears
+    - GETs are revalidated with ETag / Last-Modified (see github_cache); writes
+      to a repository invalidate its cached entries
+    - Requests go through the 'github' circuit breaker and bulkhead (see resilience)
+    """
+
+    def __init__(self, api_base, proxies=None, verify=True, pool_size=GITHUB_POOL_SIZE,
+                 timeout=(GITHUB_CONNECT_TIMEOUT, GITHUB_READ_TIMEOUT),
+                 max_retries=GITHUB_MAX_RETRIES, backoff_factor=GITHUB_RETRY_BACKOFF):
+        self.api_base = (api_base or '').rstrip('/')
+        self.proxies = proxies if proxies else None
+        self.verify = verify
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.limiter = get_rate_limiter()
+        self.cache = ConditionalRequestCache() if GITHUB_CACHE_ENABLED else None
+        self.guard = get_dependency('github')
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=max_retries,
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            raise_on_status=False,
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def url(self, path):
+        """Build an absolute URL; absolute URLs are passed through unchanged"""
+        if path.startswith('http://') or path.startswith('https://'):
+            return path
+        return f"{self.api_base}/{path.lstrip('/')}"
+
+    @property
+    def graphql_url(self):
+        """GraphQL endpoint: <host>/api/graphql on Enterprise (REST at <host>/api/v3), <base>/graphql otherwise"""
+        if GITHUB_GRAPHQL_URL:
+            return GITHUB_GRAPHQL_URL
+        if self.api_base.endswith('/api/v3'):
+            return self.api_base[:-len('/v3')] + '/graphql'
+        return f'{self.api_base}/graphql'
+
+    def request(self, method, url, max_wait=GITHUB_MAX_RATE_LIMIT_WAIT, **kwargs):
+        """
+        Send a request through the pooled session with the default proxy/SSL/timeout settings.
+        Raises rate_limit.GitHubRateLimited if quota would not be available within max_wait seconds,
+        resilience.DependencyUnavailable while GitHub's circuit is open or its bulkhead is full.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        kwargs.setdefault('proxies', self.proxies)
+        kwargs.setdefault('verify', self.verify)
+        full_url = self.url(url)
+        resource = 'graphql' if full_url == self.graphql_url else 'core'
+
+        cache_key = None
+        validators = {}
+        if self.cache is not None and method == 'GET':
+            cache_key = self.cache.cache_key(full_url, kwargs.get('params'), kwargs.get('headers'))
+            validators = self.cache.conditional_headers(cache_key)
+            if validators:
+                kwargs['headers'] = {**(kwargs.get('headers') or {}), **validators}
+        elif self.cache is not None and method not in ('HEAD', 'OPTIONS'):
+            repo_key = repo_key_from_url(full_url)
+            if repo_key:
+                self.cache.invalidate_repo_key(repo_key)
+
+        for _ in range(GITHUB_RATE_LIMIT_RETRIES + 1):
+            self.limiter.acquire(resource, max_wait=max_wait)
+            response = self.guard.call(self.session.request, method, full_url, **kwargs)
+            limited = response.status_code in (403, 429)
+            pause = self.limiter.record_response(response.status_code, response.headers, response.text if limited else '')
+            if pause is None:
+                break
+
+        if cache_key is not None:
+            if response.status_code == 304 and validators:
+                return self.cache.replay(cache_key, response)
+            self.cache.record_miss()
+            self.cache.store(cache_key, response)
+        return response
+
+    def invalidate_repo(self, owner, repo):
+        """Drop cached GETs for a repository (for writes that bypass REST, e.g. GraphQL mutations)"""
+        if self.cache is not None:
+            self.cache.invalidate_repo(owner, repo)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def patch(self, url, **kwargs):
+        return self.request('PATCH', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+
+def github_auth_header(token):
+    """Support both old (token) and new (Bearer) GitHub auth formats"""
+    return f'Bearer {token}' if token.startswith('ghp_') or token.startswith('github_pat_') else f'token {token}'
+
+
+def proxies_from_env():
+    """Proxy configuration - reads from environment variables"""
+    proxies = {
+        'http': os.environ.get('HTTP_PROXY', os.environ.get('http_proxy')),
+        'https': os.environ.get('HTTPS_PROXY', os.environ.get('https_proxy'))
+    }
+    return {k: v for k, v in proxies.items() if v is not None}
+
+
+def ssl_verify_from_env():
+    """SSL_VERIFY=false disables verification; SSL_CERT_PATH points at a custom CA bundle"""
+    ssl_verify = os.environ.get('SSL_VERIFY', 'true').lower() != 'false'
+    ssl_cert_path = os.environ.get('SSL_CERT_PATH', None)
+    if not ssl_verify:
+        import urllib3
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    elif ssl_cert_path:
+        ssl_verify = ssl_cert_path
+    return ssl_verify
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def configure_github_client(api_base, proxies=None, verify=True, **kwargs):
+    """Create (or replace) the process-wide GitHub client"""
+    global _client
+    with _client_lock:
+        _client = GitHubClient(api_base, proxies=proxies, verify=verify, **kwargs)
+        print(f"GitHub client: pool size {_client.pool_size}, timeout {_client.timeout}, retries {GITHUB_MAX_RETRIES}")
+        return _client
+
+
+def get_github_client():
+    """Return the process-wide GitHub client, building it from the environment if not configured yet"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GitHubClient(
+                    os.environ.get('GITHUB_API_BASE', 'https://alm-github.systems.uk.hsbc'),
+                    proxies=proxies_from_env(),
+                    verify=ssl_verify_from_env()
+                )
+    return _client
@@ -0,0 +1,406 @@
+import base64
+import hashlib
+
+import requests
+
+from github_client import get_github_client
+from rate_limit import GitHubRateLimited
+from resilience import DependencyUnavailable
+
+
+class GraphQLUnavailable(Exception):
+    """GraphQL endpoint (or a field/mutation we rely on) is not available - callers fall back to REST"""
+
+
+class GraphQLError(Exception):
+    """GraphQL request reached GitHub but failed"""
+
+    def __init__(self, message, errors=None, status_code=None):
+        super().__init__(message)
+        self.errors = errors or []
+        self.status_code = status_code
+
+    def http_status(self):
+        """Status to answer our own caller with: GitHub auth failures 401/403, a missing repository 404, else 502"""
+        types = {err.get('type') for err in self.errors}
+        if self.status_code in (401, 403):
+            return self.status_code
+        if 'FORBIDDEN' in types:
+            return 403
+        if 'NOT_FOUND' in types:
+            return 404
+        return 502
+
+
+def parse_graphql_response(status_code, body):
+    """
+    Return the 'data' member of a GraphQL response.
+
+    Raises GraphQLUnavailable when the endpoint or schema does not support the
+    document (so nothing was executed), GraphQLError for any other failure.
+    Partial results (data + errors) are returned as data with the errors under
+    '_errors'; callers inspect the individual fields they need.
+    """
+    if status_code in (404, 410):
+        raise GraphQLUnavailable(f'GraphQL endpoint not available ({status_code})')
+
+    if body is None:
+        raise GraphQLError('Non-JSON response from GraphQL endpoint', status_code=status_code)
+
+    errors = body.get('errors') or []
+    if any(err.get('extensions', {}).get('code') in ('undefinedField', 'undefinedType', 'argumentNotAccepted') for err in errors):
+        raise GraphQLUnavailable(f"GraphQL schema does not support this query: {errors[0].get('message')}")
+
+    if status_code != 200 or body.get('data') is None:
+        message = errors[0].get('message') if errors else body.get('message', 'Unknown error')
+        raise GraphQLError(f'GraphQL request failed: {message}', errors=errors, status_code=status_code)
+
+    data = body['data']
+    if errors:
+        data['_errors'] = errors
+    return data
+
+
+def run_graphql(query, variables, headers, client=None):
+    """POST a GraphQL document to GitHub through the shared client and return its 'data' member"""
+    client = client or get_github_client()
+    response = client.post(client.graphql_url, json={'query': query, 'variables': variables}, headers=headers)
+
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    return parse_graphql_response(response.status_code, body)
+
+
+BRANCH_FIELDS = ('name target { oid ... on Commit { tree { entries { name oid } } } } '
+                 'associatedPullRequests(states: OPEN, first: 1) { nodes { number url } }')
+
+COMMIT_CONTEXT_QUERY = """
+query($owner: String!, $name: String!, $qualifiedName: String!) {
+  repository(owner: $owner, name: $name) {
+    id
+    defaultBranchRef { name target { oid ... on Commit { tree { entries { name oid } } } } }
+    ref(qualifiedName: $qualifiedName) { %s }
+  }
+}
+""" % BRANCH_FIELDS
+
+# Same context without knowing the branch yet: the first page of branches with the prefix
+REPOSITORY_CONTEXT_QUERY = """
+query($owner: String!, $name: String!, $branchQuery: String!) {
+  repository(owner: $owner, name: $name) {
+    id
+    defaultBranchRef { name target { oid ... on Commit { tree { entries { name oid } } } } }
+    refs(refPrefix: "refs/heads/", query: $branchQuery, first: 100) {
+      pageInfo { hasNextPage }
+      nodes { %s }
+    }
+  }
+}
+""" % BRANCH_FIELDS
+
+
+def commit_context_variables(owner, repo, branch_name):
+    return {'owner': owner, 'name': repo, 'qualifiedName': f'refs/heads/{branch_name}'}
+
+
+def parse_branch(node):
+    target = node.get('target') or {}
+    entries = ((target.get('tree') or {}).get('entries')) or []
+    open_prs = (node.get('associatedPullRequests') or {}).get('nodes') or []
+    return {
+        'head_oid': target.get('oid'),
+        'files': {entry['name']: entry['oid'] for entry in entries},
+        'open_pr': open_prs[0] if open_prs else None
+    }
+
+
+def parse_commit_context(data, owner, repo):
+    """
+    Flatten COMMIT_CONTEXT_QUERY / REPOSITORY_CONTEXT_QUERY data into the dict
+    commit_file_and_open_pr expects. 'more_branches' is set when the branch list
+    was cut off, so a branch missing from it may still exist (see complete_commit_context).
+    """
+    repository = data.get('repository')
+    if not repository:
+        raise GraphQLError(f'Repository {owner}/{repo} not found or not accessible', errors=data.get('_errors'))
+
+    default_ref = repository.get('defaultBranchRef') or {}
+    default_target = default_ref.get('target') or {}
+    refs = repository.get('refs') or {}
+    nodes = (refs.get('nodes') or []) if 'refs' in repository else [repository.get('ref')]
+    branches = {node['name']: parse_branch(node) for node in nodes if node}
+
+    return {
+        'repository_id': repository['id'],
+        'default_branch': default_ref.get('name'),
+        'base_oid': default_target.get('oid'),
+        'base_files': {entry['name']: entry['oid'] for entry in ((default_target.get('tree') or {}).get('entries')) or []},
+        'branches': branches,
+        'more_branches': bool((refs.get('pageInfo') or {}).get('hasNextPage'))
+    }
+
+
+def fetch_commit_context(owner, repo, headers, branch_name, client=None):
+    """
+    Everything create_pr needs to know about a repository in one round trip:
+    repository id, default branch + head oid + root tree entries and, if branch_name
+    exists, its head oid, root tree entries and open PR (if any).
+    """
+    data = run_graphql(COMMIT_CONTEXT_QUERY, commit_context_variables(owner, repo, branch_name), headers, client=client)
+    return parse_commit_context(data, owner, repo)
+
+
+def fetch_repository_context(owner, repo, headers, branch_prefix='apix_', client=None):
+    """
+    fetch_commit_context for a branch not known yet (its name comes from the catalog lookup):
+    the first 100 branches starting with branch_prefix, so the query can run while the
+    catalog lookup is still in progress. Pass the result through complete_commit_context.
+    """
+    variables = {'owner': owner, 'name': repo, 'branchQuery': branch_prefix}
+    return parse_commit_context(run_graphql(REPOSITORY_CONTEXT_QUERY, variables, headers, client=client), owner, repo)
+
+
+def complete_commit_context(context, owner, repo, headers, branch_name, client=None):
+    """
+    Context that is certain about branch_name: when it is missing from a cut-off branch
+    list (more than 100 branches with the prefix), the branch itself is looked up
+    """
+    if branch_name in context['branches'] or not context['more_branches']:
+        return context
+    exact = fetch_commit_context(owner, repo, headers, branch_name, client=client)
+    return {**context, 'branches': {**context['branches'], **exact['branches']}, 'more_branches': False}
+
+
+def git_blob_sha(content):
+    """Git object id of a file with this content (what tree entries report as oid / the Contents API as sha)"""
+    data = content.encode() if isinstance(content, str) else content
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def commit_plan(context, branch_name, file_path, content):
+    """
+    What is left to do for file_path (a root-level path) with this content:
+      'noop'    - already identical on the branch with its PR open, or already on the default branch
+      'pr_only' - identical on the branch but no PR is open
+      'commit'  - content differs, a commit is needed
+    Compares git blob ids from the commit context, so no extra request is made.
+    """
+    blob_sha = git_blob_sha(content)
+    branch = context['branches'].get(branch_name)
+    branch_file = branch['files'].get(file_path) if branch else None
+
+    if branch and branch['open_pr']:
+        return 'noop' if branch_file == blob_sha else 'commit'
+    if context.get('base_files', {}).get(file_path) == blob_sha:
+        return 'noop'
+    if branch_file == blob_sha:
+        return 'pr_only'
+    return 'commit'
+
+
+def up_to_date_result(context, branch_name):
+    """commit_file_and_open_pr result when nothing had to be sent (see commit_plan)"""
+    branch = context['branches'].get(branch_name)
+    open_pr = branch['open_pr'] if branch else None
+    return {
+        'commit_oid': branch['head_oid'] if branch else context['base_oid'],
+        'pr_number': open_pr['number'] if open_pr else None,
+        'pr_url': open_pr['url'] if open_pr else None,
+        'branch_created': False,
+        'pr_created': False,
+        'up_to_date': True
+    }
+
+
+def build_commit_mutation(owner, repo, context, branch_name, file_path, content, commit_message, pr_title, pr_body,
+                          commit=True):
+    """
+    Mutation document + variables that create the branch (if needed), commit the
+    file (unless commit=False) and open the PR (if none is open). Mutations in one
+    document run sequentially, so createRef -> createCommitOnBranch ->
+    createPullRequest is safe to batch.
+    """
+    branch = context['branches'].get(branch_name)
+    head_oid = branch['head_oid'] if branch else context['base_oid']
+
+    declarations = []
+    selections = []
+    variables = {}
+    if commit:
+        declarations.append('$commitInput: CreateCommitOnBranchInput!')
+        variables['commitInput'] = {
+            'branch': {'repositoryNameWithOwner': f'{owner}/{repo}', 'branchName': branch_name},
+            'message': {'headline': commit_message},
+            'fileChanges': {'additions': [{'path': file_path, 'contents': base64.b64encode(content.encode()).decode()}]},
+            'expectedHeadOid': head_oid
+        }
+
+    if not branch:
+        declarations.append('$refInput: CreateRefInput!')
+        selections.append('createRef(input: $refInput) { ref { name } }')
+        variables['refInput'] = {
+            'repositoryId': context['repository_id'],
+            'name': f'refs/heads/{branch_name}',
+            'oid': context['base_oid']
+        }
+
+    if commit:
+        selections.append('createCommitOnBranch(input: $commitInput) { commit { oid } }')
+
+    open_pr = branch['open_pr'] if branch else None
+    if not open_pr:
+        declarations.append('$prInput: CreatePullRequestInput!')
+        selections.append('createPullRequest(input: $prInput) { pullRequest { number url } }')
+        variables['prInput'] = {
+            'repositoryId': context['repository_id'],
+            'baseRefName': context['default_branch'],
+            'headRefName': branch_name,
+            'title': pr_title,
+            'body': pr_body
+        }
+
+    mutation = 'mutation(%s) {\n  %s\n}' % (', '.join(declarations), '\n  '.join(selections))
+    return mutation, variables
+
+
+def parse_commit_result(data, context, branch_name, commit=True):
+    """Returns dict with commit_oid, pr_number, pr_url, branch_created, pr_created, up_to_date"""
+    branch = context['branches'].get(branch_name)
+    open_pr = branch['open_pr'] if branch else None
+
+    if commit:
+        commit_oid = ((data.get('createCommitOnBranch') or {}).get('commit') or {}).get('oid')
+        if not commit_oid:
+            raise GraphQLError('Failed to commit file to branch', errors=data.get('_errors'))
+    else:
+        commit_oid = branch['head_oid']
+
+    if open_pr:
+        pull_request = open_pr
+    else:
+        pull_request = (data.get('createPullRequest') or {}).get('pullRequest')
+        if not pull_request:
+            raise GraphQLError('Failed to create pull request', errors=data.get('_errors'))
+
+    return {
+        'commit_oid': commit_oid,
+        'pr_number': pull_request['number'],
+        'pr_url': pull_request['url'],
+        'branch_created': not branch,
+        'pr_created': not open_pr,
+        'up_to_date': not commit
+    }
+
+
+def commit_file_and_open_pr(owner, repo, headers, context, branch_name, file_path, content,
+                            commit_message, pr_title, pr_body, client=None):
+    """
+    Branch + commit + PR in a single GraphQL request (see build_commit_mutation).
+    No request at all if the content is already current (see commit_plan).
+    """
+    plan = commit_plan(context, branch_name, file_path, content)
+    if plan == 'noop':
+        return up_to_date_result(context, branch_name)
+
+    mutation, variables = build_commit_mutation(owner, repo, context, branch_name, file_path, content,
+                                                commit_message, pr_title, pr_body, commit=plan == 'commit')
+    client = client or get_github_client()
+    try:
+        data = run_graphql(mutation, variables, headers, client=client)
+    finally:
+        client.invalidate_repo(owner, repo)
+    return parse_commit_result(data, context, branch_name, commit=plan == 'commit')
+
+
+PR_STATUS_CHUNK_SIZE = 50
+
+
+def _pr_status_chunk(chunk, headers, client=None):
+    """One aliased query for up to PR_STATUS_CHUNK_SIZE (key, owner, repo, branch) tuples"""
+    declarations = []
+    selections = []
+    variables = {}
+    for idx, (_, owner, repo, branch_name) in enumerate(chunk):
+        declarations.append(f'$o{idx}: String!, $n{idx}: String!, $b{idx}: String!')
+        selections.append(
+            f'r{idx}: repository(owner: $o{idx}, name: $n{idx}) {{\n'
+            f'    ref(qualifiedName: $b{idx}) {{\n'
+            f'      associatedPullRequests(first: 1, orderBy: {{field: CREATED_AT, direction: DESC}}) {{\n'
+            f'        nodes {{ number url state merged mergedAt reviewDecision }}\n'
+            f'      }}\n'
+            f'    }}\n'
+            f'  }}'
+        )
+        variables[f'o{idx}'] = owner
+        variables[f'n{idx}'] = repo
+        variables[f'b{idx}'] = f'refs/heads/{branch_name}'
+
+    query = 'query(%s) {\n  %s\n}' % (', '.join(declarations), '\n  '.join(selections))
+    data = run_graphql(query, variables, headers, client=client)
+
+    results = {}
+    for idx, (key, owner, repo, branch_name) in enumerate(chunk):
+        repository = data.get(f'r{idx}')
+        if repository is None:
+            results[key] = {'error': f'Repository {owner}/{repo} not found or not accessible'}
+            continue
+        ref = repository.get('ref')
+        if ref is None:
+            results[key] = {'branch_exists': False, 'pr': None}
+            continue
+        prs = (ref.get('associatedPullRequests') or {}).get('nodes') or []
+        pr = None
+        if prs:
+            node = prs[0]
+            pr = {
+                'number': node['number'],
+                'html_url': node['url'],
+                # REST state vocabulary: merged PRs are 'closed' with merged=True
+                'state': 'open' if node['state'] == 'OPEN' else 'closed',
+                'merged': bool(node.get('merged')),
+                'merged_at': node.get('mergedAt'),
+                'review_decision': node.get('reviewDecision')
+            }
+        results[key] = {'branch_exists': True, 'pr': pr}
+    return results
+
+
+def fetch_pr_statuses(repos, headers, chunk_size=PR_STATUS_CHUNK_SIZE, executor=None, client=None):
+    """
+    Branch existence and latest PR for many repositories using one aliased
+    GraphQL query per chunk of repos (instead of 2-3 REST calls per repo).
+
+    Args:
+        repos: list of (key, owner, repo, branch_name) tuples
+        headers: GitHub auth headers
+        chunk_size: repositories per GraphQL request
+        executor: optional concurrent.futures executor to run chunks in parallel
+
+    Returns:
+        dict key -> {'branch_exists': bool, 'pr': dict or None} or {'error': str, 'status_code': int}
+        A chunk that fails marks only its own repositories as errored (retry_after when known;
+        graphql_unavailable when the endpoint does not serve the query and REST should be used).
+    """
+    chunks = [repos[i:i + chunk_size] for i in range(0, len(repos), chunk_size)]
+
+    def run_chunk(chunk):
+        try:
+            return _pr_status_chunk(chunk, headers, client=client)
+        except GraphQLError as e:
+            error = {'error': str(e), 'status_code': e.http_status()}
+        except GraphQLUnavailable as e:
+            error = {'error': str(e), 'status_code': 502, 'graphql_unavailable': True}
+        except GitHubRateLimited as e:
+            error = {'error': str(e), 'status_code': 429, 'retry_after': int(e.wait_seconds) + 1}
+        except DependencyUnavailable as e:
+            error = {**e.to_dict(), 'status_code': 503}
+        except requests.exceptions.RequestException as e:
+            error = {'error': f'GitHub request failed: {e}', 'status_code': 502}
+        return {key: dict(error) for key, _, _, _ in chunk}
+
+    results = {}
+    for chunk_results in (executor.map(run_chunk, chunks) if executor else map(run_chunk, chunks)):
+        results.update(chunk_results)
+    return results
@@ -0,0 +1,48 @@
+"""
+gunicorn settings: gunicorn -c gunicorn.conf.py (from the backend directory)
+
+The app is imported once in the master (preload_app), which warms it up (wsgi.py) before
+any worker is forked, so workers start with the catalog loaded and share it copy-on-write.
+Threads and database connections do not survive a fork: the master closes its connections
+and never starts the job runner; every worker opens its own and runs its own job runner
+(task claims are transactional, so runners in several workers never run a task twice).
+
+Upload sessions and upload progress live in a SQLite file shared by the workers (like PR
+state and jobs), so the follow-up requests of an upload can reach any worker.
+"""
+import gc
+import os
+
+# Read by app.py at import (in the master): the runner is started per worker in post_fork
+os.environ['JOB_RUNNER_AUTOSTART'] = 'false'
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('WEB_WORKERS', '1'))
+threads = int(os.environ.get('WEB_THREADS', '8'))
+worker_class = 'gthread'
+# Uploads and bulk requests can legitimately take a while
+timeout = int(os.environ.get('WEB_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+
+wsgi_app = 'wsgi:app'
+preload_app = True
+
+accesslog = '-'
+errorlog = '-'
+
+
+def when_ready(server):
+    """Master, app loaded and warmed up, no worker forked yet"""
+    import app
+
+    app.release_process_resources()
+    # Keep the loaded catalog out of garbage collection passes, whose bookkeeping
+    # writes would otherwise copy its memory pages into every worker
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    import app
+
+    app.init_worker_process()
@@ -0,0 +1,459 @@
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Durable bulk jobs (create_pr / publish over many repositories)
+JOBS_ENABLED = os.environ.get('JOBS_ENABLED', 'true').lower() != 'false'
+JOBS_DB_PATH = os.environ.get('JOBS_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'apix_jobs.db'))
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '4'))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', '3'))
+# First retry delay in seconds, doubled on every further attempt; up to JOB_RETRY_JITTER
+# of each delay is taken off at random so tasks failing together do not retry in lockstep
+JOB_RETRY_DELAY = float(os.environ.get('JOB_RETRY_DELAY', '30'))
+JOB_RETRY_JITTER = float(os.environ.get('JOB_RETRY_JITTER', '0.5'))
+# A task claimed longer ago than this is assumed lost (worker on another host died) and is handed out again
+JOB_TASK_LEASE = float(os.environ.get('JOB_TASK_LEASE', '300'))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', '1'))
+# Start the runner when app.py is imported; a pre-fork server (gunicorn.conf.py) turns this
+# off and starts one runner per worker process after the fork instead
+JOB_RUNNER_AUTOSTART = os.environ.get('JOB_RUNNER_AUTOSTART', 'true').lower() != 'false'
+
+JOB_STATUSES = ('running', 'paused', 'cancelled', 'completed')
+TASK_STATUSES = ('pending', 'running', 'succeeded', 'failed', 'cancelled')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    options TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    repository_url TEXT NOT NULL,
+    payload TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    result_url TEXT,
+    result TEXT,
+    idempotency_key TEXT,
+    not_before REAL NOT NULL DEFAULT 0,
+    claimed_by TEXT,
+    lease_expires REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_by_job ON tasks (job_id, status);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (status, not_before);
+"""
+# Columns added after the first release; created on databases that predate them
+MIGRATIONS = {
+    'idempotency_key': 'ALTER TABLE tasks ADD COLUMN idempotency_key TEXT'
+}
+KEY_INDEX = 'CREATE INDEX IF NOT EXISTS tasks_by_key ON tasks (idempotency_key, status)'
+
+
+class TaskFailed(Exception):
+    """A task failed; retryable failures are re-queued until JOB_MAX_ATTEMPTS"""
+
+    def __init__(self, message, retryable=False, retry_after=None, result=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.result = result
+
+
+def retry_delay(attempts, base=JOB_RETRY_DELAY, jitter=JOB_RETRY_JITTER):
+    """Exponential backoff with jitter: base * 2^(attempts-1), minus up to `jitter` of it"""
+    delay = base * (2 ** max(attempts - 1, 0))
+    return delay * (1 - jitter * random.random())
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """
+    SQLite-backed store of bulk jobs and their per-repository tasks.
+
+    A job is a batch of tasks of one kind; each task is one repository with
+    its status, attempts, last error and result URL. Tasks are claimed inside
+    an immediate transaction, so several worker threads (or processes sharing
+    the database file) never run the same task twice concurrently.
+    """
+
+    def __init__(self, db_path=JOBS_DB_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.connect()
+
+    def connect(self):
+        """(Re)open the database connection; a forked worker process must open its own"""
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        columns = {row['name'] for row in self.conn.execute('PRAGMA table_info(tasks)')}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self.conn.execute(statement)
+        self.conn.execute(KEY_INDEX)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _transaction(self, fn, *args):
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = fn(*args)
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            return result
+
+    def create_job(self, kind, tasks, options=None):
+        """
+        tasks: list of (repository_url, payload) where payload is any JSON-serializable value
+        Returns the new job id
+        """
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+
+        def insert():
+            self.conn.execute(
+                'INSERT INTO jobs (id, kind, status, options, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, 'running', json.dumps(options or {}), now, now)
+            )
+            self.conn.executemany(
+                'INSERT INTO tasks (job_id, repository_url, payload, updated_at) VALUES (?, ?, ?, ?)',
+                [(job_id, repo_url, json.dumps(payload), now) for repo_url, payload in tasks]
+            )
+            if not tasks:
+                self.conn.execute("UPDATE jobs SET status = 'completed' WHERE id = ?", (job_id,))
+
+        self._transaction(insert)
+        return job_id
+
+    def submit_once(self, kind, repository_url, payload, idempotency_key, options=None, reuse_succeeded_for=0):
+        """
+        Single-task job guarded by an idempotency key.
+        If a task with the same key is still pending/running, or succeeded less than
+        reuse_succeeded_for seconds ago, no job is created and that task's job is returned.
+        Returns (job_id, created)
+        """
+        now = time.time()
+
+        def submit():
+            row = self.conn.execute(
+                """
+                SELECT job_id FROM tasks
+                WHERE idempotency_key = ?
+                  AND (status IN ('pending', 'running') OR (status = 'succeeded' AND updated_at >= ?))
+                ORDER BY id DESC LIMIT 1
+                """,
+                (idempotency_key, now - reuse_succeeded_for)
+            ).fetchone()
+            if row is not None:
+                return row['job_id'], False
+            job_id = uuid.uuid4().hex[:12]
+            self.conn.execute(
+                'INSERT INTO jobs (id, kind, status, options, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, 'running', json.dumps(options or {}), now, now)
+            )
+            self.conn.execute(
+                'INSERT INTO tasks (job_id, repository_url, payload, idempotency_key, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (job_id, repository_url, json.dumps(payload), idempotency_key, now)
+            )
+            return job_id, True
+
+        return self._transaction(submit)
+
+    def claim_task(self):
+        """Next runnable task (pending, or running with an expired lease) of a running job, or None"""
+        now = time.time()
+
+        def claim():
+            row = self.conn.execute(
+                """
+                SELECT t.*, j.kind, j.options FROM tasks t JOIN jobs j ON j.id = t.job_id
+                WHERE j.status = 'running'
+                  AND ((t.status = 'pending' AND t.not_before <= ?) OR (t.status = 'running' AND t.lease_expires < ?))
+                ORDER BY t.not_before, t.id LIMIT 1
+                """,
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                """
+                UPDATE tasks SET status = 'running', attempts = attempts + 1, claimed_by = ?, lease_expires = ?, updated_at = ?
+                WHERE id = ?
+                """,
+                (self.worker_id, now + JOB_TASK_LEASE, now, row['id'])
+            )
+            task = dict(row)
+            task['attempts'] += 1
+            task['payload'] = json.loads(task['payload']) if task['payload'] else None
+            task['options'] = json.loads(task['options']) if task['options'] else {}
+            return task
+
+        return self._transaction(claim)
+
+    def recover_orphans(self):
+        """Re-queue tasks left 'running' by a dead process on this host (crash / restart)"""
+        host = socket.gethostname()
+
+        def recover():
+            rows = self.conn.execute(
+                "SELECT id, claimed_by FROM tasks WHERE status = 'running' AND claimed_by LIKE ?", (f'{host}:%',)
+            ).fetchall()
+            orphaned = []
+            for row in rows:
+                pid = int(row['claimed_by'].rsplit(':', 1)[1])
+                if pid == os.getpid() or not _pid_alive(pid):
+                    orphaned.append(row['id'])
+            self.conn.executemany(
+                "UPDATE tasks SET status = 'pending', attempts = MAX(attempts - 1, 0), claimed_by = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ?",
+                [(time.time(), task_id) for task_id in orphaned]
+            )
+            return len(orphaned)
+
+        return self._transaction(recover)
+
+    def complete_task(self, task_id, result_url=None, result=None):
+        def complete():
+            self.conn.execute(
+                """
+                UPDATE tasks SET status = 'succeeded', result_url = ?, result = ?, last_error = NULL,
+                    claimed_by = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ?
+                """,
+                (result_url, json.dumps(result) if result is not None else None, time.time(), task_id)
+            )
+            self._finish_job_if_done(task_id)
+
+        self._transaction(complete)
+
+    def fail_task(self, task_id, error, retryable=False, retry_after=None, result=None):
+        """
+        Record a failed attempt; returns True if the task was re-queued.
+        The job's options may override JOB_MAX_ATTEMPTS / JOB_RETRY_DELAY ('max_attempts', 'retry_delay').
+        """
+        def fail():
+            row = self.conn.execute(
+                'SELECT t.attempts, j.options FROM tasks t JOIN jobs j ON j.id = t.job_id WHERE t.id = ?', (task_id,)
+            ).fetchone()
+            options = json.loads(row['options']) if row['options'] else {}
+            requeue = retryable and row['attempts'] < options.get('max_attempts', JOB_MAX_ATTEMPTS)
+            now = time.time()
+            delay = retry_after if retry_after is not None else retry_delay(
+                row['attempts'], options.get('retry_delay', JOB_RETRY_DELAY)
+            )
+            not_before = now + delay
+            self.conn.execute(
+                """
+                UPDATE tasks SET status = ?, last_error = ?, result = ?, not_before = ?,
+                    claimed_by = NULL, lease_expires = NULL, updated_at = ?
+                WHERE id = ?
+                """,
+                ('pending' if requeue else 'failed', error, json.dumps(result) if result is not None else None,
+                 not_before if requeue else 0, now, task_id)
+            )
+            if not requeue:
+                self._finish_job_if_done(task_id)
+            return requeue
+
+        return self._transaction(fail)
+
+    def _finish_job_if_done(self, task_id):
+        job_id = self.conn.execute('SELECT job_id FROM tasks WHERE id = ?', (task_id,)).fetchone()['job_id']
+        self._complete_job_if_done(job_id)
+
+    def _complete_job_if_done(self, job_id):
+        """Mark a running job completed once it has no open task; True if it was"""
+        open_tasks = self.conn.execute(
+            "SELECT COUNT(*) FROM tasks WHERE job_id = ? AND status IN ('pending', 'running')", (job_id,)
+        ).fetchone()[0]
+        if open_tasks:
+            return False
+        return self.conn.execute(
+            "UPDATE jobs SET status = 'completed', updated_at = ? WHERE id = ? AND status = 'running'",
+            (time.time(), job_id)
+        ).rowcount > 0
+
+    def set_job_status(self, job_id, action):
+        """
+        action: 'pause', 'resume' or 'cancel'
+        Cancelling marks every pending task cancelled; tasks already running finish normally.
+        Resuming a job whose last tasks finished while it was paused completes it.
+        Returns the job's new status, or None if the job does not exist.
+        Raises ValueError if the action is not allowed in the job's current status.
+        """
+        transitions = {
+            'pause': ({'running'}, 'paused'),
+            'resume': ({'paused'}, 'running'),
+            'cancel': ({'running', 'paused'}, 'cancelled')
+        }
+        if action not in transitions:
+            raise ValueError(f'Unknown action: {action}')
+        allowed_from, new_status = transitions[action]
+
+        def update():
+            row = self.conn.execute('SELECT status FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return None
+            if row['status'] not in allowed_from:
+                raise ValueError(f"Cannot {action} a job that is {row['status']}")
+            now = time.time()
+            self.conn.execute('UPDATE jobs SET status = ?, updated_at = ? WHERE id = ?', (new_status, now, job_id))
+            if action == 'cancel':
+                self.conn.execute(
+                    "UPDATE tasks SET status = 'cancelled', updated_at = ? WHERE job_id = ? AND status = 'pending'",
+                    (now, job_id)
+                )
+            if action == 'resume' and self._complete_job_if_done(job_id):
+                return 'completed'
+            return new_status
+
+        return self._transaction(update)
+
+    def get_job(self, job_id, include_tasks=True):
+        with self.lock:
+            row = self.conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = self._job_dict(row)
+            if include_tasks:
+                tasks = self.conn.execute(
+                    'SELECT id, repository_url, status, attempts, last_error, result_url, result, idempotency_key, '
+                    'not_before, updated_at '
+                    'FROM tasks WHERE job_id = ? ORDER BY id',
+                    (job_id,)
+                ).fetchall()
+                job['tasks'] = [
+                    {**dict(task), 'result': json.loads(task['result']) if task['result'] else None}
+                    for task in tasks
+                ]
+            return job
+
+    def list_jobs(self, limit=50):
+        with self.lock:
+            rows = self.conn.execute('SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?', (limit,)).fetchall()
+            return [self._job_dict(row) for row in rows]
+
+    def _job_dict(self, row):
+        counts = dict.fromkeys(TASK_STATUSES, 0)
+        for status, count in self.conn.execute(
+            'SELECT status, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY status', (row['id'],)
+        ):
+            counts[status] = count
+        return {
+            'job_id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'options': json.loads(row['options']) if row['options'] else {},
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at'],
+            'total': sum(counts.values()),
+            'counts': counts
+        }
+
+
+class JobRunner:
+    """
+    Background workers for a JobStore.
+
+    A dispatcher thread claims tasks and hands them to a pool of `workers`
+    threads (bounded concurrency). handlers maps a job kind to
+    fn(repository_url, payload, options) -> dict, where the dict may carry a
+    'result_url'; raising TaskFailed records a (possibly retryable) failure and
+    any other exception is treated as a transient error and retried.
+    On start, tasks orphaned by a previous process are re-queued, so a
+    restarted server picks up unfinished jobs where they left off.
+    """
+
+    def __init__(self, store, handlers, workers=JOB_WORKERS):
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers
+        self.slots = threading.Semaphore(workers)
+        self.wakeup = threading.Event()
+        self.executor = None
+        self.thread = None
+
+    def start(self):
+        if self.thread is not None:
+            return
+        recovered = self.store.recover_orphans()
+        if recovered:
+            print(f"Job runner: re-queued {recovered} task(s) interrupted by a previous run")
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='apix-job')
+        self.thread = threading.Thread(target=self._dispatch, name='apix-job-dispatcher', daemon=True)
+        self.thread.start()
+
+    def notify(self):
+        """Wake the dispatcher (new job submitted or job resumed)"""
+        self.wakeup.set()
+
+    def _dispatch(self):
+        while True:
+            self.slots.acquire()
+            try:
+                task = self.store.claim_task()
+            except Exception as e:
+                print(f"Job runner: failed to claim a task: {e}")
+                task = None
+            if task is None:
+                self.slots.release()
+                self.wakeup.wait(JOB_POLL_INTERVAL)
+                self.wakeup.clear()
+                continue
+            self.executor.submit(self._run, task)
+
+    def _run(self, task):
+        try:
+            handler = self.handlers.get(task['kind'])
+            if handler is None:
+                self.store.fail_task(task['id'], f"No handler for job kind '{task['kind']}'")
+                return
+            try:
+                result = handler(task['repository_url'], task['payload'], task['options']) or {}
+            except TaskFailed as e:
+                requeued = self.store.fail_task(task['id'], str(e), e.retryable, e.retry_after, e.result)
+                print(f"Job {task['job_id']}: {task['repository_url']} failed (attempt {task['attempts']}"
+                      f"{', will retry' if requeued else ''}): {e}")
+                return
+            except Exception as e:
+                requeued = self.store.fail_task(task['id'], str(e), retryable=True)
+                print(f"Job {task['job_id']}: {task['repository_url']} errored (attempt {task['attempts']}"
+                      f"{', will retry' if requeued else ''}): {e}")
+                return
+            self.store.complete_task(task['id'], result.get('result_url'), result)
+        except Exception as e:
+            print(f"Job runner: could not record outcome of task {task['id']}: {e}")
+        finally:
+            self.slots.release()
+            self.wakeup.set()
@@ -0,0 +1,57 @@
+import math
+import os
+import threading
+import time
+from collections import deque
+
+
+# Samples kept per operation for the percentile estimates
+LATENCY_WINDOW = int(os.environ.get('LATENCY_WINDOW', '1000'))
+
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_samples)), 1)
+    return sorted_samples[rank - 1]
+
+
+class LatencyRecorder:
+    """Rolling per-operation latency samples (milliseconds) with p50 / p95 / max"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self.lock = threading.Lock()
+        self.samples = {}
+        self.counts = {}
+
+    def record(self, name, elapsed_ms):
+        with self.lock:
+            if name not in self.samples:
+                self.samples[name] = deque(maxlen=self.window)
+                self.counts[name] = 0
+            self.samples[name].append(elapsed_ms)
+            self.counts[name] += 1
+
+    def measure(self, name, fn, *args, **kwargs):
+        """Call fn, record how long it took under name and return (result, elapsed_ms)"""
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs), round((time.perf_counter() - started) * 1000, 1)
+        finally:
+            self.record(name, round((time.perf_counter() - started) * 1000, 1))
+
+    def summary(self):
+        with self.lock:
+            snapshot = {name: (sorted(samples), self.counts[name]) for name, samples in self.samples.items()}
+        return {
+            name: {
+                'count': count,
+                'window': len(samples),
+                'p50_ms': percentile(samples, 50),
+                'p95_ms': percentile(samples, 95),
+                'max_ms': samples[-1] if samples else None
+            }
+            for name, (samples, count) in sorted(snapshot.items())
+        }
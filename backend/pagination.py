@@ -0,0 +1,88 @@
+import math
+import os
+
+
+# Page size when a listing asks for pages without a limit, and the largest page served
+DEFAULT_PAGE_LIMIT = int(os.environ.get('DEFAULT_PAGE_LIMIT', '50'))
+MAX_PAGE_LIMIT = int(os.environ.get('MAX_PAGE_LIMIT', '1000'))
+
+LISTING_PARAMS = ('offset', 'limit', 'sort', 'fields', 'summary')
+
+
+def wants_listing(params):
+    """True if any paging / sorting / projection parameter is present"""
+    return any(params.get(name) not in (None, '') for name in LISTING_PARAMS)
+
+
+def parse_listing(params):
+    """
+    Listing options from query args or a JSON body:
+    offset, limit, sort ('field' or '-field' for descending),
+    fields (comma separated string or list) and summary.
+    Raises ValueError for invalid values.
+    """
+    try:
+        offset = int(params.get('offset') or 0)
+        limit = int(params.get('limit') or DEFAULT_PAGE_LIMIT)
+    except (TypeError, ValueError):
+        raise ValueError('offset and limit must be integers')
+    if offset < 0 or not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError(f'offset must be >= 0 and limit between 1 and {MAX_PAGE_LIMIT}')
+
+    sort = str(params.get('sort') or '').strip()
+    fields = params.get('fields') or []
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    summary = params.get('summary')
+
+    return {
+        'offset': offset,
+        'limit': limit,
+        'sort': sort.lstrip('-') or None,
+        'descending': sort.startswith('-'),
+        'fields': [str(field).strip() for field in fields if str(field).strip()],
+        'summary': summary is True or str(summary).lower() in ('1', 'true', 'yes')
+    }
+
+
+def is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def sort_value(value):
+    """Sort key that orders numbers, then strings (case-insensitive), then missing values"""
+    if is_missing(value):
+        return (2, '')
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, value)
+    return (1, str(value).lower())
+
+
+def paginate(items, listing, key=lambda item, field: item.get(field)):
+    """
+    Sort items by listing['sort'] (key(item, field) gives the value) and cut one page.
+    Items without the field come last in either direction.
+    Returns (page items, page metadata with total and next_offset)
+    """
+    if listing['sort']:
+        present, missing = [], []
+        for item in items:
+            (missing if is_missing(key(item, listing['sort'])) else present).append(item)
+        items = sorted(present, key=lambda item: sort_value(key(item, listing['sort'])),
+                       reverse=listing['descending']) + missing
+    offset, limit = listing['offset'], listing['limit']
+    end = offset + limit
+    return items[offset:end], {
+        'offset': offset,
+        'limit': limit,
+        'total': len(items),
+        'next_offset': end if end < len(items) else None,
+        'sort': ('-' if listing['descending'] else '') + listing['sort'] if listing['sort'] else None
+    }
+
+
+def project(record, fields):
+    """Only the requested fields of a record (all of them when fields is empty)"""
+    if not fields:
+        return record
+    return {field: record.get(field) for field in fields}
@@ -0,0 +1,171 @@
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+# Webhook-fed state is trusted for PR_STATE_MAX_AGE seconds; state learnt by polling
+# GitHub (no webhook configured / missed deliveries) only for PR_STATE_POLL_TTL seconds
+PR_STATE_MAX_AGE = float(os.environ.get('PR_STATE_MAX_AGE', '3600'))
+PR_STATE_POLL_TTL = float(os.environ.get('PR_STATE_POLL_TTL', '30'))
+GITHUB_WEBHOOK_SECRET = os.environ.get('GITHUB_WEBHOOK_SECRET')
+# Shared by every worker process: a webhook is delivered to one of them, status checks hit any
+PR_STATE_DB_PATH = os.environ.get(
+    'PR_STATE_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'apix_pr_state.db')
+)
+
+APIX_BRANCH_PREFIX = 'apix_'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pr_states (
+    repository TEXT NOT NULL,
+    branch TEXT NOT NULL,
+    branch_exists INTEGER NOT NULL,
+    pr TEXT,
+    source TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (repository, branch)
+);
+"""
+
+
+def verify_webhook_signature(secret, body, signature_header):
+    """Check X-Hub-Signature-256 ('sha256=<hex hmac of raw body>')"""
+    if not secret or not signature_header or not signature_header.startswith('sha256='):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature_header[len('sha256='):])
+
+
+class PRStateStore:
+    """
+    SQLite-backed per-repo state of apix_* branches and their latest PR.
+
+    Fed by GitHub webhooks (pull_request / create / delete) and by the results
+    of check_pr_status polls, so repeated status checks are answered without
+    calling GitHub. The database file is shared by all worker processes, so a
+    webhook received by one is seen by every other. Entries older than their
+    TTL are treated as unknown.
+    """
+
+    def __init__(self, db_path=PR_STATE_DB_PATH, max_age=PR_STATE_MAX_AGE, poll_ttl=PR_STATE_POLL_TTL):
+        self.db_path = db_path
+        self.max_age = max_age
+        self.poll_ttl = poll_ttl
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'webhook_updates': 0, 'poll_updates': 0}
+        self.connect()
+
+    def connect(self):
+        """(Re)open the database connection; a forked worker process must open its own"""
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    @staticmethod
+    def _key(owner, repo, branch_name):
+        return (f'{owner.lower()}/{repo.lower()}', branch_name)
+
+    def _load(self, key):
+        """Stored state for a key, whatever its age (caller holds the lock)"""
+        row = self.conn.execute(
+            'SELECT branch_exists, pr, source, updated_at FROM pr_states WHERE repository = ? AND branch = ?', key
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'branch_exists': bool(row['branch_exists']),
+            'pr': json.loads(row['pr']) if row['pr'] else None,
+            'source': row['source'],
+            'updated_at': row['updated_at']
+        }
+
+    def get(self, owner, repo, branch_name):
+        """Fresh state for the branch or None if unknown/stale"""
+        with self.lock:
+            state = self._load(self._key(owner, repo, branch_name))
+            ttl = self.max_age if state and state['source'] == 'webhook' else self.poll_ttl
+            if state is None or time.time() - state['updated_at'] > ttl:
+                self.stats['misses'] += 1
+                return None
+            self.stats['hits'] += 1
+            return state
+
+    def record(self, owner, repo, branch_name, branch_exists, pr=None, source='poll'):
+        """pr: latest PR in REST shape (number, html_url, state, merged, merged_at) or None"""
+        self._update(self._key(owner, repo, branch_name), lambda previous: (branch_exists, pr), source)
+
+    def _update(self, key, change, source):
+        """
+        Read-modify-write of one entry in an immediate transaction (other processes write too):
+        change(previous state or None) gives the new (branch_exists, pr)
+        """
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                previous = self._load(key)
+                branch_exists, pr = change(previous)
+                # A webhook for an older PR must not replace the latest one
+                if pr and previous and previous['pr'] and previous['pr']['number'] > pr['number']:
+                    pr = previous['pr']
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO pr_states (repository, branch, branch_exists, pr, source, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?)',
+                    (*key, int(bool(branch_exists)), json.dumps(pr) if pr else None, source, time.time())
+                )
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            self.stats['webhook_updates' if source == 'webhook' else 'poll_updates'] += 1
+
+    def apply_webhook(self, event, payload):
+        """
+        Update state from a GitHub webhook delivery.
+        Returns a short description of what was applied (None if the event was ignored).
+        """
+        repository = payload.get('repository') or {}
+        full_name = repository.get('full_name') or ''
+        if '/' not in full_name:
+            return None
+        owner, repo = full_name.split('/', 1)
+
+        if event == 'pull_request':
+            pull_request = payload.get('pull_request') or {}
+            branch_name = (pull_request.get('head') or {}).get('ref', '')
+            if not branch_name.startswith(APIX_BRANCH_PREFIX):
+                return None
+            pr = {
+                'number': pull_request['number'],
+                'html_url': pull_request.get('html_url'),
+                'state': pull_request.get('state'),
+                'merged': bool(pull_request.get('merged')),
+                'merged_at': pull_request.get('merged_at')
+            }
+            self._update(self._key(owner, repo, branch_name),
+                         lambda previous: (previous['branch_exists'] if previous else True, pr), 'webhook')
+            return f"PR #{pr['number']} {payload.get('action')} on {full_name}:{branch_name}"
+
+        if event in ('create', 'delete'):
+            branch_name = payload.get('ref', '')
+            if payload.get('ref_type') != 'branch' or not branch_name.startswith(APIX_BRANCH_PREFIX):
+                return None
+            self._update(self._key(owner, repo, branch_name),
+                         lambda previous: (event == 'create', previous['pr'] if previous else None), 'webhook')
+            return f"branch {branch_name} {'created' if event == 'create' else 'deleted'} on {full_name}"
+
+        return None
+
+    def metrics(self):
+        with self.lock:
+            count = self.conn.execute('SELECT COUNT(*) FROM pr_states').fetchone()[0]
+            return {'tracked_branches': count, **self.stats}
@@ -0,0 +1,136 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from validation_cache import canonical_json, document_hash
+
+
+# Last successfully published version of every API, so unchanged APIs are not re-sent to APIX
+PUBLISH_SNAPSHOTS_ENABLED = os.environ.get('PUBLISH_SNAPSHOTS_ENABLED', 'true').lower() != 'false'
+PUBLISH_SNAPSHOT_DB_PATH = os.environ.get(
+    'PUBLISH_SNAPSHOT_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'apix_snapshots.db')
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    eim_id TEXT NOT NULL,
+    api_technical_name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    document TEXT NOT NULL,
+    repository_url TEXT,
+    published_at REAL NOT NULL,
+    PRIMARY KEY (eim_id, api_technical_name, version)
+);
+"""
+
+
+def structural_diff(old, new, path=''):
+    """
+    Paths that differ between two JSON values: [{'path', 'change': added|removed|changed}]
+    Objects are compared key by key, lists of equal length item by item.
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in sorted(set(old) | set(new), key=str):
+            child = f'{path}.{key}' if path else str(key)
+            if key not in old:
+                changes.append({'path': child, 'change': 'added'})
+            elif key not in new:
+                changes.append({'path': child, 'change': 'removed'})
+            else:
+                changes.extend(structural_diff(old[key], new[key], child))
+        return changes
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changes = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            changes.extend(structural_diff(old_item, new_item, f'{path}[{index}]'))
+        return changes
+    if canonical_json(old) != canonical_json(new):
+        return [{'path': path or '$', 'change': 'changed'}]
+    return []
+
+
+def snapshot_key(eim_id, block):
+    return (str(eim_id), str(block.get('apiTechnicalName', '')), str(block.get('version', '')))
+
+
+class SnapshotStore:
+    """
+    SQLite store of the last successfully published canonical block per API,
+    keyed by EIM + apiTechnicalName + version.
+    """
+
+    def __init__(self, db_path=PUBLISH_SNAPSHOT_DB_PATH):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.stats = {'unchanged': 0, 'modified': 0, 'new': 0, 'recorded': 0}
+        self.connect()
+
+    def connect(self):
+        """(Re)open the database connection; a forked worker process must open its own"""
+        self.conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def plan(self, eim_id, blocks):
+        """
+        Split API blocks into those to publish and those identical to their last published version.
+        Returns (changed, unchanged): changed is a list of (block, change) where change describes
+        the API ('new' or 'modified' with the differing fields), unchanged a list of blocks.
+        """
+        keys = [snapshot_key(eim_id, block) for block in blocks]
+        with self.lock:
+            rows = {
+                (row['eim_id'], row['api_technical_name'], row['version']): row
+                for row in self.conn.execute(
+                    f"SELECT * FROM snapshots WHERE eim_id = ? AND api_technical_name IN ({', '.join('?' * len(keys))})",
+                    (str(eim_id), *[key[1] for key in keys])
+                )
+            } if keys else {}
+
+        changed, unchanged = [], []
+        for key, block in zip(keys, blocks):
+            row = rows.get(key)
+            change = {'apiTechnicalName': key[1], 'version': key[2]}
+            if row is None:
+                changed.append((block, {**change, 'change': 'new'}))
+            elif row['content_hash'] != document_hash(block):
+                fields = structural_diff(json.loads(row['document']), block)
+                changed.append((block, {**change, 'change': 'modified', 'fields': fields,
+                                        'last_published_at': row['published_at']}))
+            else:
+                unchanged.append(block)
+        with self.lock:
+            self.stats['unchanged'] += len(unchanged)
+            for _, change in changed:
+                self.stats[change['change']] += 1
+        return changed, unchanged
+
+    def record(self, eim_id, blocks, repository_url=None):
+        """Remember blocks APIX accepted as the last published version of their APIs"""
+        now = time.time()
+        rows = [
+            (*snapshot_key(eim_id, block), document_hash(block), canonical_json(block), repository_url, now)
+            for block in blocks
+        ]
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO snapshots (eim_id, api_technical_name, version, content_hash, document, '
+                'repository_url, published_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self.stats['recorded'] += len(rows)
+
+    def metrics(self):
+        with self.lock:
+            count = self.conn.execute('SELECT COUNT(*) FROM snapshots').fetchone()[0]
+            return {'enabled': PUBLISH_SNAPSHOTS_ENABLED, 'apis': count, **self.stats}
@@ -0,0 +1,178 @@
+import asyncio
+import os
+import threading
+import time
+
+
+# Client-side pacing for GitHub API calls
+GITHUB_MAX_REQUESTS_PER_SECOND = float(os.environ.get('GITHUB_MAX_REQUESTS_PER_SECOND', '10'))
+GITHUB_RATE_LIMIT_BURST = int(os.environ.get('GITHUB_RATE_LIMIT_BURST', '20'))
+# Requests kept in reserve per rate-limit window (interactive calls still work during bulk runs)
+GITHUB_RATE_LIMIT_RESERVE = int(os.environ.get('GITHUB_RATE_LIMIT_RESERVE', '50'))
+# Below this fraction of the primary quota, requests are spread evenly over the rest of the window
+GITHUB_RATE_LIMIT_PACING_THRESHOLD = float(os.environ.get('GITHUB_RATE_LIMIT_PACING_THRESHOLD', '0.25'))
+# Pause applied on a secondary rate limit without Retry-After (GitHub docs: wait at least a minute)
+GITHUB_SECONDARY_LIMIT_PAUSE = float(os.environ.get('GITHUB_SECONDARY_LIMIT_PAUSE', '60'))
+# Longest an interactive (UI) request / a bulk request will wait for quota before giving up
+GITHUB_MAX_RATE_LIMIT_WAIT = float(os.environ.get('GITHUB_MAX_RATE_LIMIT_WAIT', '30'))
+GITHUB_BULK_MAX_RATE_LIMIT_WAIT = float(os.environ.get('GITHUB_BULK_MAX_RATE_LIMIT_WAIT', '3600'))
+# Times a rate-limited request is re-sent after the pause
+GITHUB_RATE_LIMIT_RETRIES = int(os.environ.get('GITHUB_RATE_LIMIT_RETRIES', '2'))
+
+
+class GitHubRateLimited(Exception):
+    """Waiting for GitHub quota would take longer than the caller allows"""
+
+    def __init__(self, wait_seconds, resource):
+        super().__init__(f'GitHub {resource} rate limit exhausted; retry in {int(wait_seconds) + 1}s')
+        self.wait_seconds = wait_seconds
+        self.resource = resource
+
+
+class GitHubRateLimiter:
+    """
+    Central token-bucket scheduler for every GitHub request (sync and async clients).
+
+    - Requests take a token from a bucket refilled at GITHUB_MAX_REQUESTS_PER_SECOND
+    - Once X-RateLimit-Remaining drops below the pacing threshold, the refill
+      rate is lowered so the remaining quota (minus a reserve) lasts until
+      X-RateLimit-Reset; bulk callers stop at the reserve, interactive callers may use it
+    - 403/429 secondary limits (Retry-After or 'secondary rate limit') pause all
+      requests until the limit clears, then traffic resumes automatically
+    - Quotas are tracked per X-RateLimit-Resource (core, graphql, ...)
+    """
+
+    def __init__(self, rate=GITHUB_MAX_REQUESTS_PER_SECOND, burst=GITHUB_RATE_LIMIT_BURST,
+                 reserve=GITHUB_RATE_LIMIT_RESERVE, secondary_pause=GITHUB_SECONDARY_LIMIT_PAUSE):
+        self.rate = rate
+        self.burst = burst
+        self.reserve = reserve
+        self.secondary_pause = secondary_pause
+        self.lock = threading.Lock()
+        self.tokens = float(burst)
+        self.refilled_at = time.monotonic()
+        self.paused_until = 0.0
+        # resource -> {'limit', 'remaining', 'used', 'reset'} (reset is epoch seconds)
+        self.quotas = {}
+        self.stats = {'requests': 0, 'waits': 0, 'total_wait_s': 0.0, 'max_wait_s': 0.0, 'secondary_limit_hits': 0, 'primary_limit_hits': 0}
+
+    def _effective_rate(self, resource, floor):
+        quota = self.quotas.get(resource)
+        if not quota:
+            return self.rate
+        window = quota['reset'] - time.time()
+        if window <= 0 or quota['remaining'] > quota['limit'] * GITHUB_RATE_LIMIT_PACING_THRESHOLD:
+            return self.rate
+        return max(min(self.rate, (quota['remaining'] - floor) / window), 0.0)
+
+    def reserve_slot(self, resource='core', interactive=True):
+        """Reserve the next request slot; returns seconds the caller must wait before sending"""
+        floor = 0 if interactive else self.reserve
+        with self.lock:
+            now = time.monotonic()
+            wait = max(self.paused_until - now, 0.0)
+
+            quota = self.quotas.get(resource)
+            if quota and quota['remaining'] <= floor and quota['reset'] > time.time():
+                wait = max(wait, quota['reset'] - time.time())
+
+            rate = self._effective_rate(resource, floor)
+            if rate > 0:
+                self.tokens = min(self.burst, self.tokens + (now - self.refilled_at) * rate)
+                self.refilled_at = now
+                if self.tokens < 1:
+                    wait = max(wait, (1 - self.tokens) / rate)
+                self.tokens -= 1
+            else:
+                self.refilled_at = now
+
+            self.stats['requests'] += 1
+            if wait > 0:
+                self.stats['waits'] += 1
+                self.stats['total_wait_s'] += wait
+                self.stats['max_wait_s'] = max(self.stats['max_wait_s'], wait)
+            return wait
+
+    def acquire(self, resource='core', max_wait=None, interactive=True):
+        """Block until a request may be sent (raises GitHubRateLimited if that exceeds max_wait)"""
+        wait = self.reserve_slot(resource, interactive)
+        if max_wait is not None and wait > max_wait:
+            raise GitHubRateLimited(wait, resource)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, resource='core', max_wait=None, interactive=False):
+        wait = self.reserve_slot(resource, interactive)
+        if max_wait is not None and wait > max_wait:
+            raise GitHubRateLimited(wait, resource)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def record_response(self, status_code, headers, body_text=''):
+        """
+        Update quotas from response headers.
+        Returns seconds to pause before retrying if the response was rate limited, else None.
+        """
+        resource = headers.get('X-RateLimit-Resource', 'core')
+        with self.lock:
+            if headers.get('X-RateLimit-Remaining') is not None:
+                try:
+                    self.quotas[resource] = {
+                        'limit': int(headers.get('X-RateLimit-Limit', 0)),
+                        'remaining': int(headers['X-RateLimit-Remaining']),
+                        'used': int(headers.get('X-RateLimit-Used', 0)),
+                        'reset': int(headers.get('X-RateLimit-Reset', 0))
+                    }
+                except ValueError:
+                    pass
+
+            if status_code not in (403, 429):
+                return None
+
+            retry_after = headers.get('Retry-After')
+            quota = self.quotas.get(resource)
+            if retry_after is not None:
+                try:
+                    pause = float(retry_after)
+                except ValueError:
+                    pause = self.secondary_pause
+                self.stats['secondary_limit_hits'] += 1
+            elif quota and quota['remaining'] == 0:
+                pause = max(quota['reset'] - time.time(), 1.0)
+                self.stats['primary_limit_hits'] += 1
+            elif 'secondary rate limit' in (body_text or '').lower():
+                pause = self.secondary_pause
+                self.stats['secondary_limit_hits'] += 1
+            else:
+                # Plain permission error, not a rate limit
+                return None
+
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            print(f"GitHub rate limited ({status_code}, {resource}); pausing requests for {pause:.0f}s")
+            return pause
+
+    def metrics(self):
+        with self.lock:
+            now = time.monotonic()
+            rate = self._effective_rate('core', 0)
+            return {
+                'configured_rate_per_s': self.rate,
+                'reserve': self.reserve,
+                'effective_rate_per_s': round(rate, 3),
+                'tokens_available': round(min(self.burst, self.tokens + (now - self.refilled_at) * rate), 2),
+                'paused_for_s': round(max(self.paused_until - now, 0.0), 1),
+                'next_wait_s': round(max(self.paused_until - now, 0.0, (1 - self.tokens) / rate if rate > 0 and self.tokens < 1 else 0.0), 3),
+                'quotas': {
+                    resource: {**quota, 'reset_in_s': max(int(quota['reset'] - time.time()), 0)}
+                    for resource, quota in self.quotas.items()
+                },
+                **{key: round(value, 3) if isinstance(value, float) else value for key, value in self.stats.items()}
+            }
+
+
+_limiter = GitHubRateLimiter()
+
+
+def get_rate_limiter():
+    """Process-wide limiter shared by all GitHub clients"""
+    return _limiter
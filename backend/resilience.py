@@ -0,0 +1,211 @@
+import os
+import threading
+import time
+
+
+# Per-dependency circuit breakers: open after N consecutive failures (errors, 5xx or calls
+# slower than *_SLOW_CALL_MS), stay open for *_OPEN_SECONDS, then let one probe call through
+APIX_BREAKER_FAILURES = int(os.environ.get('APIX_BREAKER_FAILURES', '5'))
+APIX_SLOW_CALL_MS = float(os.environ.get('APIX_SLOW_CALL_MS', '10000'))
+APIX_BREAKER_OPEN_SECONDS = float(os.environ.get('APIX_BREAKER_OPEN_SECONDS', '30'))
+GITHUB_BREAKER_FAILURES = int(os.environ.get('GITHUB_BREAKER_FAILURES', '5'))
+GITHUB_SLOW_CALL_MS = float(os.environ.get('GITHUB_SLOW_CALL_MS', '15000'))
+GITHUB_BREAKER_OPEN_SECONDS = float(os.environ.get('GITHUB_BREAKER_OPEN_SECONDS', '30'))
+
+# Bulkheads: calls in flight per dependency, and how long a caller waits for a free slot
+# before being turned away (keeps a slow dependency from tying up every request thread)
+APIX_MAX_CONCURRENT_CALLS = int(os.environ.get('APIX_MAX_CONCURRENT_CALLS', '8'))
+APIX_BULKHEAD_WAIT = float(os.environ.get('APIX_BULKHEAD_WAIT', '2'))
+# GitHub's default sits well above the IO executor (IO_WORKERS), where bulk status checks and bulk
+# PR creation run: that work alone never fills the bulkhead, request threads get the slots above it
+IO_WORKERS = int(os.environ.get('IO_WORKERS', '16'))
+GITHUB_MAX_CONCURRENT_CALLS = int(os.environ.get('GITHUB_MAX_CONCURRENT_CALLS', str(2 * IO_WORKERS)))
+GITHUB_BULKHEAD_WAIT = float(os.environ.get('GITHUB_BULKHEAD_WAIT', '5'))
+
+# Answers that count as a dependency failure (4xx are the caller's problem, not the dependency's)
+FAILURE_STATUS_CODES = (500, 502, 503, 504)
+
+
+class DependencyUnavailable(Exception):
+    """A call was not attempted: the dependency's circuit is open or its bulkhead is full"""
+
+    def __init__(self, dependency, reason, retry_after):
+        self.dependency = dependency
+        self.reason = reason
+        self.retry_after = retry_after
+        detail = 'circuit open' if reason == 'circuit_open' else 'too many calls in flight'
+        super().__init__(f'{dependency} is unavailable ({detail}); retry in {int(retry_after) + 1}s')
+
+    def to_dict(self):
+        return {'error': str(self), 'dependency': self.dependency, 'reason': self.reason,
+                'retry_after': int(self.retry_after) + 1}
+
+
+class CircuitBreaker:
+    """
+    closed -> open after failure_threshold consecutive failures (a call slower than
+    slow_call_ms counts as one); open -> half_open once open_seconds have passed,
+    when a single probe is let through: success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, name, failure_threshold, slow_call_ms, open_seconds):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.slow_call_ms = slow_call_ms
+        self.open_seconds = open_seconds
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.stats = {'calls': 0, 'failures': 0, 'slow_calls': 0, 'rejected': 0, 'opened': 0}
+
+    def before_call(self):
+        """Raises DependencyUnavailable while open; returns True if this call is the half-open probe"""
+        with self.lock:
+            if self.state == 'open':
+                remaining = self.opened_at + self.open_seconds - time.time()
+                if remaining > 0:
+                    self.stats['rejected'] += 1
+                    raise DependencyUnavailable(self.name, 'circuit_open', remaining)
+                self.state = 'half_open'
+            if self.state == 'half_open':
+                if self.probe_in_flight:
+                    self.stats['rejected'] += 1
+                    raise DependencyUnavailable(self.name, 'circuit_open', 1)
+                self.probe_in_flight = True
+                return True
+            self.stats['calls'] += 1
+            return False
+
+    def cancel_probe(self):
+        """The probe call was not made after all; the next caller probes instead"""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def record(self, ok, elapsed_ms, probe=False):
+        slow = elapsed_ms > self.slow_call_ms
+        with self.lock:
+            if probe:
+                self.probe_in_flight = False
+                self.stats['calls'] += 1
+            if slow:
+                self.stats['slow_calls'] += 1
+            if ok and not slow:
+                self.failures = 0
+                if self.state == 'half_open':
+                    self.state = 'closed'
+                    print(f"Circuit {self.name}: closed (probe succeeded)")
+                return
+            self.stats['failures'] += 1
+            self.failures += 1
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.state = 'open'
+                self.opened_at = time.time()
+                self.stats['opened'] += 1
+                print(f"Circuit {self.name}: open for {self.open_seconds}s after {self.failures} failure(s)"
+                      f"{' (slow calls)' if slow else ''}")
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'slow_call_ms': self.slow_call_ms,
+                'open_seconds': self.open_seconds,
+                **self.stats
+            }
+
+
+class Bulkhead:
+    """
+    Bounded concurrency for one dependency; callers wait at most max_wait for a slot,
+    except queued (bulk) callers, which bound their own concurrency and wait their turn
+    """
+
+    def __init__(self, name, max_concurrent, max_wait):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_wait = max_wait
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.stats = {'rejected': 0, 'peak_in_flight': 0}
+
+    def acquire(self, queued=False):
+        if not self.slots.acquire(timeout=None if queued else self.max_wait):
+            with self.lock:
+                self.stats['rejected'] += 1
+            raise DependencyUnavailable(self.name, 'bulkhead_full', self.max_wait)
+        with self.lock:
+            self.in_flight += 1
+            self.stats['peak_in_flight'] = max(self.stats['peak_in_flight'], self.in_flight)
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def metrics(self):
+        with self.lock:
+            return {'max_concurrent': self.max_concurrent, 'max_wait_s': self.max_wait, 'in_flight': self.in_flight, **self.stats}
+
+
+class Dependency:
+    """Circuit breaker + bulkhead guarding the calls to one remote service"""
+
+    def __init__(self, name, breaker, bulkhead):
+        self.name = name
+        self.breaker = breaker
+        self.bulkhead = bulkhead
+
+    def call(self, fn, *args, queued=False, **kwargs):
+        """
+        fn(*args, **kwargs) under the breaker and the bulkhead.
+        queued: wait for a bulkhead slot however long it takes instead of being turned away
+        Exceptions and responses with a 5xx status_code are recorded as failures.
+        Raises DependencyUnavailable if the call was not attempted.
+        """
+        probe = self.breaker.before_call()
+        try:
+            self.bulkhead.acquire(queued)
+        except DependencyUnavailable:
+            if probe:
+                self.breaker.cancel_probe()
+            raise
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = fn(*args, **kwargs)
+            ok = getattr(result, 'status_code', None) not in FAILURE_STATUS_CODES
+            return result
+        finally:
+            self.bulkhead.release()
+            self.breaker.record(ok, (time.perf_counter() - started) * 1000, probe=probe)
+
+    def metrics(self):
+        return {'circuit': self.breaker.metrics(), 'bulkhead': self.bulkhead.metrics()}
+
+
+_dependencies = {
+    'apix': Dependency(
+        'apix',
+        CircuitBreaker('apix', APIX_BREAKER_FAILURES, APIX_SLOW_CALL_MS, APIX_BREAKER_OPEN_SECONDS),
+        Bulkhead('apix', APIX_MAX_CONCURRENT_CALLS, APIX_BULKHEAD_WAIT)
+    ),
+    'github': Dependency(
+        'github',
+        CircuitBreaker('github', GITHUB_BREAKER_FAILURES, GITHUB_SLOW_CALL_MS, GITHUB_BREAKER_OPEN_SECONDS),
+        Bulkhead('github', GITHUB_MAX_CONCURRENT_CALLS, GITHUB_BULKHEAD_WAIT)
+    )
+}
+
+
+def get_dependency(name):
+    """The process-wide guard for 'apix' or 'github'"""
+    return _dependencies[name]
+
+
+def dependencies_metrics():
+    return {name: dependency.metrics() for name, dependency in _dependencies.items()}
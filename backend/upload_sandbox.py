@@ -0,0 +1,233 @@
+import io
+import json
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+from datetime import date, datetime
+
+from excel_parser import parse_transposed_excel
+
+try:
+    import resource
+except ImportError:  # not available on Windows: the wall-clock timeout still applies
+    resource = None
+
+
+# Uploaded workbooks are parsed in a separate worker process (UPLOAD_SANDBOX_ENABLED=false
+# parses in the web process) with limits on CPU seconds, address space and wall-clock time
+UPLOAD_SANDBOX_ENABLED = os.environ.get('UPLOAD_SANDBOX_ENABLED', 'true').lower() != 'false'
+UPLOAD_PARSE_TIMEOUT = float(os.environ.get('UPLOAD_PARSE_TIMEOUT', '120'))
+UPLOAD_PARSE_CPU_SECONDS = int(os.environ.get('UPLOAD_PARSE_CPU_SECONDS', '60'))
+UPLOAD_PARSE_MEMORY_MB = int(os.environ.get('UPLOAD_PARSE_MEMORY_MB', '1024'))
+# An .xlsx is a zip archive: workbooks that would expand beyond this are rejected unparsed
+UPLOAD_MAX_DECOMPRESSED_BYTES = int(os.environ.get('UPLOAD_MAX_DECOMPRESSED_BYTES', str(256 * 1024 * 1024)))
+
+SANDBOX_SCRIPT = os.path.abspath(__file__)
+
+# Keep numeric libraries to one thread in the worker (thread pools reserve address space)
+WORKER_ENV = {'OPENBLAS_NUM_THREADS': '1', 'OMP_NUM_THREADS': '1', 'MKL_NUM_THREADS': '1', 'PYTHONUNBUFFERED': '1'}
+# The only variables passed on from the server environment (tokens, credentials and proxies are not):
+# what the interpreter needs to start and find its packages, and the locale (SYSTEMROOT on Windows)
+INHERITED_ENV = ('PATH', 'PYTHONPATH', 'SYSTEMROOT', 'LANG', 'LANGUAGE')
+
+
+def check_archive(data):
+    """
+    Raise ValueError if an .xlsx expands beyond UPLOAD_MAX_DECOMPRESSED_BYTES.
+    The declared member sizes are what zipfile reads at most, so they bound the real expansion.
+    Non-zip workbooks (.xls) are only bounded by the upload size limit.
+    """
+    if not zipfile.is_zipfile(io.BytesIO(data)):
+        return
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        total = sum(info.file_size for info in archive.infolist())
+    if total > UPLOAD_MAX_DECOMPRESSED_BYTES:
+        raise ValueError(f'Workbook expands to {total / (1024 * 1024):.1f} MB, over the '
+                         f'{UPLOAD_MAX_DECOMPRESSED_BYTES / (1024 * 1024):.1f} MB limit')
+
+
+def encode_value(value):
+    """JSON fallback for cell values: numpy scalars as plain numbers, datetimes tagged so they round-trip"""
+    if hasattr(value, 'item'):
+        return value.item()
+    if isinstance(value, (datetime, date)):
+        return {'$datetime': value.isoformat()}
+    return str(value)
+
+
+def decode_value(obj):
+    if len(obj) == 1 and '$datetime' in obj:
+        return datetime.fromisoformat(obj['$datetime'])
+    return obj
+
+
+def pack_result(grouped):
+    """
+    Compact form of a parse result: field names listed once, every API a flat
+    [field index, value, ...] list, so the payload does not repeat the keys per API
+    """
+    if grouped is None:
+        return {'fields': [], 'repositories': None}
+    fields, index, repositories = [], {}, {}
+    for repo_url, apis in grouped.items():
+        rows = []
+        for api in apis:
+            row = []
+            for field, value in api.items():
+                if field not in index:
+                    index[field] = len(fields)
+                    fields.append(field)
+                row += [index[field], value]
+            rows.append(row)
+        repositories[repo_url] = rows
+    return {'fields': fields, 'repositories': repositories}
+
+
+def unpack_result(packed):
+    if packed['repositories'] is None:
+        return None
+    fields = packed['fields']
+    return {
+        repo_url: [{fields[row[i]]: row[i + 1] for i in range(0, len(row), 2)} for row in rows]
+        for repo_url, rows in packed['repositories'].items()
+    }
+
+
+def parse_upload(stream, on_progress=None):
+    """
+    Parse an uploaded workbook (binary file object) - same result and on_progress
+    contract as parse_transposed_excel - in the sandboxed worker unless disabled
+    """
+    if not UPLOAD_SANDBOX_ENABLED:
+        return parse_transposed_excel(stream, on_progress=on_progress)
+    return parse_in_sandbox(stream, on_progress)
+
+
+def worker_environment():
+    env = {name: value for name, value in os.environ.items() if name in INHERITED_ENV or name.startswith('LC_')}
+    return {**env, **WORKER_ENV}
+
+
+def _feed(stream, pipe):
+    try:
+        shutil.copyfileobj(stream, pipe)
+    except OSError:
+        pass  # worker died or was killed; its exit status is reported instead
+    finally:
+        try:
+            pipe.close()
+        except OSError:
+            pass
+
+
+def parse_in_sandbox(stream, on_progress=None):
+    """
+    Run parse_transposed_excel in a worker process fed the upload on stdin.
+    The worker answers with JSON lines (progress, error, result); it is killed after
+    UPLOAD_PARSE_TIMEOUT seconds. Failures are reported as on_progress(error=...) and return None.
+    """
+    report = on_progress or (lambda **progress: None)
+    started = time.time()
+    proc = subprocess.Popen(
+        [sys.executable, SANDBOX_SCRIPT],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        cwd=os.path.dirname(SANDBOX_SCRIPT), env=worker_environment()
+    )
+    timed_out = threading.Event()
+
+    def kill_on_timeout():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(UPLOAD_PARSE_TIMEOUT, kill_on_timeout)
+    timer.start()
+    threading.Thread(target=_feed, args=(stream, proc.stdin), daemon=True).start()
+
+    result, error = None, None
+    try:
+        for line in proc.stdout:
+            try:
+                message = json.loads(line, object_hook=decode_value)
+                kind = message.pop('type')
+            except (ValueError, KeyError, AttributeError):
+                error = 'Malformed output from the parser process'
+                proc.kill()
+                break
+            if kind == 'progress':
+                report(**message)
+            elif kind == 'error':
+                error = message.get('error')
+            elif kind == 'result':
+                result = unpack_result(message)
+        proc.wait()
+    finally:
+        timer.cancel()
+        proc.stdout.close()
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
+
+    if timed_out.is_set():
+        result, error = None, f'Parsing took longer than {UPLOAD_PARSE_TIMEOUT:g}s'
+    elif proc.returncode != 0 and result is None and error is None:
+        if proc.returncode == -getattr(signal, 'SIGXCPU', 0):
+            error = f'Parsing exceeded the {UPLOAD_PARSE_CPU_SECONDS}s CPU limit'
+        else:
+            error = f'Parser process exited with status {proc.returncode}'
+
+    print(f"Sandboxed parse finished in {(time.time() - started) * 1000:.0f}ms"
+          f"{f' - {error}' if error else ''}")
+    if error:
+        report(error=error)
+    return result
+
+
+def _limit(kind, soft, hard):
+    """Lower a resource limit, never above the current hard limit (the worker cannot raise it back)"""
+    _, current = resource.getrlimit(kind)
+    if current != resource.RLIM_INFINITY:
+        soft, hard = min(soft, current), min(hard, current)
+    resource.setrlimit(kind, (soft, hard))
+
+
+def worker_main():
+    """Worker side: read the workbook from stdin, parse it under rlimits, answer on stdout"""
+    # The protocol keeps the real stdout; the parser's own prints go to stderr (the server log)
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    sys.stdout = sys.stderr
+
+    def send(message):
+        protocol.write(json.dumps(message, separators=(',', ':'), default=encode_value) + '\n')
+        protocol.flush()
+
+    # Libraries are imported before the limits apply: only the parse itself runs under them
+    if resource is not None:
+        memory = UPLOAD_PARSE_MEMORY_MB * 1024 * 1024
+        _limit(resource.RLIMIT_AS, memory, memory)
+        # SIGXCPU at the soft limit, SIGKILL a second later if it is ignored
+        cpu = int(time.process_time()) + 1 + UPLOAD_PARSE_CPU_SECONDS
+        _limit(resource.RLIMIT_CPU, cpu, cpu + 1)
+
+    data = sys.stdin.buffer.read()
+    try:
+        check_archive(data)
+    except (ValueError, zipfile.BadZipFile) as e:
+        send({'type': 'error', 'error': str(e)})
+        send({'type': 'result', **pack_result(None)})
+        return
+
+    def on_progress(**progress):
+        send({'type': 'error' if 'error' in progress else 'progress', **progress})
+
+    grouped = parse_transposed_excel(io.BytesIO(data), on_progress=on_progress)
+    send({'type': 'result', **pack_result(grouped)})
+
+
+if __name__ == '__main__':
+    worker_main()
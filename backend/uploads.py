@@ -0,0 +1,436 @@
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from flask import Request
+
+
+# Largest request body accepted (Excel uploads are by far the biggest requests)
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', str(25 * 1024 * 1024)))
+# Uploaded files are kept in memory up to this size, then spill to an anonymous temp file
+UPLOAD_SPOOL_MEMORY = int(os.environ.get('UPLOAD_SPOOL_MEMORY', str(4 * 1024 * 1024)))
+
+ALLOWED_UPLOAD_EXTENSIONS = ('.xlsx', '.xls')
+
+# Parsed uploads kept server-side: idle sessions expire after UPLOAD_SESSION_TTL seconds,
+# the least recently used one is evicted beyond UPLOAD_SESSION_MAX sessions
+UPLOAD_SESSION_TTL = float(os.environ.get('UPLOAD_SESSION_TTL', '3600'))
+UPLOAD_SESSION_MAX = int(os.environ.get('UPLOAD_SESSION_MAX', '32'))
+# Shared by every worker process: an upload taken by one is read, streamed and published by any
+UPLOAD_DB_PATH = os.environ.get(
+    'UPLOAD_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'apix_uploads.db')
+)
+
+# Clients that opt in (?async=1 or Prefer: respond-async) get an upload id right away while the
+# parse runs on a background pool; others are answered after parsing, as before.
+# UPLOAD_ASYNC_PARSE=false parses every upload within the request
+UPLOAD_ASYNC_PARSE = os.environ.get('UPLOAD_ASYNC_PARSE', 'true').lower() != 'false'
+UPLOAD_PARSE_WORKERS = int(os.environ.get('UPLOAD_PARSE_WORKERS', '2'))
+# Progress streams (Server-Sent Events) send a keep-alive comment after this many idle seconds
+UPLOAD_EVENTS_KEEPALIVE = float(os.environ.get('UPLOAD_EVENTS_KEEPALIVE', '15'))
+# Progress streams check the database this often for events published by another worker process
+UPLOAD_EVENTS_POLL_INTERVAL = float(os.environ.get('UPLOAD_EVENTS_POLL_INTERVAL', '0.25'))
+
+# Identical workbooks (same SHA-256 of the uploaded bytes) reuse the live parse / upload session
+UPLOAD_DEDUPE_ENABLED = os.environ.get('UPLOAD_DEDUPE_ENABLED', 'true').lower() != 'false'
+
+FINISHED_UPLOAD_STATES = ('done', 'failed')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_sessions (
+    upload_id TEXT PRIMARY KEY,
+    filename TEXT,
+    content_hash TEXT,
+    repositories TEXT NOT NULL,
+    total_repos INTEGER NOT NULL,
+    total_apis INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS upload_sessions_by_hash ON upload_sessions (content_hash);
+CREATE TABLE IF NOT EXISTS upload_parses (
+    upload_id TEXT PRIMARY KEY,
+    filename TEXT,
+    content_hash TEXT,
+    status TEXT NOT NULL,
+    progress TEXT,
+    error TEXT,
+    parsed_by TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS upload_parses_by_hash ON upload_parses (content_hash, status);
+CREATE TABLE IF NOT EXISTS upload_events (
+    upload_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (upload_id, id)
+);
+"""
+
+
+class HashingSpooledFile(tempfile.SpooledTemporaryFile):
+    """Spooled upload buffer that hashes the bytes as the form parser writes them in"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return super().write(data)
+
+
+class SpooledUploadRequest(Request):
+    """
+    Request whose uploaded files are parsed into a SpooledTemporaryFile, so the
+    parser reads them straight from memory (or an unnamed temp file for large
+    uploads) without a named copy in /tmp; the file goes away when it is closed.
+    The content is hashed on the way in (see upload_content_hash).
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingSpooledFile(max_size=UPLOAD_SPOOL_MEMORY, mode='w+b')
+
+
+def wants_async_upload(request):
+    """True if the client asked for a background parse: ?async=1 / true, or a Prefer: respond-async header"""
+    if request.args.get('async', '').lower() in ('1', 'true'):
+        return True
+    preferences = [token.split(';', 1)[0].split('=', 1)[0].strip().lower() for token in request.headers.get('Prefer', '').split(',')]
+    return 'respond-async' in preferences
+
+
+def upload_content_hash(file):
+    """SHA-256 hex digest of an uploaded file, computed while it was received (None if not hashed)"""
+    sha256 = getattr(file.stream, 'sha256', None)
+    return sha256.hexdigest() if sha256 is not None else None
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _worker_alive(worker_id):
+    """False only for a process on this host that is gone (another host's workers are assumed alive)"""
+    host, _, pid = worker_id.rpartition(':')
+    if host != socket.gethostname():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, ValueError):
+        return True
+    return True
+
+
+class UploadSessionStore:
+    """
+    Parsed uploads by upload id (catalog grouped by repository URL, as returned
+    by parse_transposed_excel), so follow-up calls reference the upload instead
+    of sending its APIs back. TTL is sliding: every use extends the session.
+
+    Sessions live in a SQLite file shared by all worker processes, so any worker
+    serves the follow-up calls of an upload another one took. A session's content
+    never changes, so each process keeps the decoded repositories of the sessions it
+    used last (up to max_sessions) and only reads their expiry from the database.
+    """
+
+    def __init__(self, db_path=UPLOAD_DB_PATH, ttl=UPLOAD_SESSION_TTL, max_sessions=UPLOAD_SESSION_MAX):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.lock = threading.Lock()
+        self.decoded = OrderedDict()
+        self.stats = {'created': 0, 'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0, 'deduplicated': 0}
+        self.connect()
+
+    def connect(self):
+        """(Re)open the database connection; a forked worker process must open its own"""
+        self.conn = _connect(self.db_path)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _remember(self, upload_id, repositories):
+        """Keep a session's decoded repositories in this process (caller holds the lock)"""
+        self.decoded[upload_id] = repositories
+        self.decoded.move_to_end(upload_id)
+        while len(self.decoded) > self.max_sessions:
+            self.decoded.popitem(last=False)
+
+    def create(self, repositories, filename=None, upload_id=None, content_hash=None):
+        """Store a parsed upload (under upload_id if given); returns the new session"""
+        now = time.time()
+        session = {
+            'upload_id': upload_id or uuid.uuid4().hex,
+            'filename': filename,
+            'content_hash': content_hash,
+            'repositories': repositories,
+            'total_repos': len(repositories),
+            'total_apis': sum(len(apis) for apis in repositories.values()),
+            'created_at': now,
+            'expires_at': now + self.ttl
+        }
+        encoded = json.dumps(repositories, default=str)
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                expired = self.conn.execute('DELETE FROM upload_sessions WHERE expires_at < ?', (now,)).rowcount
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO upload_sessions (upload_id, filename, content_hash, repositories, '
+                    'total_repos, total_apis, created_at, expires_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    (session['upload_id'], filename, content_hash, encoded, session['total_repos'],
+                     session['total_apis'], now, session['expires_at'], now)
+                )
+                # Least recently used sessions beyond max_sessions
+                evicted = self.conn.execute(
+                    'DELETE FROM upload_sessions WHERE upload_id IN (SELECT upload_id FROM upload_sessions '
+                    'ORDER BY last_used DESC LIMIT -1 OFFSET ?)', (self.max_sessions,)
+                ).rowcount
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+            self._remember(session['upload_id'], repositories)
+            self.stats['created'] += 1
+            self.stats['expired'] += expired
+            self.stats['evicted'] += evicted
+        return session
+
+    def get(self, upload_id):
+        """The session (its TTL extended) or None if unknown / expired"""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT upload_id, filename, content_hash, total_repos, total_apis, created_at, expires_at '
+                'FROM upload_sessions WHERE upload_id = ?', (upload_id,)
+            ).fetchone()
+            if row is not None and row['expires_at'] < now:
+                self.conn.execute('DELETE FROM upload_sessions WHERE upload_id = ?', (upload_id,))
+                self.stats['expired'] += 1
+                row = None
+            if row is None:
+                self.decoded.pop(upload_id, None)
+                self.stats['misses'] += 1
+                return None
+            self.conn.execute('UPDATE upload_sessions SET expires_at = ?, last_used = ? WHERE upload_id = ?',
+                              (now + self.ttl, now, upload_id))
+            repositories = self.decoded.get(upload_id)
+            if repositories is None:
+                repositories = json.loads(self.conn.execute(
+                    'SELECT repositories FROM upload_sessions WHERE upload_id = ?', (upload_id,)
+                ).fetchone()[0])
+            self._remember(upload_id, repositories)
+            self.stats['hits'] += 1
+            return {**dict(row), 'repositories': repositories, 'expires_at': now + self.ttl}
+
+    def find(self, content_hash):
+        """The live session of an identical upload (its TTL extended), or None"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT upload_id FROM upload_sessions WHERE content_hash = ? ORDER BY last_used DESC LIMIT 1',
+                (content_hash,)
+            ).fetchone()
+        session = self.get(row['upload_id']) if row else None
+        if session is not None:
+            with self.lock:
+                self.stats['deduplicated'] += 1
+        return session
+
+    def delete(self, upload_id):
+        with self.lock:
+            self.decoded.pop(upload_id, None)
+            return self.conn.execute('DELETE FROM upload_sessions WHERE upload_id = ?', (upload_id,)).rowcount > 0
+
+    def metrics(self):
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(total_apis), 0) FROM upload_sessions WHERE expires_at >= ?', (time.time(),)
+            ).fetchone()
+            return {
+                'sessions': row[0],
+                'max_sessions': self.max_sessions,
+                'ttl_s': self.ttl,
+                'apis_held': row[1],
+                'decoded_in_process': len(self.decoded),
+                **self.stats
+            }
+
+
+class UploadProgress:
+    """
+    Background parses by upload id: status (queued, parsing, done, failed) and an
+    ordered event log that progress streams replay from any event id and then follow.
+    Finished uploads are forgotten ttl seconds after they finish.
+
+    Kept in the shared SQLite file, so a progress stream or status poll can reach any
+    worker process: streams in the parsing process are woken as events are published,
+    streams elsewhere poll every UPLOAD_EVENTS_POLL_INTERVAL. A parse whose process on
+    this host is gone (worker restarted mid-parse) is reported as failed.
+    """
+
+    def __init__(self, db_path=UPLOAD_DB_PATH, ttl=UPLOAD_SESSION_TTL, poll_interval=UPLOAD_EVENTS_POLL_INTERVAL):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.cond = threading.Condition()
+        self.connect()
+
+    def connect(self):
+        """(Re)open the database connection; a forked worker process must open its own"""
+        self.conn = _connect(self.db_path)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def start(self, filename=None, content_hash=None):
+        """Register a new upload (parsed by this process); returns its id"""
+        now = time.time()
+        upload_id = uuid.uuid4().hex
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                self.conn.execute('DELETE FROM upload_events WHERE upload_id IN (SELECT upload_id FROM upload_parses '
+                                  'WHERE finished_at < ?)', (now - self.ttl,))
+                self.conn.execute('DELETE FROM upload_parses WHERE finished_at < ?', (now - self.ttl,))
+                self.conn.execute(
+                    'INSERT INTO upload_parses (upload_id, filename, content_hash, status, progress, parsed_by, created_at) '
+                    "VALUES (?, ?, ?, 'queued', '{}', ?, ?)",
+                    (upload_id, filename, content_hash, _worker_id(), now)
+                )
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+        self.publish(upload_id, 'queued')
+        return upload_id
+
+    def publish(self, upload_id, event, data=None, status=None):
+        """Append an event (and move the upload to status); wakes up every stream waiting on it"""
+        data = data or {}
+        now = time.time()
+        with self.lock:
+            self.conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self.conn.execute('SELECT status FROM upload_parses WHERE upload_id = ?', (upload_id,)).fetchone()
+                if row is None:
+                    self.conn.execute('ROLLBACK')
+                    return
+                current = status or row['status']
+                self.conn.execute(
+                    'UPDATE upload_parses SET status = ?, finished_at = CASE WHEN ? THEN ? ELSE finished_at END, '
+                    'progress = CASE WHEN ? THEN ? ELSE progress END, error = CASE WHEN ? THEN ? ELSE error END '
+                    'WHERE upload_id = ?',
+                    (current, current in FINISHED_UPLOAD_STATES, now, event == 'progress', json.dumps(data),
+                     event == 'failed', data.get('error'), upload_id)
+                )
+                next_id = self.conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM upload_events WHERE upload_id = ?',
+                                            (upload_id,)).fetchone()[0]
+                self.conn.execute(
+                    'INSERT INTO upload_events (upload_id, id, event, data) VALUES (?, ?, ?, ?)',
+                    (upload_id, next_id, event, json.dumps({'upload_id': upload_id, 'status': current, **data}))
+                )
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+            self.conn.execute('COMMIT')
+        with self.cond:
+            self.cond.notify_all()
+
+    def _load(self, upload_id):
+        with self.lock:
+            row = self.conn.execute('SELECT * FROM upload_parses WHERE upload_id = ?', (upload_id,)).fetchone()
+        return self._settle(row)
+
+    def _settle(self, row):
+        """Upload status dict for a row; an active parse whose process died is failed first"""
+        if row is None:
+            return None
+        if row['status'] not in FINISHED_UPLOAD_STATES and not _worker_alive(row['parsed_by']):
+            self.publish(row['upload_id'], 'failed', {'error': 'Parse interrupted: the worker process parsing '
+                                                               'this upload exited - please upload the file again'},
+                         status='failed')
+            return self._load(row['upload_id'])
+        upload = dict(row)
+        upload['progress'] = json.loads(upload['progress'] or '{}')
+        return upload
+
+    def get(self, upload_id):
+        """Status of an upload (without its events) or None if unknown"""
+        return self._load(upload_id)
+
+    def find_active(self, content_hash):
+        """Status of a queued or running parse of identical content, or None"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM upload_parses WHERE content_hash = ? AND status NOT IN ('done', 'failed') "
+                'ORDER BY created_at DESC', (content_hash,)
+            ).fetchall()
+        for row in rows:
+            upload = self._settle(row)
+            if upload['status'] not in FINISHED_UPLOAD_STATES:
+                return upload
+        return None
+
+    def events(self, upload_id, after=0, timeout=UPLOAD_EVENTS_KEEPALIVE):
+        """
+        Events with an id above `after`, waiting up to timeout for one to arrive.
+        Returns (events, finished) or None if the upload is unknown.
+        """
+        deadline = time.time() + timeout
+        while True:
+            upload = self._load(upload_id)
+            if upload is None:
+                return None
+            with self.lock:
+                rows = self.conn.execute(
+                    'SELECT id, event, data FROM upload_events WHERE upload_id = ? AND id > ? ORDER BY id',
+                    (upload_id, after)
+                ).fetchall()
+            events = [{'id': row['id'], 'event': row['event'], 'data': json.loads(row['data'])} for row in rows]
+            finished = upload['status'] in FINISHED_UPLOAD_STATES
+            remaining = deadline - time.time()
+            if events or finished or remaining <= 0:
+                return events, finished
+            with self.cond:
+                self.cond.wait(min(remaining, self.poll_interval))
+
+    def metrics(self):
+        with self.lock:
+            counts = {row['status']: row['count'] for row in self.conn.execute(
+                'SELECT status, COUNT(*) AS count FROM upload_parses GROUP BY status'
+            )}
+        return {'tracked': sum(counts.values()), **counts}
+
+
+def detach_upload_stream(file):
+    """
+    Take the spooled stream away from an uploaded file, so it outlives the request
+    (Flask closes request files when the request ends); the caller must close it
+    """
+    stream = file.stream
+    file.stream = tempfile.SpooledTemporaryFile()
+    return stream
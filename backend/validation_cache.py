@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+# APIX validation verdicts are reused for identical content for this long
+APIX_VALIDATION_CACHE_TTL = float(os.environ.get('APIX_VALIDATION_CACHE_TTL', '600'))
+APIX_VALIDATION_CACHE_MAX_ENTRIES = int(os.environ.get('APIX_VALIDATION_CACHE_MAX_ENTRIES', '4096'))
+
+# Answers that are a verdict on the content: success or a validation rejection. Anything else
+# (401/403 auth, 429 throttling, 5xx) depends on the moment and is never replayed
+CACHEABLE_STATUS_CODES = (200, 400, 422)
+
+
+def canonical_json(document):
+    """Key order and whitespace independent serialization"""
+    return json.dumps(document, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def document_hash(document):
+    return hashlib.sha256(canonical_json(document).encode()).hexdigest()
+
+
+def api_blocks(document):
+    """The per-API blocks of an apiMetaData document (empty list for any other shape)"""
+    api_list = ((document or {}).get('apiMetaData') or {}).get('apiMetaDataList') if isinstance(document, dict) else None
+    return api_list if isinstance(api_list, list) else []
+
+
+class ValidationCache:
+    """
+    TTL + LRU cache of APIX validation verdicts keyed by the canonical JSON hash.
+
+    - Whole documents: the verdict and error payload are replayed for identical content
+    - API blocks: every block of a document that passed is remembered as valid, so a
+      document made only of already-validated blocks (e.g. the same API shared
+      across repos) is answered without calling APIX
+    - Only definitive answers (200 / 4xx) are stored; transport errors and 5xx are not
+    """
+
+    def __init__(self, ttl=APIX_VALIDATION_CACHE_TTL, max_entries=APIX_VALIDATION_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.stats = {'hits': 0, 'block_hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _get_entry(self, key, now):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry['expires_at'] < now:
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    def _put_entry(self, key, outcome, now):
+        self.entries[key] = {'outcome': outcome, 'expires_at': now + self.ttl}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def get(self, document, doc_hash=None):
+        """Cached outcome (a copy marked cached=True) or None"""
+        doc_hash = doc_hash or document_hash(document)
+        blocks = api_blocks(document)
+        block_keys = [('block', document_hash(block)) for block in blocks]
+        now = time.time()
+        with self.lock:
+            entry = self._get_entry(('document', doc_hash), now)
+            if entry is not None:
+                self.stats['hits'] += 1
+                return {**entry['outcome'], 'cached': True}
+            if block_keys and all(self._get_entry(key, now) is not None for key in block_keys):
+                self.stats['block_hits'] += 1
+                return {
+                    'valid': True,
+                    'status_code': 200,
+                    'message': 'JSON validation successful',
+                    'details': {'apiCount': len(block_keys), 'validated_blocks': 'all API blocks previously passed APIX validation'},
+                    'cached': True
+                }
+            self.stats['misses'] += 1
+            return None
+
+    def store(self, document, outcome, doc_hash=None):
+        status_code = outcome.get('status_code') or 0
+        if 'error' in outcome or status_code not in CACHEABLE_STATUS_CODES:
+            return
+        doc_hash = doc_hash or document_hash(document)
+        now = time.time()
+        outcome = {key: value for key, value in outcome.items() if key not in ('elapsed_ms', 'cached')}
+        with self.lock:
+            self._put_entry(('document', doc_hash), outcome, now)
+            if outcome['valid']:
+                for block in api_blocks(document):
+                    self._put_entry(('block', document_hash(block)), {'valid': True}, now)
+            self.stats['stores'] += 1
+
+    def metrics(self):
+        with self.lock:
+            hits = self.stats['hits'] + self.stats['block_hits']
+            lookups = hits + self.stats['misses']
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'ttl_s': self.ttl,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+                **self.stats
+            }
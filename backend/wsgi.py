@@ -0,0 +1,25 @@
+"""
+Production entry point (run from the backend directory)
+
+    gunicorn -c gunicorn.conf.py    pre-fork: the master imports this module, workers share
+                                    the warmed-up catalog copy-on-write (see gunicorn.conf.py)
+    python wsgi.py                  waitress: one process, WEB_THREADS threads (e.g. on Windows)
+
+`python app.py` stays the development server (reloader + debugger).
+"""
+import os
+
+from app import app, warm_up
+
+# Before the server binds its workers to traffic: the catalog is loaded here, not on the first request
+warm_up()
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    serve(
+        app,
+        listen=os.environ.get('WEB_BIND', '0.0.0.0:5001'),
+        threads=int(os.environ.get('WEB_THREADS', '8')),
+        channel_timeout=int(os.environ.get('WEB_TIMEOUT', '120'))
+    )
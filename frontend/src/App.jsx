@@ -784,42 +784,22 @@ function App() {
 
  
 
-      const response = await axios.post(`${API_BASE_URL}/api/publish`, {
-
- 
-
+      // Publishing is queued server-side (retried on APIX errors); poll the job until it finishes
+      let { data: job } = await axios.post(`${API_BASE_URL}/api/publish`, {
         repository_url: repoUrl
-
- 
-
       });
-
- 
-
-      if (response.data.success) {
-
- 
-
-        setPublishResult(response.data);
-
- 
-
-        setSuccess(response.data.message);
-
- 
-
+      while (job.status_url && !job.done) {
+        setSuccess(job.attempts > 1 ? `Publishing API metadata... (retrying, attempt ${job.attempts})` : 'Publishing API metadata...');
+        await new Promise((resolve) => setTimeout(resolve, 1500));
+        ({ data: job } = await axios.get(`${API_BASE_URL}${job.status_url}`));
+      }
+      const result = job.status_url ? job.result || {} : job;
+      if (result.success) {
+        setPublishResult(result);
+        setSuccess(result.message);
       } else {
-
- 
-
-        setError(response.data.error || 'Failed to publish');
-
- 
-
+        setError(result.error || job.error || 'Failed to publish');
       }
-
- 
-
     } catch (err) {
 
  
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the GitHub REST calls of the PR flow.
+
+Keeps repositories in memory (branches, files, pull requests) and serves the
+subset create_pr and check_pr_status use: repository info, refs, contents and
+pulls. GraphQL answers 404, so the backend takes its REST path. Opening a PR
+whose branch has the same files as the base fails with GitHub's 422
+"No commits between".
+
+Usage:
+    python github_stub_server.py --port 8090
+    GITHUB_API_BASE=http://localhost:8090 GITHUB_TOKEN=x python backend/app.py
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# (owner, repo) -> {'default_branch', 'refs': {branch: sha}, 'files': {(branch, path): (blob sha, bytes)}, 'pulls': [...]}
+REPOS = {}
+STATS = {'requests': 0, 'pulls_created': 0, 'commits': 0}
+LOCK = threading.Lock()
+
+
+def blob_sha(data):
+    return hashlib.sha1(b'blob %d\0' % len(data) + data).hexdigest()
+
+
+def repo_state(owner, repo):
+    """State of a repository, created empty (default branch 'main') on first use"""
+    with LOCK:
+        return REPOS.setdefault((owner.lower(), repo.lower()), {
+            'default_branch': 'main', 'refs': {'main': '0' * 40}, 'files': {}, 'pulls': []
+        })
+
+
+def merge_pull(owner, repo, number):
+    """Merge an open PR: its branch's files land on the default branch, the branch is kept"""
+    state = repo_state(owner, repo)
+    with LOCK:
+        pull = next(pull for pull in state['pulls'] if pull['number'] == number)
+        for (branch, path), blob in list(state['files'].items()):
+            if branch == pull['head']['ref']:
+                state['files'][(state['default_branch'], path)] = blob
+        pull.update(state='closed', merged=True, merged_at='2024-01-01T00:00:00Z')
+
+
+class GitHubStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self, method):
+        STATS['requests'] += 1
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'null') if length else None
+
+        match = re.match(r'^/repos/([^/]+)/([^/]+)(/.*)?$', url.path)
+        if not match:
+            return self._send(404, {'message': 'Not Found'})
+        owner, repo, rest = match.group(1), match.group(2), match.group(3) or ''
+        state = repo_state(owner, repo)
+        with LOCK:
+            return self._route(method, owner, repo, rest, params, body, state)
+
+    def _route(self, method, owner, repo, rest, params, body, state):
+        if rest == '' and method == 'GET':
+            return self._send(200, {'name': repo, 'full_name': f'{owner}/{repo}', 'default_branch': state['default_branch']})
+
+        ref = re.match(r'^/git/refs/heads/(.+)$', rest)
+        if ref and method == 'GET':
+            sha = state['refs'].get(ref.group(1))
+            if sha is None:
+                return self._send(404, {'message': 'Not Found'})
+            return self._send(200, {'ref': f'refs/heads/{ref.group(1)}', 'object': {'sha': sha}})
+        if rest == '/git/refs' and method == 'POST':
+            branch = body['ref'].split('refs/heads/', 1)[1]
+            if branch in state['refs']:
+                return self._send(422, {'message': 'Reference already exists'})
+            state['refs'][branch] = body['sha']
+            for (source, path), blob in list(state['files'].items()):
+                if source == state['default_branch']:
+                    state['files'][(branch, path)] = blob
+            return self._send(201, {'ref': body['ref'], 'object': {'sha': body['sha']}})
+
+        contents = re.match(r'^/contents/(.+)$', rest)
+        if contents:
+            path = contents.group(1)
+            branch = params.get('ref') or (body or {}).get('branch') or state['default_branch']
+            existing = state['files'].get((branch, path))
+            if method == 'GET':
+                if existing is None:
+                    return self._send(404, {'message': 'Not Found'})
+                return self._send(200, {'sha': existing[0], 'content': base64.b64encode(existing[1]).decode()})
+            if method == 'PUT':
+                if existing and body.get('sha') != existing[0]:
+                    return self._send(409, {'message': f'{path} does not match {body.get("sha")}'})
+                data = base64.b64decode(body['content'])
+                state['files'][(branch, path)] = (blob_sha(data), data)
+                state['refs'][branch] = hashlib.sha1(data + branch.encode()).hexdigest()
+                STATS['commits'] += 1
+                return self._send(200 if existing else 201, {'content': {'sha': blob_sha(data)},
+                                                             'commit': {'sha': state['refs'][branch]}})
+
+        if rest == '/pulls' and method == 'GET':
+            branch = params.get('head', '').split(':', 1)[-1]
+            wanted = params.get('state', 'open')
+            return self._send(200, [
+                pull for pull in state['pulls']
+                if pull['head']['ref'] == branch and wanted in ('all', pull['state'])
+            ])
+        if rest == '/pulls' and method == 'POST':
+            head, base = body['head'], body['base']
+            if any(pull['head']['ref'] == head and pull['state'] == 'open' for pull in state['pulls']):
+                return self._send(422, {'message': 'Validation Failed',
+                                        'errors': [{'message': f'A pull request already exists for {owner}:{head}.'}]})
+            files = {branch: {path: blob[0] for (name, path), blob in state['files'].items() if name == branch}
+                     for branch in (head, base)}
+            if files[head] == files[base]:
+                return self._send(422, {'message': 'Validation Failed',
+                                        'errors': [{'message': f'No commits between {base} and {head}'}]})
+            number = len(state['pulls']) + 1
+            pull = {'number': number, 'html_url': f'https://github.com/{owner}/{repo}/pull/{number}',
+                    'state': 'open', 'merged': False, 'merged_at': None, 'head': {'ref': head}, 'title': body.get('title')}
+            state['pulls'].insert(0, pull)
+            STATS['pulls_created'] += 1
+            return self._send(201, pull)
+
+        pull = re.match(r'^/pulls/(\d+)$', rest)
+        if pull and method == 'GET':
+            for candidate in state['pulls']:
+                if candidate['number'] == int(pull.group(1)):
+                    return self._send(200, candidate)
+        return self._send(404, {'message': 'Not Found'})
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        if self.path.startswith('/graphql'):
+            self.rfile.read(int(self.headers.get('Content-Length') or 0))
+            return self._send(404, {'message': 'Not Found'})
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+
+def start_stub_server(port=0):
+    """Start the stand-in in a background thread; returns (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), GitHubStubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local GitHub REST stand-in for the PR flow')
+    parser.add_argument('--port', type=int, default=8090)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(('0.0.0.0', args.port), GitHubStubHandler)
+    print(f"GitHub stub listening on http://localhost:{args.port}")
+    server.serve_forever()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Bulk validation against the local APIX stand-in (no network access needed)"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from apix_stub_server import STATS, start_stub_server
+
+server, base_url = start_stub_server(latency=0.2)
+os.environ['APIX_BASE_URL'] = base_url
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from app import app, catalog_repo_urls, get_catalog
+
+print("=" * 60)
+print(f"Bulk validation against APIX stub at {base_url}")
+print("=" * 60)
+
+catalog = get_catalog()
+if catalog is None:
+    print("❌ Catalog could not be loaded (set API_META_DATA_FILE)")
+    sys.exit(1)
+repo_urls = catalog_repo_urls(catalog)
+print(f"\nValidating {len(repo_urls)} repositories...")
+
+client = app.test_client()
+started = time.perf_counter()
+response = client.post('/api/validate/bulk', json={'all': True, 'concurrency': 8})
+lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+elapsed = time.perf_counter() - started
+
+for result in lines[:-1]:
+    marker = '✅' if result.get('valid') else '❌'
+    print(f"   {marker} {result.get('repository_url')} {result.get('error') or result.get('errors') or ''}")
+
+summary = lines[-1]
+print(f"\nSummary: {summary}")
+print(f"Stub validate calls: {STATS['validate']}, elapsed {elapsed:.2f}s "
+      f"(sequential would be ~{STATS['validate'] * 0.2:.1f}s)")
+
+if not summary.get('summary') or summary['total'] != len(repo_urls):
+    print("❌ Summary line missing or incomplete")
+    sys.exit(1)
+print("\nTest complete!")
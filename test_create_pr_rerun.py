@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Re-running create_pr for unchanged content is a no-op (local GitHub stand-in, REST path)"""
+
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+from github_stub_server import STATS, merge_pull, repo_state, start_stub_server
+
+server, base_url = start_stub_server()
+state_dir = tempfile.mkdtemp(prefix='apix-test-')
+os.environ.update({
+    'GITHUB_API_BASE': base_url,
+    'GITHUB_TOKEN': 'stub-token',
+    'GITHUB_COMMIT_MODE': 'rest',
+    'JOB_RUNNER_AUTOSTART': 'false',
+    'JOBS_DB_PATH': os.path.join(state_dir, 'jobs.db'),
+    'PR_STATE_DB_PATH': os.path.join(state_dir, 'pr_state.db'),
+    'PUBLISH_SNAPSHOT_DB_PATH': os.path.join(state_dir, 'snapshots.db'),
+})
+os.environ.setdefault('API_META_DATA_FILE', os.path.join(ROOT, 'Api_MetaData.xlsx'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from app import app, catalog_repo_urls, get_catalog
+
+print("=" * 60)
+print(f"create_pr re-runs against GitHub stub at {base_url}")
+print("=" * 60)
+
+catalog = get_catalog()
+if catalog is None:
+    print("❌ Catalog could not be loaded (set API_META_DATA_FILE)")
+    sys.exit(1)
+repo_url = catalog_repo_urls(catalog)[0]
+owner, repo = repo_url.rstrip('/').split('/')[-2:]
+client = app.test_client()
+failures = 0
+
+
+def create_pr(content):
+    response = client.post('/api/create-pr', json={'repository_url': repo_url, 'json_content': json.dumps(content)})
+    return response.status_code, response.get_json()
+
+
+def check(label, ok, detail=''):
+    global failures
+    print(f"   {'✅' if ok else '❌'} {label}{f' - {detail}' if detail and not ok else ''}")
+    if not ok:
+        failures += 1
+
+
+print(f"\nRepository: {repo_url}")
+
+print("\n1. First run opens the PR:")
+status, body = create_pr({'version': 1})
+check('PR created', status == 200 and body.get('pr_number') == 1, body)
+check('per-step timings reported', 'pr_create_ms' in (body.get('timings_ms') or {}), body.get('timings_ms'))
+
+print("\n2. Re-run with the PR still open:")
+commits = STATS['commits']
+status, body = create_pr({'version': 1})
+check('up to date, same PR', status == 200 and body.get('up_to_date') and body.get('pr_number') == 1, body)
+check('no commit made', STATS['commits'] == commits)
+
+print("\n3. Changed content with the PR still open:")
+status, body = create_pr({'version': 2})
+check('committed onto the open PR', status == 200 and body.get('pr_number') == 1 and body.get('pr_created') is False, body)
+
+print("\n4. Re-run after the PR was merged (branch kept):")
+merge_pull(owner, repo, 1)
+commits, pulls = STATS['commits'], STATS['pulls_created']
+status, body = create_pr({'version': 2})
+check('up to date on the default branch, no PR', status == 200 and body.get('up_to_date') and body.get('pr_number') is None, body)
+check('no commit and no PR attempt', STATS['commits'] == commits and STATS['pulls_created'] == pulls)
+
+print("\n5. New content after the merge:")
+status, body = create_pr({'version': 3})
+check('new PR opened from the kept branch', status == 200 and body.get('pr_number') == 2, body)
+check('two PRs in total', len(repo_state(owner, repo)['pulls']) == 2)
+
+print("\n" + "=" * 60)
+if failures:
+    print(f"❌ {failures} check(s) failed")
+    sys.exit(1)
+print("Test complete!")
+print("=" * 60)
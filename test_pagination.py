@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Paging, sorting and field projection of listings (backend/pagination.py)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+from pagination import paginate, parse_listing, project, wants_listing
+
+print("=" * 60)
+print("Testing listing pagination")
+print("=" * 60)
+
+failures = 0
+
+
+def check(label, ok, detail=''):
+    global failures
+    print(f"   {'✅' if ok else '❌'} {label}{f' - {detail}' if detail and not ok else ''}")
+    if not ok:
+        failures += 1
+
+
+print("\n1. Parsing listing parameters:")
+check('no parameters is not a listing', not wants_listing({}))
+check('limit alone is a listing', wants_listing({'limit': '5'}))
+listing = parse_listing({'offset': '2', 'limit': '3', 'sort': '-name', 'fields': 'name,version'})
+check('offset / limit / sort / fields parsed',
+      listing == {'offset': 2, 'limit': 3, 'sort': 'name', 'descending': True,
+                  'fields': ['name', 'version'], 'summary': False}, listing)
+for bad in ({'limit': '0'}, {'offset': '-1'}, {'limit': 'ten'}, {'limit': '100000'}):
+    try:
+        parse_listing(bad)
+        check(f'{bad} rejected', False)
+    except ValueError:
+        check(f'{bad} rejected', True)
+
+print("\n2. Sorting and paging:")
+items = [{'name': 'b', 'n': 2}, {'name': 'a'}, {'name': 'C', 'n': 10}, {'name': 'd', 'n': None}, {'name': 'e', 'n': 1}]
+page, meta = paginate(items, parse_listing({'sort': 'n'}))
+check('ascending, missing values last', [item['name'] for item in page] == ['e', 'b', 'C', 'a', 'd'], page)
+page, meta = paginate(items, parse_listing({'sort': '-n'}))
+check('descending, missing values still last', [item['name'] for item in page] == ['C', 'b', 'e', 'a', 'd'], page)
+page, meta = paginate(items, parse_listing({'sort': 'name', 'limit': '2', 'offset': '2'}))
+check('strings sort case-insensitively, page cut after sorting', [item['name'] for item in page] == ['C', 'd'], page)
+check('page metadata', meta == {'offset': 2, 'limit': 2, 'total': 5, 'next_offset': 4, 'sort': 'name'}, meta)
+page, meta = paginate(items, parse_listing({'offset': '4', 'limit': '2'}))
+check('last page has no next_offset', meta['next_offset'] is None and len(page) == 1, meta)
+
+print("\n3. Field projection:")
+check('requested fields only', project({'a': 1, 'b': 2}, ['b', 'c']) == {'b': 2, 'c': None})
+check('all fields when none requested', project({'a': 1}, []) == {'a': 1})
+
+print("\n" + "=" * 60)
+if failures:
+    print(f"❌ {failures} check(s) failed")
+    sys.exit(1)
+print("Test complete!")
+print("=" * 60)
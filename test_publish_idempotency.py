@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Re-sent publishes of the same content are applied once by APIX (content-derived Idempotency-Key)"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+import apix_stub_server
+from github_stub_server import repo_state, start_stub_server
+
+apix_server, apix_url = apix_stub_server.start_stub_server()
+github_server, github_url = start_stub_server()
+state_dir = tempfile.mkdtemp(prefix='apix-test-')
+os.environ.update({
+    'APIX_BASE_URL': apix_url,
+    'GITHUB_API_BASE': github_url,
+    'GITHUB_TOKEN': 'stub-token',
+    'JOB_RUNNER_AUTOSTART': 'false',
+    'JOBS_DB_PATH': os.path.join(state_dir, 'jobs.db'),
+    'PR_STATE_DB_PATH': os.path.join(state_dir, 'pr_state.db'),
+    'PUBLISH_SNAPSHOT_DB_PATH': os.path.join(state_dir, 'snapshots.db'),
+})
+os.environ.setdefault('API_META_DATA_FILE', os.path.join(ROOT, 'Api_MetaData.xlsx'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from app import apix_branch_name, catalog_repo_urls, find_api_by_repo, get_catalog, run_publish_task
+from jobs import TaskFailed
+
+print("=" * 60)
+print(f"Publish idempotency against APIX stub at {apix_url}")
+print("=" * 60)
+
+catalog = get_catalog()
+if catalog is None:
+    print("❌ Catalog could not be loaded (set API_META_DATA_FILE)")
+    sys.exit(1)
+repo_url = catalog_repo_urls(catalog)[0]
+owner, repo = repo_url.rstrip('/').split('/')[-2:]
+failures = 0
+
+# The repo's APIX PR is merged, so publishing is allowed
+branch = apix_branch_name(find_api_by_repo(repo_url))
+state = repo_state(owner, repo)
+state['refs'][branch] = '1' * 40
+state['pulls'].append({'number': 1, 'html_url': f'https://github.com/{owner}/{repo}/pull/1', 'state': 'closed',
+                       'merged': True, 'merged_at': '2024-01-01T00:00:00Z', 'head': {'ref': branch}})
+
+
+def check(label, ok, detail=''):
+    global failures
+    print(f"   {'✅' if ok else '❌'} {label}{f' - {detail}' if detail and not ok else ''}")
+    if not ok:
+        failures += 1
+
+
+def publish(payload):
+    try:
+        return run_publish_task(repo_url, payload, {})
+    except TaskFailed as e:
+        return {'error': str(e), **(e.result or {})}
+
+
+def document(version):
+    return {'apiMetaData': {'apiMetaDataList': [{'apiTechnicalName': 'idempotency-api', 'version': version,
+                                                 'platform': {'name': 'x'}, 'snowData': {'id': 'y'},
+                                                 'sourceCode': {'url': repo_url}}]}}
+
+
+print(f"\nRepository: {repo_url}")
+
+print("\n1. First publish:")
+first = publish({'document': document('1.0.0'), 'force': True})
+check('published', first.get('success'), first)
+check('Idempotency-Key reported', bool(first.get('idempotency_key')), first)
+
+print("\n2. Same content sent again (force, as a retry whose response was lost would):")
+second = publish({'document': document('1.0.0'), 'force': True})
+check('same key sent', second.get('idempotency_key') == first.get('idempotency_key'), second)
+check('APIX replayed the first publish', apix_stub_server.STATS['publish_replayed'] == 1, apix_stub_server.STATS)
+check('one publish applied', len(apix_stub_server.PUBLISHED_KEYS) == 1, apix_stub_server.PUBLISHED_KEYS)
+
+print("\n3. Different content gets its own key:")
+third = publish({'document': document('2.0.0')})
+check('new key', third.get('idempotency_key') not in (None, first.get('idempotency_key')), third)
+check('applied as a new publish', len(apix_stub_server.PUBLISHED_KEYS) == 2, apix_stub_server.PUBLISHED_KEYS)
+
+print("\n" + "=" * 60)
+if failures:
+    print(f"❌ {failures} check(s) failed")
+    sys.exit(1)
+print("Test complete!")
+print("=" * 60)
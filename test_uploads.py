@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Excel uploads: synchronous by default, async on request, deduplication and progress events"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+
+import openpyxl
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+state_dir = tempfile.mkdtemp(prefix='apix-test-')
+os.environ.update({
+    'JOB_RUNNER_AUTOSTART': 'false',
+    'JOBS_DB_PATH': os.path.join(state_dir, 'jobs.db'),
+    'PR_STATE_DB_PATH': os.path.join(state_dir, 'pr_state.db'),
+    'PUBLISH_SNAPSHOT_DB_PATH': os.path.join(state_dir, 'snapshots.db'),
+    'UPLOAD_DB_PATH': os.path.join(state_dir, 'uploads.db'),
+})
+os.environ.setdefault('API_META_DATA_FILE', os.path.join(ROOT, 'Api_MetaData.xlsx'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from app import app
+from uploads import UPLOAD_DB_PATH, UploadProgress, UploadSessionStore
+
+WORKBOOK = os.path.join(ROOT, 'Api_MetaData.xlsx')
+
+print("=" * 60)
+print("Testing Excel uploads")
+print("=" * 60)
+
+client = app.test_client()
+failures = 0
+
+
+def check(label, ok, detail=''):
+    global failures
+    print(f"   {'✅' if ok else '❌'} {label}{f' - {detail}' if detail and not ok else ''}")
+    if not ok:
+        failures += 1
+
+
+def workbook_bytes(title=None):
+    """The sample workbook, re-saved with another title for different bytes and the same APIs"""
+    if title is None:
+        with open(WORKBOOK, 'rb') as f:
+            return f.read()
+    workbook = openpyxl.load_workbook(WORKBOOK)
+    workbook.properties.title = title
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def upload(data, query='', headers=None):
+    response = client.post(f'/api/upload-excel{query}', headers=headers or {},
+                           data={'file': (io.BytesIO(data), 'Api_MetaData.xlsx')}, content_type='multipart/form-data')
+    return response.status_code, response.get_json()
+
+
+def sse_events(url):
+    events = []
+    for block in client.get(url).get_data(as_text=True).split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in block.splitlines() if ': ' in line and not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+print("\n1. Synchronous by default:")
+status, body = upload(workbook_bytes())
+check('parsed within the request', status == 200 and body.get('total_repos', 0) > 0 and body.get('repositories'), status)
+check('not deduplicated', body.get('deduplicated') is False)
+upload_id = body.get('upload_id')
+
+print("\n2. Identical workbook again:")
+status, body = upload(workbook_bytes())
+check('same upload session reused', status == 200 and body.get('deduplicated') and body.get('upload_id') == upload_id, body.get('upload_id'))
+status, body = upload(workbook_bytes(), '?limit=3&sort=repository_url')
+check('listing page from the reused session', status == 200 and len(body.get('repositories', [])) == 3, body)
+
+print("\n3. Async when the client opts in:")
+async_copy = workbook_bytes('async copy')
+status, body = upload(async_copy, '?async=1')
+check('202 with an upload id', status == 202 and body.get('upload_id') and body.get('deduplicated') is False, body)
+async_id = body.get('upload_id')
+events = sse_events(body.get('events_url', ''))
+names = [name for name, _ in events]
+check('progress events end with done', names and names[-1] == 'done', names)
+check('progress reported while parsing', 'progress' in names, names)
+response = client.get(f'/api/uploads/{async_id}?limit=2')
+check('result paged once done', response.status_code == 200 and len(response.get_json().get('repositories', [])) == 2,
+      response.status_code)
+
+print("\n4. Prefer: respond-async and deduplication in async mode:")
+status, body = upload(async_copy, headers={'Prefer': 'respond-async'})
+check('identical workbook answered from its session', status == 200 and body.get('deduplicated')
+      and body.get('upload_id') == async_id and body.get('status') == 'done', body)
+status, body = upload(async_copy, '?async=1&limit=5')
+check('listing parameters rejected in async mode', status == 400 and 'error' in body, body)
+
+print("\n5. Uploads are visible to another worker process (own connection, nothing cached):")
+other_sessions, other_progress = UploadSessionStore(UPLOAD_DB_PATH), UploadProgress(UPLOAD_DB_PATH)
+session = other_sessions.get(async_id)
+check('session and its repositories', session is not None and session['total_repos'] == len(session['repositories']))
+check('identical workbook found by hash', (other_sessions.find(session['content_hash']) or {}).get('upload_id') == async_id)
+check('parse status', (other_progress.get(async_id) or {}).get('status') == 'done')
+polled = other_progress.events(async_id, after=0, timeout=0)
+check('progress events replayed', polled and polled[1] and [event['event'] for event in polled[0]] == names, polled)
+check('deleted for every worker', other_sessions.delete(async_id) and client.get(f'/api/uploads/{async_id}').status_code != 200)
+
+print("\n" + "=" * 60)
+if failures:
+    print(f"❌ {failures} check(s) failed")
+    sys.exit(1)
+print("Test complete!")
+print("=" * 60)